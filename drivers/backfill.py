@@ -0,0 +1,83 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# hack
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, pkg_root)
+
+from pkg.scraper import (
+    TeamRankingsDataScraper,
+    TeamRankingsScheduleScraper,
+    add_scrape_job,
+    drain_scrape_jobs,
+)
+from pkg.jobqueue import get_job_queue
+
+
+"""
+Backfill scraped data for a range of dates
+
+Adds a scrape job for the team stats and the schedule (plus
+outcomes and odds) of every date in the range to the persistent
+scrape job queue (data/jobs/), then works through the queue.
+Failed pages are retried with backoff, and failures are listed
+at the end.
+
+The queue is saved on disk, so this can be stopped and re-run
+at any time; it picks up where it left off. Run it with no dates
+to just work through whatever is left in the queue. Several
+copies can run at once, to work through the same queue faster.
+
+Usage: python drivers/backfill.py [START_DATE END_DATE]
+(dates are YYYY-MM-DD)
+"""
+
+
+DATADIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+def main(start_date=None, end_date=None):
+    model_params = {
+        'data_directory': DATADIR,
+        'scrape_job_workers': 4,
+        # One browser session per worker
+        'browser_pool_size': 4,
+    }
+    queue = get_job_queue(DATADIR)
+
+    if start_date is not None:
+        dates = []
+        counter_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+        while counter_dt <= end_dt:
+            dates.append(counter_dt.strftime("%Y-%m-%d"))
+            counter_dt += timedelta(days=1)
+
+        # One job per missing stat page, plus one per date's schedule
+        n = 0
+        for k, this_date in TeamRankingsDataScraper(model_params).get_missing_pages(dates):
+            n += add_scrape_job(queue, 'data', TeamRankingsDataScraper, this_date, prefix=k)
+        for this_date in dates:
+            n += add_scrape_job(queue, 'schedule', TeamRankingsScheduleScraper, this_date)
+        print(f"Added {n} scrape jobs")
+
+    failures = drain_scrape_jobs(model_params)
+
+    print("")
+    print("Scrape jobs:")
+    for status, count in sorted(queue.counts().items()):
+        print(f"\t{status}:\t{count}")
+    for kind, key, attempts, error in failures:
+        print(f"Failed {kind} {key} after {attempts} attempts: {error}")
+    if len(failures)>0:
+        print("Re-run with the same dates to retry failed jobs")
+
+
+if __name__=="__main__":
+    if len(sys.argv)==3:
+        main(sys.argv[1], sys.argv[2])
+    elif len(sys.argv)==1:
+        main()
+    else:
+        print("Usage: python drivers/backfill.py [START_DATE END_DATE]")
@@ -25,9 +25,10 @@ For each game, it passes game information to the model,
 which uses that input data plus data obtained in the
 prepare() method to return predictions about the score.
 
-The backtest() method assembles a JSON file with results
-for each game for later analysis, plus it prints a brief
-statistics summary table, so you don't have to analyze the JSON.
+The backtest() method writes the results for each game to
+a JSONL file (one game per line, see pkg/results.py) for later
+analysis, plus it prints a brief statistics summary table,
+so you don't have to analyze the JSONL.
 """
 
 
@@ -39,7 +40,9 @@ def backtest():
     model_params = {
         'data_directory': DATADIR,
         'quiet': False,
-        'print_stats': True
+        'print_stats': True,
+        # Number of processes to use for predictions
+        'backtest_workers': 4,
     }
     model = NCAABModel(model_params)
 
@@ -0,0 +1,123 @@
+import sys
+import os
+import time
+import json
+import tempfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# hack
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, pkg_root)
+
+from pkg.archive import HtmlArchive
+from pkg.fixtures import FixtureServer, add_synthetic_day
+from pkg.httpclient import get_http_client
+from pkg.scraper import TeamRankingsDataScraper, TeamRankingsScheduleScraper, SCRAPER_WORKERS
+
+
+"""
+Benchmark the web scrapers, without touching the real sites
+
+Generates a synthetic day of TeamRankings pages (3 stat pages,
+a schedule, and 4 pages for each game), serves them from a local
+fixture server (see pkg/fixtures.py), and reports:
+
+- raw page fetch throughput (pages/sec)
+- parse time for each type of page
+- end-to-end schedule scraper fetch_all() time for the day
+  (schedule, plus outcome and odds pages for every game)
+
+The stat pages need Selenium; add --selenium to also time the
+stat scraper's fetch_all() (requires a browser and driver).
+
+Usage: python drivers/benchmark_scrapers.py [--games N] [--rps R] [--workers W] [--selenium]
+"""
+
+
+GAME_DATE = "2025-01-15"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against a local fixture server")
+    parser.add_argument("--games", type=int, default=60, help="number of games on the synthetic day")
+    parser.add_argument("--rps", type=float, default=1000.0, help="requests per second limit")
+    parser.add_argument("--workers", type=int, default=SCRAPER_WORKERS, help="scraper worker threads")
+    parser.add_argument("--repeat", type=int, default=5, help="times to parse each page")
+    parser.add_argument("--selenium", action="store_true", help="also time the stat scraper (uses a browser)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as fixture_dir, tempfile.TemporaryDirectory() as data_dir:
+        archive = HtmlArchive(fixture_dir)
+        urls = add_synthetic_day(archive, GAME_DATE, n_games=args.games)
+        server = FixtureServer(archive).start()
+
+        model_params = {
+            'data_directory': data_dir,
+            'quiet': True,
+            'base_url': server.base_url,
+            'archive_html': False,
+            'requests_per_second': args.rps,
+            'scraper_workers': args.workers,
+        }
+        ds = TeamRankingsDataScraper(model_params)
+        ss = TeamRankingsScheduleScraper(model_params)
+
+        print("")
+        print("\t==================================================")
+        print(f"\tScraper Benchmark: {args.games} games, {args.workers} workers, {args.rps:g} requests/sec max")
+        print("\t==================================================")
+
+        # ----------------------
+        # Raw fetch throughput
+        all_urls = [url for kind_urls in urls.values() for url in kind_urls]
+        client = get_http_client(model_params)
+        t = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            pages = list(executor.map(lambda url: client.get(ss._get_fetch_url(url)), all_urls))
+        elapsed = time.perf_counter() - t
+        mb = sum(len(page) for page in pages)/1e6
+        print(f"\tFetch:\t\t{len(pages)} pages ({mb:.1f} MB) in {elapsed:.2f} s = {len(pages)/elapsed:.0f} pages/sec")
+
+        # ----------------------
+        # Parse time per page type
+        parsers = {
+            'stat':      lambda src: ds._html2json(src, 'tempo'),
+            'schedule':  ss._html2json_sched,
+            'game':      ss._html2json_g,
+            'moneyline': ss._html2json_ml,
+            'spread':    ss._html2json_sp,
+            'ou':        ss._html2json_ou,
+        }
+        print("")
+        print("\tParse time per page:")
+        for kind, parse in parsers.items():
+            srcs = [archive.get(url) for url in urls[kind]]
+            t = time.perf_counter()
+            for _ in range(args.repeat):
+                for src in srcs:
+                    parse(src)
+            per_page = (time.perf_counter() - t)/(args.repeat*len(srcs))
+            print(f"\t\t{kind+':':<12}{1000*per_page:7.2f} ms")
+
+        # ----------------------
+        # End-to-end fetch_all
+        print("")
+        t = time.perf_counter()
+        ss.fetch_all(GAME_DATE, force=True)
+        elapsed = time.perf_counter() - t
+        with open(ss._get_fpath_json("trschedule", GAME_DATE.replace("-", "")), 'r') as f:
+            n_odds = len([game for game in json.load(f) if 'odds' in game])
+        print(f"\tSchedule fetch_all():\t{elapsed:.2f} s for {args.games} games ({4*args.games+1} pages, {n_odds} games scraped)")
+
+        if args.selenium:
+            t = time.perf_counter()
+            ds.fetch_all(GAME_DATE, force=True)
+            elapsed = time.perf_counter() - t
+            print(f"\tStats fetch_all():\t{elapsed:.2f} s for 3 pages (Selenium)")
+
+        server.stop()
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,31 @@
+import sys
+import os
+
+# hack
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, pkg_root)
+
+from pkg.geo import build_geo_table
+from pkg.constants import TEAM_BIN_DIR
+
+
+"""
+Build the precomputed team x team geo table
+
+This script computes the travel distance, timezone, and
+same-conference flag for every pair of schools, and stores
+the result under data/teams/bin/. The model memory-maps this
+table instead of computing distances and timezones per game.
+
+Re-run this whenever the team lat/long or conference data changes.
+"""
+
+
+def build():
+    print(f"Building geo table in {TEAM_BIN_DIR}")
+    geo = build_geo_table(TEAM_BIN_DIR)
+    print(f"Done, {len(geo.teams)} teams")
+
+
+if __name__=="__main__":
+    build()
@@ -0,0 +1,47 @@
+import sys
+import os
+from datetime import datetime
+
+# hack
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, pkg_root)
+
+from pkg.cube import build_stat_cube
+from pkg.utils import get_season_year
+
+
+"""
+Build the season stat cube
+
+Packs every TeamRankings stat file (tempo, offensive efficiency,
+defensive efficiency) for a season into one memory-mapped array
+under data/teamrankings/bin/. Models read stats from the cube,
+if it exists, instead of parsing hundreds of JSON files.
+
+Re-run this after scraping new dates, so they are in the cube too.
+Dates scraped after the cube was built are still read from JSON.
+
+Usage: python drivers/build_stat_cube.py [SEASON_START_YEAR ...]
+(defaults to the current season)
+"""
+
+
+DATADIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+def main(years):
+    for year in years:
+        cube = build_stat_cube(DATADIR, year)
+        n_teams, n_dates, n_columns = cube.values.shape
+        print(f"Built {year} season stat cube: {n_teams} teams x {n_dates} dates x {n_columns} stat columns")
+        inexact = [c for c in cube.columns if not cube.is_exact(c)]
+        if len(inexact)>0:
+            print(f"These columns will still be read from JSON files: {', '.join(inexact)}")
+
+
+if __name__=="__main__":
+    if len(sys.argv)>1:
+        years = [int(y) for y in sys.argv[1:]]
+    else:
+        years = [get_season_year(datetime.now().strftime("%Y%m%d"))]
+    main(years)
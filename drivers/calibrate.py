@@ -0,0 +1,69 @@
+import sys
+import os
+
+# hack
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, pkg_root)
+
+from pkg.calibration import ConfidenceCalibrator
+from pkg.model import NCAABModel, KenpomNCAABModel
+
+
+"""
+Calibrate the per-conference confidence scores of the forward tester
+
+Each model is calibrated on its own: reads the results of that
+model's backtests in data/backtest/json/ (only the files that are
+new or changed since the last run), and computes each conference's
+win rate vs Vegas, shrunk toward the win rate of all games. If the
+scores changed, a new version of the model's confidence table is
+saved to data/calibration/<model>/, and forward tests of that model
+use it from then on (instead of CONFIDENCES in pkg/constants.py).
+
+Run a backtest of every conference first (drivers/conference_backtest.py
+and drivers/kenpom_conference_backtest.py), and re-run this script
+after backtesting new days.
+"""
+
+
+DATADIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+# Each model, and the test names of the backtests that ran it
+CALIBRATIONS = [
+    (NCAABModel, ["backtest_conferences", "backtest_all"]),
+    (KenpomNCAABModel, ["backtest_conferences_kenpom", "backtest_all_kenpom"]),
+]
+
+
+def calibrate():
+    for model_class, test_names in CALIBRATIONS:
+        calibrate_model(model_class.__name__, test_names)
+
+
+def calibrate_model(model_name, test_names):
+    calibrator = ConfidenceCalibrator(DATADIR, model_name, test_names)
+    n = calibrator.update()
+    print(f"Read {n} new or changed backtest results files for {model_name}")
+    if calibrator.get_table()['n_games']==0:
+        print(f"No backtest results for {model_name} (test names: {', '.join(test_names)})")
+        return
+    table = calibrator.save()
+
+    print("")
+    print("\t==================================================")
+    print(f"\tConference Confidences: {model_name}, version {table['version']}")
+    print("\t==================================================")
+    print(f"\tDates:\t\t\t{table['start_date']} to {table['end_date']}")
+    print(f"\tN games vs Vegas:\t{table['n_games']}")
+    print(f"\tW-L% vs Vegas:\t\t{table['league_win_pct']}%")
+    print("\t(confidence = conference W-L% vs Vegas, shrunk toward the overall W-L%)")
+    print("")
+    print("\tConference\tW-L\t\tConfidence")
+    for conf, confidence in table['confidences'].items():
+        wins, losses = table['records'][conf]
+        print(f"\t{conf}\t\t{wins} - {losses}\t\t{confidence}")
+    print("")
+
+
+if __name__=="__main__":
+    calibrate()
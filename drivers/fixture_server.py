@@ -0,0 +1,52 @@
+import sys
+import os
+import time
+import argparse
+
+# hack
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, pkg_root)
+
+from pkg.archive import HtmlArchive
+from pkg.fixtures import FixtureServer
+
+
+"""
+Run the record/replay fixture server
+
+Serves every page in a data directory's raw HTML archive
+(data/archive/) on localhost. Point the scrapers at it by
+setting the model parameter base_url to the URL printed below;
+they then scrape the recorded pages instead of the real sites.
+
+With --record, pages that are not in the archive yet are fetched
+from the real site and added to the archive (stat pages need a
+browser to render, so record those by scraping them normally).
+
+Usage: python drivers/fixture_server.py [--data DATADIR] [--port PORT] [--record]
+"""
+
+
+DATADIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay fixture server for the scrapers")
+    parser.add_argument("--data", default=DATADIR, help="data directory whose archive to serve")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--record", action="store_true", help="fetch and archive pages we do not have")
+    args = parser.parse_args()
+
+    server = FixtureServer(HtmlArchive(args.data), port=args.port, record=args.record).start()
+    mode = "Recording" if args.record else "Replaying"
+    print(f"{mode} {len(server.archive.entries())} archived pages at {server.base_url}")
+    print(f"Set the model parameter 'base_url': '{server.base_url}' to scrape from it (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__=="__main__":
+    main()
@@ -14,6 +14,13 @@ from pkg.constants import CONFERENCES
 
 """
 Backtest by Conference of the Olsonator NCAA basketball model
+
+Runs one backtest of every game involving a team in any
+conference (each game is predicted once), and prints the
+results broken down by conference. A game between teams of
+two conferences counts toward both. Add 'team' to group_by
+for a breakdown by team too. Every breakdown is also saved
+to the backtest's _metrics.json file.
 """
 
 
@@ -36,11 +43,10 @@ def backtest():
 
 
 def do_backtests(confs, model):
-    for c in confs:
-        conf_teams = [k for k,v in CONFERENCES.items() if v == c]
-        backtester = KenpomBacktester(model, start_date="2024-11-04", end_date="2025-01-31", teams=conf_teams)
-        backtester.prepare()
-        backtester.backtest(test_name=f"backtest_{c}")
+    conf_teams = [k for k,v in CONFERENCES.items() if v in confs]
+    backtester = KenpomBacktester(model, start_date="2024-11-04", end_date="2025-01-31", teams=conf_teams)
+    backtester.prepare()
+    backtester.backtest(test_name="backtest_conferences_kenpom", group_by=['conference'])
 
 
 def print_teams(confs):
@@ -16,7 +16,8 @@ Forward test the Olsonator NCAA basketball model
 
 This script creates a model, and runs forward tests
 of the model to make predictions of NCAAB games
-(today or tomorrow).
+(today or tomorrow). The predictions are saved to a JSONL
+file (one game per line) in data/fwdtest/json/.
 """
 
 
@@ -0,0 +1,37 @@
+import sys
+import os
+
+# hack
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, pkg_root)
+
+from pkg.scraper import reparse_archive
+
+
+"""
+Rebuild all scraped JSON data from the raw HTML archive
+
+Every page the scrapers fetch is saved (compressed) in the
+raw HTML archive under data/archive/. After fixing or changing
+one of the HTML parsers, run this script to re-parse every
+archived page and rebuild the JSON files, without re-scraping.
+This does not access the network. A date with a page missing
+from the archive is reported, and its JSON file is left as is.
+"""
+
+
+DATADIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+def main():
+    model_params = {
+        'data_directory': DATADIR,
+    }
+    errors = reparse_archive(model_params)
+    for error in errors:
+        print(f"Could not re-parse {error}")
+    print("Done re-parsing the raw HTML archive")
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+
+"""
+Archive of every raw HTML page the scrapers fetch
+
+Pages are stored gzip-compressed under data/archive/blobs/,
+named by the SHA-256 of their contents (so a page that has not
+changed is only stored once). An append-only index file
+(data/archive/index.jsonl) records the URL, fetch date, and
+content hash of each fetch.
+
+With the archive, a fix to one of the HTML parsers can be applied
+to all past data by re-parsing the archived pages (see
+drivers/reparse.py), instead of scraping everything again.
+"""
+
+
+class HtmlArchive(object):
+    """Content-addressed, compressed store of raw HTML pages, indexed by URL and fetch date"""
+    def __init__(self, datadir):
+        self.root = os.path.join(datadir, 'archive')
+        self.blobdir = os.path.join(self.root, 'blobs')
+        self.index_fpath = os.path.join(self.root, 'index.jsonl')
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _get_blob_fpath(self, digest):
+        return os.path.join(self.blobdir, digest[:2], digest + ".html.gz")
+
+    def _load_index(self):
+        """Load the index into {url: [entries, oldest first]} (once per process)"""
+        if self._index is None:
+            self._index = {}
+            try:
+                with open(self.index_fpath, 'r') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.decoder.JSONDecodeError:
+                            # Partial last line from an interrupted write
+                            continue
+                        self._index.setdefault(entry['url'], []).append(entry)
+            except FileNotFoundError:
+                pass
+        return self._index
+
+    def put(self, url, src, fetch_date=None):
+        """
+        Add a fetched page to the archive.
+        src can be str (Selenium) or bytes (requests).
+        fetch_date defaults to today (YYYY-MM-DD).
+        """
+        is_text = isinstance(src, str)
+        data = src.encode('utf-8') if is_text else src
+        digest = hashlib.sha256(data).hexdigest()
+        if fetch_date is None:
+            fetch_date = datetime.now().strftime("%Y-%m-%d")
+
+        blob_fpath = self._get_blob_fpath(digest)
+        if not os.path.exists(blob_fpath):
+            os.makedirs(os.path.dirname(blob_fpath), exist_ok=True)
+            tmp_fpath = f"{blob_fpath}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_fpath, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_fpath, blob_fpath)
+
+        entry = {
+            'url':        url,
+            'fetch_date': fetch_date,
+            'sha256':     digest,
+            'text':       is_text,
+        }
+        with self._lock:
+            with open(self.index_fpath, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+            if self._index is not None:
+                self._index.setdefault(url, []).append(entry)
+
+    def get_entry(self, url, fetch_date=None):
+        """
+        Return the index entry of the most recently archived copy of a page
+        (optionally, the most recent one fetched on fetch_date),
+        or None if it is not in the archive.
+        """
+        with self._lock:
+            entries = self._load_index().get(url, [])
+        if fetch_date is not None:
+            entries = [e for e in entries if e['fetch_date']==fetch_date]
+        if len(entries)==0:
+            return None
+        return entries[-1]
+
+    def find_entry(self, url):
+        """
+        Return the index entry of the most recent copy of a page, like
+        get_entry(), except that a URL for a specific date (?date=YYYY-MM-DD)
+        also matches the page without a date that was fetched on that date.
+        Returns None if it is not in the archive.
+        """
+        entry = self.get_entry(url)
+        if entry is None and "?date=" in url:
+            base_url, date = url.split("?date=")
+            entry = self.get_entry(base_url, fetch_date=date)
+        return entry
+
+    def read(self, entry):
+        """Return the page of an index entry, as str or bytes (same as when it was fetched)"""
+        with gzip.open(self._get_blob_fpath(entry['sha256']), 'rb') as f:
+            data = f.read()
+        return data.decode('utf-8') if entry['text'] else data
+
+    def get(self, url, fetch_date=None):
+        """
+        Return the most recently archived copy of a page
+        (optionally, the most recent one fetched on fetch_date),
+        as str or bytes (same as when it was fetched),
+        or None if it is not in the archive.
+        """
+        entry = self.get_entry(url, fetch_date)
+        return None if entry is None else self.read(entry)
+
+    def find(self, url):
+        """
+        Return the most recent copy of a page, like get(), except that a
+        URL for a specific date (?date=YYYY-MM-DD) also matches the page
+        without a date that was fetched on that date.
+        Returns None if it is not in the archive.
+        """
+        entry = self.find_entry(url)
+        return None if entry is None else self.read(entry)
+
+    def entries(self):
+        """Return a list of every index entry"""
+        with self._lock:
+            index = self._load_index()
+            return [e for entries in index.values() for e in entries]
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def get_html_archive(datadir):
+    """Return the process-wide HtmlArchive for a data directory"""
+    with _archives_lock:
+        if datadir not in _archives:
+            _archives[datadir] = HtmlArchive(datadir)
+        return _archives[datadir]
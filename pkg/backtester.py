@@ -1,10 +1,12 @@
 import math
 import os
-import pathlib
 import copy
-import statistics
+import pathlib
+import itertools
+import numpy as np
 import simplejson as json
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 #import cbbpy.mens_scraper as CbbpyScraper
 
 from .model import ModelBase
@@ -12,19 +14,59 @@ from .scraper import (
     TeamRankingsDataScraper,
     TeamRankingsScheduleScraper,
     KenpomDataScraper,
+    get_journal_fpath,
+    add_scrape_job,
+    drain_scrape_jobs,
+    INLINE_SCRAPE_ATTEMPTS,
+    SCRAPE_JOB_WORKERS,
 )
-from .errors import TeamNotFoundException, ModelPredictException
+from .jobqueue import get_job_queue
+from .predcache import PredictionCache
+from .games import load_games
+from .results import JsonlResultWriter, BacktestSummary
+from .metrics import GROUP_BYS
+from .errors import TeamNotFoundException, ModelPredictException, ModelParameterException
 from .teams import (
-    is_kenpom_team,
-    is_donch_team,
-    is_teamrankings_team,
+    team_id,
+    teamrankings_name,
+    resolve_team_names,
     normalize_to_teamrankings_names,
-    donch2teamrankings,
-    kenpom2donch,
 )
 from .utils import repl
 
 
+# Number of days of games to read, predict, and write out at once in a backtest
+BACKTEST_CHUNK_DAYS = 30
+
+
+def predict_games(model, games):
+    """
+    Use a model to make predictions for a list of games.
+    Uses the model's batch prediction method, if it has one.
+
+    This is a module-level function so that it can be
+    run in a worker process (see Backtester._predict_games).
+
+    Returns a list with one entry per game:
+    (away_points, home_points), or None if no prediction was made
+    """
+    if hasattr(model, 'predict_batch'):
+        away, home, valid = model.predict_batch(games)
+        predictions = []
+        for away_points, home_points, ok in zip(away.tolist(), home.tolist(), valid.tolist()):
+            predictions.append((away_points, home_points) if ok else None)
+        return predictions
+
+    predictions = []
+    for game in games:
+        try:
+            predictions.append(model.predict(game))
+        except (TeamNotFoundException, ModelPredictException):
+            # Note: first few days of season, no off/def data, so no predictions
+            predictions.append(None)
+    return predictions
+
+
 class Backtester(object):
     """
     Class that manages the entire backtesting process.
@@ -53,12 +95,15 @@ class Backtester(object):
         self.datadir = os.path.join(self.model_parameters['data_directory'])
         self.sched_datadir = os.path.join(self.datadir, 'schedule', 'json')
         self.bktst_datadir = os.path.join(self.datadir, 'backtest', 'json')
+        self.cache_datadir = os.path.join(self.datadir, 'backtest', 'cache')
 
         if not os.path.exists(self.sched_datadir):
             pathlib.Path(self.sched_datadir).mkdir(parents=True)
         if not os.path.exists(self.bktst_datadir):
             pathlib.Path(self.bktst_datadir).mkdir(parents=True)
 
+        self._prediction_cache = None
+
         # Verify the dates are valid, but keep as str
         self.start_date = datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y-%m-%d")
         self.end_date = datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y-%m-%d")
@@ -76,15 +121,16 @@ class Backtester(object):
 
         # If user wants, they can provide a list of teams
         self.teams = []
+        self.team_ids = set()
         if teams is not None:
             for team in teams:
                 # Verify the team is valid, then stash
-                if is_teamrankings_team(team):
-                    self.teams.append(team)
-                elif is_donch_team(team):
-                    self.teams.append(donch2teamrankings(team))
-                elif is_kenpom_team(team):
-                    self.teams.append(donch2teamrankings(kenpom2donch(team)))
+                try:
+                    tid = team_id(team)
+                except TeamNotFoundException:
+                    continue
+                self.teams.append(teamrankings_name(tid))
+                self.team_ids.add(tid)
 
         # Verbosity
         self.nohush = not ('quiet' in self.model_parameters and self.model_parameters['quiet'] is True)
@@ -96,6 +142,14 @@ class Backtester(object):
         fpath = os.path.join(self.sched_datadir, fname)
         return fpath
 
+    def _get_backtest_fpath_jsonl(self, test_name):
+        """Get path to JSONL file (one game per line) for backtest results"""
+        return os.path.splitext(self._get_backtest_fpath_json(test_name))[0] + ".jsonl"
+
+    def _get_backtest_fpath_metrics(self, test_name):
+        """Get path to JSON file for backtest metrics"""
+        return os.path.splitext(self._get_backtest_fpath_json(test_name))[0] + "_metrics.json"
+
     def _get_backtest_fpath_json(self, test_name):
         """Get path to JSON file for schedule data for given date stamp"""
         stamp = datetime.now().strftime("%Y%m%d")
@@ -104,6 +158,147 @@ class Backtester(object):
         fpath = os.path.join(self.bktst_datadir, fname)
         return fpath
 
+    def _is_our_game(self, game):
+        """Does this game involve one of the teams we are backtesting (if any)?"""
+        if len(self.team_ids)==0:
+            return True
+        try:
+            return team_id(game['home_team']) in self.team_ids or team_id(game['away_team']) in self.team_ids
+        except TeamNotFoundException:
+            return False
+
+    def _predict_games(self, games):
+        """
+        Use the model to make predictions for a list of games.
+
+        Predictions are reused from the prediction cache
+        (see pkg/predcache.py) for any game whose model and
+        input stat files have not changed since it was last
+        predicted. Only the remaining games are predicted.
+        Set the model parameter prediction_cache to False
+        to disable the cache.
+
+        Returns a list with one entry per game:
+        (away_points, home_points), or None if no prediction was made
+        """
+        cache = self._get_prediction_cache()
+        if cache is None:
+            return self._predict_new_games(games)
+
+        game_params = self.model.required_game_params
+        predictions = [None]*len(games)
+        todo = []
+
+        # Look up cached predictions, one date at a time
+        date_inputs = {}
+        date_cached = {}
+        for i, game in enumerate(games):
+            date = game['game_date']
+            if date not in date_inputs:
+                fpaths = self.model.get_input_fpaths(date.replace("-", ""))
+                if fpaths is None:
+                    date_inputs[date] = None
+                    date_cached[date] = {}
+                else:
+                    date_inputs[date] = PredictionCache.hash_inputs(fpaths)
+                    date_cached[date] = cache.get_date(date, date_inputs[date])
+
+            key = PredictionCache.get_game_key(game, game_params)
+            if key in date_cached[date]:
+                predictions[i] = tuple(date_cached[date][key])
+            else:
+                todo.append(i)
+
+        if self.nohush:
+            print(f"Reusing {len(games) - len(todo)} cached predictions, making {len(todo)} new predictions")
+
+        new_predictions = self._predict_new_games([games[i] for i in todo])
+
+        # Games we could not predict are not cached, so they are retried next time
+        new_cached = {}
+        for i, prediction in zip(todo, new_predictions):
+            predictions[i] = prediction
+            date = games[i]['game_date']
+            if prediction is not None and date_inputs[date] is not None:
+                key = PredictionCache.get_game_key(games[i], game_params)
+                new_cached.setdefault(date, {})[key] = list(prediction)
+
+        for date, cached in new_cached.items():
+            cache.put_date(date, date_inputs[date], cached)
+        cache.save()
+
+        return predictions
+
+    def _get_prediction_cache(self):
+        """Return the PredictionCache for this backtest's model, or None if not using one"""
+        if not self.model_parameters.get('prediction_cache', True):
+            return None
+        fingerprint = self.model.get_fingerprint()
+        if fingerprint is None:
+            return None
+        # Keep the cache loaded between chunks of a backtest
+        if self._prediction_cache is None or self._prediction_cache.fingerprint != fingerprint:
+            self._prediction_cache = PredictionCache(self.cache_datadir, fingerprint)
+        return self._prediction_cache
+
+    def _predict_new_games(self, games):
+        """
+        Use the model to make predictions for a list of games.
+
+        If the model parameter backtest_workers is more than 1,
+        the games are split into shards of consecutive dates,
+        and each shard is predicted in its own process.
+        Predictions are returned in the same order as the games,
+        so the results are identical to a serial run.
+        Worker processes do not print each prediction (their output
+        would be interleaved); progress is printed as shards finish.
+
+        Returns a list with one entry per game:
+        (away_points, home_points), or None if no prediction was made
+        """
+        workers = self.model_parameters.get('backtest_workers', 1)
+        shards = self._shard_games_by_date(games, workers)
+
+        if len(shards) <= 1:
+            return predict_games(self.model, games)
+
+        if self.nohush:
+            print(f"Predicting {len(games)} games in {len(shards)} worker processes")
+
+        worker_model = copy.copy(self.model)
+        worker_model.model_parameters = dict(self.model.model_parameters, quiet=True)
+
+        predictions = []
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [executor.submit(predict_games, worker_model, shard) for shard in shards]
+            for k, (future, shard) in enumerate(zip(futures, shards)):
+                shard_predictions = future.result()
+                predictions += shard_predictions
+                if self.nohush:
+                    n = sum(p is not None for p in shard_predictions)
+                    print(f"Worker {k+1} of {len(shards)} predicted {n} of {len(shard)} games, {shard[0]['game_date']} to {shard[-1]['game_date']}")
+        return predictions
+
+    def _shard_games_by_date(self, games, nshards):
+        """
+        Split a list of games into (at most) nshards lists,
+        each covering a contiguous range of game dates.
+        Each shard then only needs to load stat files for its own dates.
+        """
+        # Index of the first game of each date
+        starts = []
+        for i, game in enumerate(games):
+            if i==0 or game['game_date'] != games[i-1]['game_date']:
+                starts.append(i)
+
+        nshards = max(1, min(nshards, len(starts)))
+        if nshards==1:
+            return [games]
+
+        # Slice the list (never reorder it) at date boundaries
+        bounds = [starts[int(k*len(starts)/nshards)] for k in range(nshards)] + [len(games)]
+        return [games[bounds[k]:bounds[k+1]] for k in range(nshards)]
+
     def _get_schedule_data(self):
         """
         Get (scrape) schedule data (everything required for
@@ -111,39 +306,68 @@ class Backtester(object):
 
         Uses TeamRankings.com for schedule data
         """
-        schedule_data = []
+        self._scrape_schedule_data()
+        return self._load_schedule_data(self.all_dates)
 
-        ss = self.ScheduleScraperClass(self.model_parameters)
+    def _iter_schedule_data(self):
+        """
+        Get (scrape) schedule data, like _get_schedule_data(), but yield
+        it a chunk of backtest_chunk_days dates at a time, so only one
+        chunk of games is in memory at once.
+        """
+        self._scrape_schedule_data()
+        days = self.model_parameters.get('backtest_chunk_days', BACKTEST_CHUNK_DAYS)
+        for i in range(0, len(self.all_dates), days):
+            yield self._load_schedule_data(self.all_dates[i:i+days])
 
+    def _scrape_schedule_data(self):
+        """
+        Scrape any missing or incomplete (journal still exists) schedule files
+        through the persistent scrape job queue (one job per date, plus one per game)
+        """
+        scrape_dates = []
         for date in self.all_dates:
+            fpath = self._get_schedule_fpath_json(date.replace("-", ""))
+            if not os.path.exists(fpath) or os.path.exists(get_journal_fpath(fpath)):
+                if self.nohush:
+                    print(f"Missing or incomplete file at {fpath}, creating ourselves")
+                add_scrape_job(get_job_queue(self.datadir), 'schedule', self.ScheduleScraperClass, date)
+                scrape_dates.append(date)
+
+        if len(scrape_dates)>0:
+            failures = drain_scrape_jobs(self.model_parameters, dates=scrape_dates, max_attempts=INLINE_SCRAPE_ATTEMPTS)
+            self._print_scrape_failures(failures)
+
+    def _load_schedule_data(self, dates):
+        """Load the (already scraped) schedule data for a list of dates"""
+        schedule_data = []
+
+        for date in dates:
             today_data = []
             date_nodashes = date.replace("-", "")
             fpath = self._get_schedule_fpath_json(date_nodashes)
 
             # Try to load 
             try:
+                if os.path.exists(get_journal_fpath(fpath)):
+                    # Scraping this date's schedule and odds data did not finish
+                    raise FileNotFoundError("")
                 if self.nohush:
                     print(f"Loading schedule data from {fpath}")
-                with open(fpath, 'r') as f:
-                    today_data = json.load(f)
-                if len(today_data)==0 or 'odds' not in today_data[-1].keys():
-                    # We populated schedule data, but did not finish populating odds data
-                    # (b/c last game in list does not have any odds data)
-                    # Raise FileNotFoundError to force fetch_all() to run, and populate those odds
-                    raise FileNotFoundError("")
+                today_data = load_games(fpath)
                 schedule_data += today_data
 
             except json.decoder.JSONDecodeError:
                 print(f"Invalid JSON file at {fpath}, try removing the file and re-running")
 
             except FileNotFoundError:
-                if self.nohush:
-                    print(f"Missing or incomplete file at {fpath}, creating ourselves")
-                ss.fetch_all(date)
+                print(f"Missing or incomplete file at {fpath}, skipping {date} (re-run to retry)")
 
-                with open(fpath, 'r') as f:
-                    today_data = json.load(f)
-                schedule_data += today_data
+        # Fuzzy match any team names we have never seen before, all at once
+        names = {game['away_team'] for game in schedule_data} | {game['home_team'] for game in schedule_data}
+        unknown = resolve_team_names(names)
+        if self.nohush and len(unknown)>0:
+            print(f"Could not resolve team names: {', '.join(sorted(unknown))}")
 
         return schedule_data
 
@@ -283,8 +507,9 @@ class Backtester(object):
         backtest.
         """
         # Procedure:
+        # - get the schedule, and find the dates our games are on
         # - create instance of scraper class
-        # - iterate over each date in this backtest
+        # - iterate over each date with games in this backtest
         # - pass that date to the scraper class
         # - scraper class:
         #    - uses selenium
@@ -295,21 +520,65 @@ class Backtester(object):
         # - (we do not process/handle results here)
         # - (we do not dump anything to files)
 
+        # Plan every missing (stat, date) page up front, then scrape them all
+        # through the persistent scrape job queue, several pages at a time.
+        # A page that fails is skipped (drivers/backfill.py retries it with backoff),
+        # and an interrupted run picks up where it left off.
+        # Only dates with at least one of our games need stats
+        # (skips days off, and most days of a backtest of a few teams)
+        game_dates = set()
+        for schedule_data in self._iter_schedule_data():
+            game_dates.update(self._get_game_dates(schedule_data))
+        game_dates = sorted(game_dates)
+
         ds = self.DataScraperClass(self.model_parameters)
+        pages = ds.get_missing_pages(game_dates)
+
+        queue = get_job_queue(self.datadir)
+        for k, this_date in pages:
+            add_scrape_job(queue, 'data', self.DataScraperClass, this_date, prefix=k)
+
+        if self.nohush:
+            print(f"Backtester is now scraping {len(pages)} missing pages of data about teams on {len(game_dates)} dates with games (of {len(self.all_dates)} dates)")
 
-        for this_date in self.all_dates:
-            if self.nohush:
-                print(f"Backtester is now scraping data about teams on {this_date}")
-            ds.fetch_all(this_date)
+        # One browser session per worker, so pages really are fetched concurrently
+        params = dict(self.model_parameters)
+        workers = params.get('scrape_job_workers', SCRAPE_JOB_WORKERS)
+        params.setdefault('browser_pool_size', workers)
 
-    def backtest(self, test_name):
+        job_dates = sorted({this_date for _, this_date in pages} | set(self.all_dates))
+        failures = drain_scrape_jobs(params, dates=job_dates, workers=workers, max_attempts=INLINE_SCRAPE_ATTEMPTS)
+        self._print_scrape_failures(failures)
+
+    def _get_game_dates(self, schedule_data):
+        """Return the sorted list of dates (YYYY-MM-DD) with at least one of our games"""
+        return sorted({game['game_date'] for game in schedule_data if self._is_our_game(game)})
+
+    def _print_scrape_failures(self, failures):
+        if self.nohush:
+            for kind, key, attempts, error in failures:
+                print(f"Could not scrape {kind} {key} after {attempts} attempts: {error}")
+
+    def backtest(self, test_name, group_by=None):
         """
         Obtain a schedule of game information, incl results,
         on each requested game in the date range.
         Iterate over each game to generate a prediction.
 
         Use the test_name parameter to save the results to a file.
+
+        Returns the BacktestMetrics (see pkg/metrics.py) for the
+        results, which are also saved to a file. The metrics are
+        broken down by conference, team, date, etc.; to also print
+        a table for some of these, pass a list of them as group_by
+        (e.g. ['conference']). Every game is predicted once,
+        so this is the way to compare groups of teams.
         """
+        group_by = group_by or []
+        for by in group_by:
+            if by not in GROUP_BYS:
+                raise Exception(f"Unknown group_by {by}, must be one of: {', '.join(GROUP_BYS)}")
+
         # Procedure (for now):
         # - abstract away how we get the schedule into a get_schedule_data(date) method
         #   - rearrange the schedule to look like the game inputs we expect
@@ -330,38 +599,31 @@ class Backtester(object):
         #   - vegas moneyline (<-- not readily available??)
         #   - model euclidean win% projection
 
-        schedule_data = self._get_schedule_data()
-        model = self.model
+        summary = BacktestSummary()
+        fpath = self._get_backtest_fpath_jsonl(test_name)
 
-        if self.nohush:
-            print(f"Starting the backtest")
+        # Games are read, predicted, and written out one chunk of dates at a time,
+        # and the summary statistics are accumulated as we go
+        with JsonlResultWriter(fpath) as writer:
+            for schedule_data in self._iter_schedule_data():
+                if self.nohush and summary.n_games==0:
+                    print(f"Starting the backtest")
+                summary.add_games(len(schedule_data))
 
-        if len(schedule_data)==0:
-            raise Exception("No schedule data")
+                our_games = [game for game in schedule_data if self._is_our_game(game)]
+                predictions = self._predict_games(our_games)
 
-        results = []
-        for game in schedule_data:
-            game_descr = f"{game['away_team']} @ {game['home_team']} ({game['game_date']})"
-            our_team = game['home_team'] in self.teams or game['away_team'] in self.teams
-            if len(self.teams)==0 or our_team:
-                try:
-                    away_points, home_points = model.predict(game)
-                except (TeamNotFoundException, ModelPredictException):
-                    # Note: first few days of season, no off/def data, so no predictions
-                    continue
-                item = copy.deepcopy(game)
-                item['predicted_away_points'] = round(away_points,1)
-                item['predicted_home_points'] = round(home_points,1)
-                item['predicted_away_spread'] = round(home_points - away_points, 1)
-                item['predicted_total']       = round(home_points + away_points, 1)
-                results.append(item)
+                for game, prediction in zip(our_games, predictions):
+                    if prediction is not None:
+                        game.set_prediction(*prediction)
+                        writer.write(game)
+                        summary.add_result(game)
 
-        if len(results)==0:
-            raise Exception("No results")
+            if summary.n_games==0:
+                raise Exception("No schedule data")
 
-        fpath = self._get_backtest_fpath_json(test_name)
-        with open(fpath, 'w') as f:
-            json.dump(results, f, indent=4, ignore_nan=True)
+            if writer.count==0:
+                raise Exception("No results")
 
         if self.nohush:
             print(f"Backtest results for all games have been dumped to file {fpath}")
@@ -371,157 +633,192 @@ class Backtester(object):
         if self.pstats or self.nohush:
 
             # Print a statistical summary
-            print("")
-            print("")
-            print("\t==================================================")
-            print(f"\tModel Backtest Summary: {test_name}")
-            print("\t==================================================")
+            summary.print_summary(test_name, self.start_date, self.end_date, self.teams)
 
-            print(f"\tTest name:\t\t{test_name}")
+        # Save the metrics, overall and broken down by conference, team, date, etc.
+        metrics = summary.get_metrics()
 
-            # Start date
-            print(f"\tStart date:\t\t{self.start_date}")
+        if self.pstats or self.nohush:
+            for by in group_by:
+                metrics.print_breakdown(by)
+        metrics_fpath = self._get_backtest_fpath_metrics(test_name)
+        with open(metrics_fpath, 'w') as f:
+            json.dump(metrics.to_json(), f, indent=4, ignore_nan=True)
 
-            # End date
-            print(f"\tEnd date:\t\t{self.end_date}")
+        if self.nohush:
+            print(f"Backtest metrics have been dumped to file {metrics_fpath}")
+
+        return metrics
+
+        # Procedure (for future):
+        # - open selenium
+        # - ask for teamrankings schedule page
+        # - (similar to donchess, has link to each game, with page for each)
+        # - (would be nice to have odds on that page, but have to dig into each...)
+        #
+        # game pages look like https://www.teamrankings.com/ncaa-basketball/matchup/mountaineers-red-wolves-2025-01-23
+        #
+        # /spread-movement - page with final vegas spread
+        # /box-score - page with final score
+
+    def sweep(self, param_grid, test_name, model_class=None, rank_by='roi'):
+        """
+        Backtest many variants of a model in one pass.
 
-            # Number of days
-            end = datetime.strptime(self.end_date, "%Y-%m-%d")
-            start = datetime.strptime(self.start_date, "%Y-%m-%d")
-            ndays = (end-start).days
-            print(f"\tN days:\t\t\t{ndays}")
+        param_grid is a dict mapping model parameter names
+        (class attributes of the model class, e.g. home_advantage,
+        season_weight, large_distance_modifier) to a list of
+        values to try. Every combination of values is scored.
+        model_class defaults to the class of the backtester's model.
 
-            # Number of games
-            print(f"\tN games total:\t\t{len(schedule_data)}")
-            print(f"\tN games analyzed:\t{len(results)}")
+        Schedule data is loaded once, and team data is gathered
+        once; only the model math is redone for each combination.
 
-            # Teams
-            if len(self.teams)>0:
-                tms = ", ".join(sorted(list(set(self.teams))))
-            else:
-                tms = "(all)"
-            print(f"\tTeams:\t\t\t{tms}")
+        Returns a list of dicts, one per combination, ranked by
+        rank_by (best first), with the parameter values plus
+        RMSE, W-L vs Vegas, and ROI. Also dumps it to a file.
+        """
+        if model_class is None:
+            model_class = type(self.model)
 
-            vegas_spread_e = []
-            model_spread_e = []
-            model_spread_vsvegas = [0, 0]
+        names = list(param_grid.keys())
+        for name in names:
+            if not hasattr(model_class, name):
+                msg = f"Error: {model_class.__name__} does not have a model parameter named {name}"
+                raise ModelParameterException(msg)
 
-            # Keep track of each day's W/L record, so we can compile best/worst
-            oneday_vsvegas = {}
-            dates = sorted(list({j['game_date'] for j in results}))
-            for date in dates:
-                oneday_vsvegas[date] = [0, 0]
+        schedule_data = self._get_schedule_data()
 
-            for item in results:
+        if len(schedule_data)==0:
+            raise Exception("No schedule data")
 
-                date = item['game_date']
+        games = [game for game in schedule_data if self._is_our_game(game)]
+        vegas_spreads, real_spreads = self._get_spreads(games)
 
-                if 'odds' in item:
-                    if 'spread' in item['odds']:
-                        if 'vegas_away_spread' in item['odds']['spread']:
-                            item['vegas_away_spread'] = item['odds']['spread']['vegas_away_spread']
+        # Don't print every prediction of every variant
+        model_parameters = dict(self.model_parameters)
+        model_parameters['quiet'] = True
 
-                if 'vegas_away_spread' not in item or item['vegas_away_spread'] is None:
-                    continue
+        base_model = model_class(model_parameters)
+        inputs = None
+        if hasattr(base_model, 'gather_batch_inputs'):
+            inputs = base_model.gather_batch_inputs(games)
 
-                if 'away_spread' not in item:
-                    item['away_spread'] = item['home_score'] - item['away_score']
-
-                e = item['vegas_away_spread'] - item['away_spread']
-                vegas_spread_e.append(e*e)
-
-                f = item['predicted_away_spread'] - item['away_spread']
-                model_spread_e.append(f*f)
-
-                # Example: real away spread is -10
-                # vegas says -6
-                # prediction says -4
-                # we would have bet against the spread being so high (-), and lost
-                #
-                # Example: real away spread is +6
-                # vegas says +2
-                # prediction says +4
-                # we would have bet against the spread being so small (+), and won
-                #
-                # If vegas spread is between real and predicted, we lost against vegas
-                # Another way to check is to see if vegas - real has same sign as vegas - prediction
-                # If they do have the same sign, they're on the same side of vegas, meaning we won
-                s1 = item['vegas_away_spread'] - item['predicted_away_spread']
-                s2 = item['vegas_away_spread'] - item['away_spread']
-                if (s1>0)==(s2>0):
-                    # Won the bet
-                    model_spread_vsvegas[0] += 1
-                    oneday_vsvegas[date][0] += 1
-                else:
-                    # Lost the bet
-                    model_spread_vsvegas[1] += 1
-                    oneday_vsvegas[date][1] += 1
-
-            if len(model_spread_e)>0:
-                model_spread_mse = statistics.mean(model_spread_e)
-
-                # Model Spread RMSE
-                print(f"\tModel Spread RMSE:\t{round(math.sqrt(model_spread_mse),1)}")
-
-            if len(vegas_spread_e)>0:
-                vegas_spread_mse = statistics.mean(vegas_spread_e)
-
-                # Vegas Spread RMSE
-                print(f"\tVegas Spread RMSE:\t{round(math.sqrt(vegas_spread_mse),1)}")
-
-                # Total games played vs Vegas
-                print(f"\tN games vs Vegas:\t{model_spread_vsvegas[0] + model_spread_vsvegas[1]}")
-
-                win_pct = 100*(model_spread_vsvegas[0]/(model_spread_vsvegas[0] + model_spread_vsvegas[1]))
-                win_pct = round(win_pct, 1)
-
-                # Model Spread W-L vs Vegas
-                print(f"\tW-L vs Vegas:\t\t{model_spread_vsvegas[0]} - {model_spread_vsvegas[1]}")
-
-                # Win Pct vs Vegas
-                print(f"\tW-L% vs Vegas:\t\t{win_pct}%")
-
-                best_oneday_vsvegas = [0, 0]
-                best_oneday_wpct = 0
-                worst_oneday_vsvegas = [0, 0]
-                worst_oneday_wpct = 1
-                for date, wl in oneday_vsvegas.items():
-                    wpct = wl[0]/(wl[0]+wl[1])
-                    if wl[0] > best_oneday_vsvegas[0]:
-                        best_oneday_vsvegas = wl
-                        best_oneday_wpct = wpct
-                    if wl[1] > worst_oneday_vsvegas[1]:
-                        worst_oneday_vsvegas = wl
-                        worst_oneday_wpct = wpct
-
-                # Best and worst one-day W-L
-                print(f"\tBest 1-day W-L:\t\t{best_oneday_vsvegas[0]} - {best_oneday_vsvegas[1]} ({int(100*best_oneday_wpct)}%)")
-                print(f"\tWorst 1-day W-L:\t{worst_oneday_vsvegas[0]} - {worst_oneday_vsvegas[1]} ({int(100*worst_oneday_wpct)}%)")
-
-                # ROI vs Vegas (assuming -110 odds for every bet)
-                amount = 110
-                profit = 100
-                investment = sum(model_spread_vsvegas)*amount
-                gross = model_spread_vsvegas[0]*(amount + profit)
-                net = gross - investment
-                roi_110 = 100*(net/investment)
-
-                print(f"\tROI vs Vegas (-110):\t{round(roi_110,1)}%")
-
-            # Table is complete
+        combos = list(itertools.product(*[param_grid[name] for name in names]))
+        if self.nohush:
+            print(f"Starting the sweep: {len(combos)} model variants, {len(games)} games")
+
+        table = []
+        for values in combos:
+            model = model_class(model_parameters)
+            for name, value in zip(names, values):
+                setattr(model, name, value)
+
+            if inputs is not None:
+                away, home, valid = model.predict_batch_inputs(games, inputs)
+            else:
+                away, home, valid = model.predict_batch(games)
+
+            row = dict(zip(names, values))
+            row.update(self._score_predictions(vegas_spreads, real_spreads, away, home, valid))
+            table.append(row)
+
+        # Lower is better for RMSE, higher is better for everything else
+        best_first = rank_by not in ['rmse', 'vegas_rmse', 'losses']
+        table.sort(key=lambda row: row[rank_by], reverse=best_first)
+
+        fpath = self._get_backtest_fpath_json(test_name)
+        with open(fpath, 'w') as f:
+            json.dump(table, f, indent=4, ignore_nan=True)
+
+        if self.nohush:
+            print(f"Sweep results for all model variants have been dumped to file {fpath}")
+
+        if self.pstats or self.nohush:
+            print("")
+            print("")
+            print("\t==================================================")
+            print(f"\tModel Sweep Summary: {test_name}")
+            print("\t==================================================")
+            print(f"\tStart date:\t\t{self.start_date}")
+            print(f"\tEnd date:\t\t{self.end_date}")
+            print(f"\tN games total:\t\t{len(games)}")
+            print(f"\tN model variants:\t{len(table)}")
+            print(f"\tRanked by:\t\t{rank_by}")
+            print("")
+            header = "\t".join(names + ["N games", "RMSE", "W-L vs Vegas", "W-L%", "ROI"])
+            print(f"\t{header}")
+            for row in table:
+                cols = [str(row[name]) for name in names]
+                cols += [
+                    str(row['n_games']),
+                    str(round(row['rmse'], 2)),
+                    f"{row['wins']} - {row['losses']}",
+                    f"{round(row['win_pct'], 1)}%",
+                    f"{round(row['roi'], 1)}%",
+                ]
+                print("\t" + "\t".join(cols))
             print("")
             print("")
 
-        # Procedure (for future):
-        # - open selenium
-        # - ask for teamrankings schedule page
-        # - (similar to donchess, has link to each game, with page for each)
-        # - (would be nice to have odds on that page, but have to dig into each...)
-        #
-        # game pages look like https://www.teamrankings.com/ncaa-basketball/matchup/mountaineers-red-wolves-2025-01-23
-        #
-        # /spread-movement - page with final vegas spread
-        # /box-score - page with final score
+        return table
+
+    def _get_spreads(self, games):
+        """
+        Return arrays of (vegas away spread, real away spread)
+        for a list of games, with NaN where not available
+        """
+        vegas_spreads = np.full(len(games), np.nan)
+        real_spreads = np.full(len(games), np.nan)
+        for i, game in enumerate(games):
+            if game.vegas_away_spread is not None:
+                vegas_spreads[i] = game.vegas_away_spread
+            if game.away_spread is not None:
+                real_spreads[i] = game.away_spread
+        return vegas_spreads, real_spreads
+
+    def _score_predictions(self, vegas_spreads, real_spreads, away, home, valid):
+        """
+        Score one set of predictions against real outcomes and Vegas.
+        Same calculations as the backtest() summary.
+        """
+        # Predicted spread is rounded the same way backtest() rounds it
+        predicted_spreads = np.array([round(h - a, 1) for a, h in zip(away.tolist(), home.tolist())])
+
+        scored = valid & ~np.isnan(vegas_spreads) & ~np.isnan(real_spreads)
+        vegas = vegas_spreads[scored]
+        real = real_spreads[scored]
+        predicted = predicted_spreads[scored]
+
+        n = int(scored.sum())
+        if n==0:
+            return dict(n_games=0, rmse=np.nan, vegas_rmse=np.nan, wins=0, losses=0, win_pct=np.nan, roi=np.nan)
+
+        rmse = math.sqrt(np.mean((predicted - real)**2))
+        vegas_rmse = math.sqrt(np.mean((vegas - real)**2))
+
+        # Won the bet if prediction and outcome are on the same side of the Vegas spread
+        won = ((vegas - predicted) > 0) == ((vegas - real) > 0)
+        wins = int(won.sum())
+        losses = n - wins
+
+        # ROI vs Vegas (assuming -110 odds for every bet)
+        amount = 110
+        profit = 100
+        investment = n*amount
+        gross = wins*(amount + profit)
+        roi = 100*((gross - investment)/investment)
+
+        return dict(
+            n_games=n,
+            rmse=rmse,
+            vegas_rmse=vegas_rmse,
+            wins=wins,
+            losses=losses,
+            win_pct=100*wins/n,
+            roi=roi,
+        )
+
 
 class KenpomBacktester(Backtester):
     DataScraperClass = KenpomDataScraper
@@ -0,0 +1,186 @@
+import atexit
+import threading
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+
+"""
+Pool of warm headless Firefox sessions for the web scrapers
+
+Starting a browser takes much longer than loading a page,
+so sessions are kept alive and reused across pages and dates.
+Instead of sleeping a fixed amount of time after each page
+load, we wait until the table we want to scrape has rendered.
+"""
+
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.1"
+
+# Default number of browser sessions
+BROWSER_POOL_SIZE = 1
+
+# Restart a session after it has loaded this many pages
+BROWSER_PAGE_BUDGET = 50
+
+# Seconds to wait for a page load, and for the table to render
+BROWSER_LOAD_TIMEOUT = 4
+BROWSER_WAIT_TIMEOUT = 10
+
+
+class BrowserSession(object):
+    """One headless Firefox, plus a count of pages it has loaded"""
+    def __init__(self, load_timeout):
+        ffopt = webdriver.FirefoxOptions()
+        ffopt.add_argument("--headless")
+        ffopt.set_preference("general.useragent.override", USER_AGENT)
+        self.browser = webdriver.Firefox(options=ffopt)
+        self.browser.set_page_load_timeout(load_timeout)
+        self.pages = 0
+
+    def close(self):
+        try:
+            self.browser.quit()
+        except Exception:
+            pass
+
+
+class BrowserPool(object):
+    """
+    Keeps up to size browser sessions alive. Each call to
+    get_page_html() borrows a session, so up to size pages
+    can be loaded at once from different threads.
+
+    Sessions that crash, or that have loaded page_budget
+    pages, are closed and replaced with a fresh session.
+    """
+    def __init__(
+        self,
+        size=BROWSER_POOL_SIZE,
+        page_budget=BROWSER_PAGE_BUDGET,
+        load_timeout=BROWSER_LOAD_TIMEOUT,
+        wait_timeout=BROWSER_WAIT_TIMEOUT,
+    ):
+        self.size = size
+        self.page_budget = page_budget
+        self.load_timeout = load_timeout
+        self.wait_timeout = wait_timeout
+
+        # Idle sessions (most recently used last), and the number of
+        # sessions alive (idle or borrowed), guarded by one condition
+        # that is notified whenever a session is returned or retired
+        self._idle = []
+        self._nsessions = 0
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        """
+        Borrow an idle session, starting a new one if the pool is not full,
+        or wait until a session is returned or retired
+        """
+        with self._cond:
+            while True:
+                if len(self._idle)>0:
+                    return self._idle.pop()
+                if self._nsessions < self.size:
+                    self._nsessions += 1
+                    break
+                self._cond.wait()
+        # Start the browser outside the lock, it takes a while
+        try:
+            return BrowserSession(self.load_timeout)
+        except Exception:
+            with self._cond:
+                self._nsessions -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, session, broken=False):
+        """Return a session to the pool, or retire it if it is broken or used up"""
+        if broken or session.pages >= self.page_budget:
+            session.close()
+            with self._cond:
+                self._nsessions -= 1
+                # A waiter can now start a fresh session
+                self._cond.notify()
+        else:
+            with self._cond:
+                self._idle.append(session)
+                self._cond.notify()
+
+    def resize(self, size):
+        """Allow up to size sessions, waking any threads waiting for one"""
+        with self._cond:
+            if size > self.size:
+                self.size = size
+                self._cond.notify_all()
+
+    def get_page_html(self, url, ready_selector=None):
+        """
+        Load url in a pooled browser session and return the page HTML.
+
+        If ready_selector (a CSS selector) is given, wait until an
+        element matching it is on the page, instead of a fixed sleep.
+        If it never shows up, return whatever HTML is there
+        (the caller's parser will find the table missing).
+
+        A session that crashes is replaced, and the page retried once.
+        """
+        for attempt in range(2):
+            session = self._acquire()
+            try:
+                try:
+                    session.browser.get(url)
+                except TimeoutException:
+                    # Page load timed out, but the table may be there already
+                    pass
+
+                if ready_selector is not None:
+                    try:
+                        wait = WebDriverWait(session.browser, self.wait_timeout)
+                        wait.until(expected_conditions.presence_of_element_located((By.CSS_SELECTOR, ready_selector)))
+                    except TimeoutException:
+                        pass
+
+                src = session.browser.page_source
+            except WebDriverException:
+                self._release(session, broken=True)
+                if attempt==1:
+                    raise
+                continue
+
+            session.pages += 1
+            self._release(session)
+            return src
+
+    def close(self):
+        """Close every idle session"""
+        with self._cond:
+            sessions = self._idle
+            self._idle = []
+            self._nsessions -= len(sessions)
+            self._cond.notify_all()
+        for session in sessions:
+            session.close()
+
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool(size=BROWSER_POOL_SIZE):
+    """
+    Return the process-wide BrowserPool, so sessions
+    stay warm across scrapers and dates. The pool grows
+    if a larger size is requested.
+    """
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool(size)
+            atexit.register(_browser_pool.close)
+        else:
+            _browser_pool.resize(size)
+        return _browser_pool
@@ -0,0 +1,222 @@
+import os
+import re
+import glob
+import json
+import pathlib
+from datetime import datetime
+
+from .results import read_results
+from .metrics import ResultColumns, score_games, get_conference
+from .utils import dump_json_atomic, repl
+
+
+"""
+Confidence calibration from backtest results
+
+The forward tester ranks its picks by a confidence score for
+each team's conference. Instead of a hand-typed table (see
+CONFIDENCES in pkg/constants.py), the scores can be computed
+from stored backtest results: a conference's score is the
+model's win rate vs the Vegas spread in games involving its
+teams, shrunk toward the win rate of all games so that
+conferences with few games are not over- or under-rated:
+
+    score = 100*(wins + k*league_rate)/(wins + losses + k)
+
+with k = prior_games pseudo-games at the league rate.
+Scores are a win% (around 50), not on the scale of CONFIDENCES.
+
+Each model is calibrated on its own, from the results of the
+backtests (by test name) that ran it, and has its own tables
+in data/calibration/<model class name>/.
+
+The win/loss of every game read so far is kept (by date) in
+confidence_games.json, along with which results files have
+been read, so re-running the calibration only reads new or
+changed results files. A game that is in several results
+files counts once (the newest file wins). Each time the scores
+change, a new version of the table is written to
+confidences_vN.json, and the forward tester loads the newest
+one for its model (see load_confidences()).
+"""
+
+
+# Shrinkage: number of games at the league win rate added to each conference
+CALIBRATION_PRIOR_GAMES = 50
+
+TABLE_FNAME_RE = re.compile(r"^confidences_v(\d+)\.json$")
+
+# Backtest results files are named <test name>_<YYYYMMDD>.jsonl (see Backtester)
+RESULTS_FNAME_RE = re.compile(r"^(.*)_\d{8}\.jsonl$")
+
+
+def get_calibration_datadir(datadir, model_name):
+    return os.path.join(datadir, 'calibration', model_name)
+
+
+def get_results_fpaths(datadir, test_names):
+    """Return the backtest results files (JSONL) of the backtests with these test names"""
+    names = {repl(test_name) for test_name in test_names}
+    fpaths = []
+    for fpath in glob.glob(os.path.join(datadir, 'backtest', 'json', '*.jsonl')):
+        m = RESULTS_FNAME_RE.match(os.path.basename(fpath))
+        if m and m.group(1) in names:
+            fpaths.append(fpath)
+    return sorted(fpaths)
+
+
+def get_confidence_table_fpaths(datadir, model_name):
+    """Return [(version, fpath)] of a model's confidence tables, oldest first"""
+    tables = []
+    calib_datadir = get_calibration_datadir(datadir, model_name)
+    if os.path.exists(calib_datadir):
+        for fname in os.listdir(calib_datadir):
+            m = TABLE_FNAME_RE.match(fname)
+            if m:
+                tables.append((int(m.group(1)), os.path.join(calib_datadir, fname)))
+    return sorted(tables)
+
+
+def load_confidence_table(datadir, model_name):
+    """Return a model's newest confidence table (dict), or None if there is none"""
+    tables = get_confidence_table_fpaths(datadir, model_name)
+    if len(tables)==0:
+        return None
+    with open(tables[-1][1], 'r') as f:
+        return json.load(f)
+
+
+def load_confidences(datadir, model_name):
+    """
+    Return (per-conference confidence dict, version) of a model's
+    newest confidence table, or (None, None) if there is no table yet
+    """
+    table = load_confidence_table(datadir, model_name)
+    if table is None:
+        return None, None
+    return table['confidences'], table['version']
+
+
+class ConfidenceCalibrator(object):
+    """
+    Keeps the win/loss vs Vegas of every game in a model's backtests
+    (the ones with these test names), and computes the model's
+    per-conference confidence table from them
+    """
+    def __init__(self, datadir, model_name, test_names, prior_games=CALIBRATION_PRIOR_GAMES, quiet=False):
+        self.datadir = datadir
+        self.model_name = model_name
+        self.test_names = list(test_names)
+        self.prior_games = prior_games
+        self.nohush = not quiet
+
+        self.calib_datadir = get_calibration_datadir(datadir, model_name)
+        if not os.path.exists(self.calib_datadir):
+            pathlib.Path(self.calib_datadir).mkdir(parents=True)
+
+        self.state_fpath = os.path.join(self.calib_datadir, 'confidence_games.json')
+        try:
+            with open(self.state_fpath, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        # {results file name: [mtime, size]}
+        self.files = state.get('files', {})
+        # {game date: {"away_team|home_team": 1 (won) or 0 (lost)}}
+        self.games = state.get('games', {})
+
+    def update(self, fpaths=None):
+        """
+        Read the backtest results files (default: all of those of our
+        test names) that are new or changed since the last update.
+        Returns the number read.
+        """
+        if fpaths is None:
+            fpaths = get_results_fpaths(self.datadir, self.test_names)
+
+        todo = []
+        for fpath in fpaths:
+            st = os.stat(fpath)
+            if self.files.get(os.path.basename(fpath)) != [st.st_mtime, st.st_size]:
+                todo.append((st.st_mtime, fpath, [st.st_mtime, st.st_size]))
+
+        # Oldest first, so the newest results for a game are the ones kept
+        for _, fpath, stamp in sorted(todo):
+            if self.nohush:
+                print(f"Reading backtest results from {fpath}")
+            self._add_results(fpath)
+            self.files[os.path.basename(fpath)] = stamp
+
+        return len(todo)
+
+    def _add_results(self, fpath):
+        games = list(read_results(fpath))
+        columns = ResultColumns()
+        columns.extend(games)
+        values = score_games(columns)
+        for game, won, lost in zip(games, values['spread_wins'].tolist(), values['spread_losses'].tolist()):
+            if won or lost:
+                key = f"{game.away_team}|{game.home_team}"
+                self.games.setdefault(game.game_date, {})[key] = int(won)
+
+    def get_table(self):
+        """Compute the confidence table from all games so far"""
+        records = {}
+        conf_cache = {}
+        for date_games in self.games.values():
+            for key, won in date_games.items():
+                confs = set()
+                for team in key.split("|"):
+                    if team not in conf_cache:
+                        conf_cache[team] = get_conference(team)
+                    confs.add(conf_cache[team])
+                for conf in confs:
+                    record = records.setdefault(conf, [0, 0])
+                    record[0 if won else 1] += 1
+
+        n_games = sum(len(date_games) for date_games in self.games.values())
+        n_wins = sum(sum(date_games.values()) for date_games in self.games.values())
+        league_rate = n_wins/n_games if n_games>0 else 0.5
+
+        k = self.prior_games
+        confidences = {}
+        for conf, (wins, losses) in sorted(records.items()):
+            confidences[conf] = round(100*(wins + k*league_rate)/(wins + losses + k), 1)
+
+        dates = sorted(self.games.keys())
+        return {
+            'n_games': n_games,
+            'league_win_pct': round(100*league_rate, 1),
+            'prior_games': k,
+            'start_date': dates[0] if len(dates)>0 else None,
+            'end_date': dates[-1] if len(dates)>0 else None,
+            'records': records,
+            'confidences': confidences,
+        }
+
+    def save(self):
+        """
+        Save the games, and a new version of the confidence table if it changed.
+        Returns the table (with its version).
+        """
+        dump_json_atomic(self.state_fpath, {'files': self.files, 'games': self.games})
+
+        table = self.get_table()
+        latest = load_confidence_table(self.datadir, self.model_name)
+        if latest is not None:
+            unchanged = all(latest.get(k)==table[k] for k in ['confidences', 'prior_games', 'n_games'])
+            if unchanged:
+                return latest
+            table['version'] = latest['version'] + 1
+        else:
+            table['version'] = 1
+
+        table['model'] = self.model_name
+        table['test_names'] = self.test_names
+        table['created'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        fpath = os.path.join(self.calib_datadir, f"confidences_v{table['version']}.json")
+        dump_json_atomic(fpath, table, indent=4)
+        if self.nohush:
+            print(f"Confidence table version {table['version']} has been dumped to file {fpath}")
+        return table
+
@@ -4,6 +4,7 @@ from .utils import load_json
 
 PKG_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 TEAM_DIR = os.path.join(PKG_ROOT, 'data', 'teams', 'json')
+TEAM_BIN_DIR = os.path.join(PKG_ROOT, 'data', 'teams', 'bin')
 
 
 ##########################
@@ -20,6 +21,8 @@ KENPOM2DONCH_MAP = load_json(TEAM_DIR, 'kenpom2donch.json')
 DONCH2TR_MAP = load_json(TEAM_DIR, 'donch2teamrankings.json')
 TR2DONCH_MAP = load_json(TEAM_DIR, 'teamrankings2donch.json')
 
+SAG2DONCH_MAP = load_json(TEAM_DIR, 'sag2donch.json')
+
 # Conferences
 CONFERENCES  = load_json(TEAM_DIR, 'team_conferences.json')
 
@@ -38,6 +41,26 @@ GEO_LATLONG = load_json(TEAM_DIR, 'geo_latlong.json')
 # How many points does home court advantage afford
 HOME_ADVANTAGE = 3.09
 
+# Skip games whose (unmodified) predicted spread is outside these bounds
+SPREAD_TOO_NARROW = 0
+SPREAD_TOO_WIDE = 21
+
+# Home has an edge if the away team travels more than this many miles
+LARGE_DISTANCE = 2000
+LARGE_DISTANCE_MODIFIER = 6.0
+
+# Visitors have an edge in conference games, and a bigger edge within this many miles
+LOCAL_RIVALRY_DIST = 150
+IN_CONFERENCE_MODIFIER  = 1.0
+OUT_CONFERENCE_MODIFIER = 0.5
+
+# Conferences that need exaggerated (3x) or no in/out conference modifiers
+EXAGGERATED_CONFERENCES = ['ACC', 'BE']
+ZEROED_CONFERENCES = ['ASun', 'BW', 'CAA']
+
+# Points per hour of time zone difference
+OFFSET_MODIFIER = 0.5
+
 
 #######################################
 # Relative confidence levels 
@@ -0,0 +1,263 @@
+import os
+import re
+import json
+import bisect
+import threading
+import numpy as np
+
+from .teams import TEAM_REGISTRY
+from .store import league_average
+from .utils import get_season_year
+
+
+"""
+Season stat cube: every TeamRankings stat for a season in one array
+
+TeamRankings data is stored as three small JSON files per date
+(tempo_YYYYMMDD.json, off_eff_YYYYMMDD.json, def_eff_YYYYMMDD.json),
+so a season is hundreds of files that each need to be parsed.
+The cube packs a season into one float32 array with axes
+(team id, date, stat column), NaN for missing values, plus a
+small JSON header. It is memory-mapped when loaded, so looking
+up a value does not parse or copy anything.
+
+See drivers/build_stat_cube.py.
+"""
+
+
+CUBE_PREFIXES = ["tempo", "off_eff", "def_eff"]
+
+CUBE_FNAME_RE = re.compile(r'^(tempo|off_eff|def_eff)_(\d{8})\.json$')
+
+
+def _get_cube_fpaths(datadir, year):
+    """Return (cube path, header path) for the given season"""
+    bindir = os.path.join(datadir, 'teamrankings', 'bin')
+    return (
+        os.path.join(bindir, f"stat_cube_{year}.npy"),
+        os.path.join(bindir, f"stat_cube_{year}.json"),
+    )
+
+
+def _get_source_stat(fpath):
+    """Return what we check to tell if a source file has changed: [size, mtime]"""
+    st = os.stat(fpath)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _get_decimals(value):
+    """Number of decimal places in a float that was parsed from text"""
+    text = repr(float(value))
+    if 'e' in text or 'n' in text:
+        return None
+    return len(text.split('.')[1].rstrip('0'))
+
+
+def build_stat_cube(datadir, year):
+    """
+    Pack every TeamRankings stat file for the season that
+    started in year into one cube, and write it (plus header)
+    to data/teamrankings/bin/.
+    """
+    jdatadir = os.path.join(datadir, 'teamrankings', 'json')
+
+    # Find every stat file for this season: {stamp: {prefix: fname}}
+    files = {}
+    for fname in sorted(os.listdir(jdatadir)):
+        m = CUBE_FNAME_RE.match(fname)
+        if m is not None and get_season_year(m.group(2))==year:
+            files.setdefault(m.group(2), {})[m.group(1)] = fname
+    if len(files)==0:
+        raise FileNotFoundError(f"No TeamRankings stat files for the {year} season in {jdatadir}")
+
+    dates = sorted(files.keys())
+
+    # Load every file once, and collect the stat columns
+    data = {}
+    columns = set()
+    for stamp in dates:
+        for prefix, fname in files[stamp].items():
+            with open(os.path.join(jdatadir, fname), 'r') as f:
+                rows = json.load(f)
+            data[(stamp, prefix)] = rows
+            for row in rows:
+                columns.update(k for k in row.keys() if k!=f"{prefix}_team")
+    columns = sorted(columns)
+    col_index = {c: j for j, c in enumerate(columns)}
+
+    teams = TEAM_REGISTRY.teamrankings_names
+    cube = np.full((len(teams), len(dates), len(columns)), np.nan, dtype=np.float32)
+
+    # Original values, to check the float32 values can reproduce them
+    originals = {c: [] for c in columns}
+    decimals = {c: 0 for c in columns}
+
+    present = {}
+    averages = {}
+    sources = {}
+    for i, stamp in enumerate(dates):
+        present[stamp] = []
+        averages[stamp] = {}
+        sources[stamp] = {}
+        for prefix, fname in sorted(files[stamp].items()):
+            rows = data[(stamp, prefix)]
+            team_key = f"{prefix}_team"
+            sources[stamp][fname] = _get_source_stat(os.path.join(jdatadir, fname))
+            if len(rows)==0:
+                continue
+
+            file_columns = [k for k in rows[0].keys() if k!=team_key]
+            present[stamp] += file_columns
+
+            # League averages are over every row in the file, same as the model
+            for c in file_columns:
+                averages[stamp][c] = league_average(row.get(c) for row in rows)
+
+            seen = set()
+            for row in rows:
+                tid = TEAM_REGISTRY.ids.get(row[team_key])
+                # Keep the first row for a team, same as the stat store
+                if tid is None or tid in seen:
+                    continue
+                seen.add(tid)
+                for c, value in row.items():
+                    if c==team_key or value is None:
+                        continue
+                    cube[tid, i, col_index[c]] = value
+                    originals[c].append((tid, i, value))
+                    d = _get_decimals(value)
+                    if d is None or decimals[c] is None:
+                        decimals[c] = None
+                    else:
+                        decimals[c] = max(decimals[c], d)
+
+    # A column can be served from the cube only if rounding each
+    # float32 value gives back exactly the value in the JSON file
+    for c, values in originals.items():
+        d = decimals[c]
+        if d is None:
+            continue
+        j = col_index[c]
+        for tid, i, value in values:
+            if round(float(cube[tid, i, j]), d)!=value:
+                decimals[c] = None
+                break
+
+    header = {
+        'year':      year,
+        'teams':     teams,
+        'dates':     dates,
+        'columns':   columns,
+        'decimals':  [decimals[c] for c in columns],
+        'present':   present,
+        'averages':  averages,
+        'sources':   sources,
+    }
+
+    cpath, hpath = _get_cube_fpaths(datadir, year)
+    bindir = os.path.dirname(cpath)
+    if not os.path.exists(bindir):
+        os.makedirs(bindir)
+    np.save(cpath, cube)
+    with open(hpath, 'w') as f:
+        json.dump(header, f)
+
+    return StatCube(cube, header, datadir)
+
+
+class StatCube(object):
+    """
+    Memory-mapped (team id, date, stat column) array
+    of TeamRankings stats for one season.
+    """
+    def __init__(self, cube, header, datadir):
+        self.values = cube
+        self.year = header['year']
+        self.dates = header['dates']
+        self.columns = header['columns']
+        self.date_index = {d: i for i, d in enumerate(self.dates)}
+        self.col_index = {c: j for j, c in enumerate(self.columns)}
+        self.decimals = dict(zip(self.columns, header['decimals']))
+        self.present = {d: set(cols) for d, cols in header['present'].items()}
+        self.averages = header['averages']
+
+        # Dates whose stat files changed after the cube was built
+        # are not served from the cube (callers use the JSON files)
+        jdatadir = os.path.join(datadir, 'teamrankings', 'json')
+        self.fresh = set()
+        for stamp, srcs in header['sources'].items():
+            try:
+                if all(_get_source_stat(os.path.join(jdatadir, fname))==stat for fname, stat in srcs.items()):
+                    self.fresh.add(stamp)
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def load(cls, datadir, year):
+        """
+        Memory-map the stat cube for the season that started in year.
+        Returns None if it has not been built, or was built
+        with a different set of teams.
+        """
+        cpath, hpath = _get_cube_fpaths(datadir, year)
+        if not (os.path.exists(cpath) and os.path.exists(hpath)):
+            return None
+
+        with open(hpath, 'r') as f:
+            header = json.load(f)
+        if header['teams'] != TEAM_REGISTRY.teamrankings_names:
+            print(f"Stat cube at {cpath} is out of date, re-run drivers/build_stat_cube.py")
+            return None
+
+        cube = np.load(cpath, mmap_mode='r')
+        return cls(cube, header, datadir)
+
+    def has_date(self, stamp):
+        """Can stats for this date (YYYYMMDD) be served from the cube?"""
+        return stamp in self.fresh
+
+    def is_exact(self, column):
+        """Do values in this column exactly match the JSON files?"""
+        return self.decimals.get(column) is not None
+
+    def as_of(self, stamp):
+        """
+        Return the (team id x stat column) slice of the most
+        recent snapshot on or before stamp (YYYYMMDD).
+        This is a view of the memory-mapped cube, not a copy.
+        Raises KeyError if the cube has no dates that early.
+        """
+        i = bisect.bisect_right(self.dates, stamp) - 1
+        if i < 0:
+            raise KeyError(stamp)
+        return self.values[:, i, :]
+
+    def get_value(self, tid, stamp, column):
+        """
+        Return the value of a stat column for a team id on a date,
+        or None if the team has no value.
+        Raises KeyError if the column is not in that date's files.
+        """
+        if column not in self.present[stamp]:
+            raise KeyError(column)
+        value = self.values[tid, self.date_index[stamp], self.col_index[column]]
+        if np.isnan(value):
+            return None
+        return round(float(value), self.decimals[column])
+
+    def get_average(self, stamp, column):
+        """Return the league average of a stat column on a date"""
+        return self.averages[stamp][column]
+
+
+_stat_cubes = {}
+_stat_cubes_lock = threading.Lock()
+
+
+def get_stat_cube(datadir, year):
+    """Return the process-wide StatCube for a season, or None if it is not available"""
+    key = (datadir, year)
+    with _stat_cubes_lock:
+        if key not in _stat_cubes:
+            _stat_cubes[key] = StatCube.load(datadir, year)
+        return _stat_cubes[key]
@@ -14,3 +14,7 @@ class TeamNotFoundException(Exception):
     pass
 
 
+
+
+class ArchivedPageNotFound(Exception):
+    pass
@@ -0,0 +1,207 @@
+import random
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from .httpclient import HttpClient
+from .scraper import TeamRankingsDataScraper, TeamRankingsScheduleScraper
+
+
+"""
+Record/replay fixture server for the web scrapers
+
+Serves pages from a raw HTML archive (see pkg/archive.py) over
+HTTP on localhost, so the scrapers can be run, tested, and
+benchmarked without touching teamrankings.com or kenpom.com.
+Point the scrapers at it with the base_url model parameter:
+a page https://host/path?query is requested as
+base_url/host/path?query.
+
+Replay: every page the scrapers fetch is already archived, so
+a data directory's archive is a recording of everything scraped
+into it. Record: with record=True, pages that are not in the
+archive are fetched from the real site (with requests) and
+added to the archive before being served.
+
+There is also a generator for a synthetic day of pages (stats,
+schedule, and one matchup plus three odds movement pages per
+game), used by drivers/benchmark_scrapers.py.
+"""
+
+
+class _FixtureHTTPServer(ThreadingHTTPServer):
+    # Room for many scraper threads connecting at once
+    # (the default backlog of 5 drops connections, which then retry after 1s)
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FixtureServer(object):
+    """HTTP server (in a background thread) serving pages from an HtmlArchive"""
+    def __init__(self, archive, host="127.0.0.1", port=0, record=False):
+        self.archive = archive
+        self.record = record
+        self.client = HttpClient() if record else None
+        self.httpd = _FixtureHTTPServer((host, port), _FixtureHandler)
+        self.httpd.fixtures = self
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def get_page(self, url):
+        """Return the page for an original (real site) URL, or None if we do not have it"""
+        src = self.archive.find(url)
+        if src is None and self.record:
+            src = self.client.get(url)
+            self.archive.put(url, src)
+        return src
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # /host/path?query -> https://host/path?query
+        url = "https://" + self.path.lstrip("/")
+        src = self.server.fixtures.get_page(url)
+        if src is None:
+            self.send_error(404, f"No fixture for {url}")
+            return
+        body = src.encode('utf-8') if isinstance(src, str) else src
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# -------------------
+# Synthetic pages
+
+STAT_URLS = TeamRankingsDataScraper.urls
+SCHEDULE_URL = TeamRankingsScheduleScraper.urls["trschedule"]
+MATCHUP_URL = "https://teamrankings.com/ncaa-basketball/matchup/"
+
+# Real pages carry a lot of markup around the tables; pad synthetic pages to a similar size
+PAGE_FILLER = "<script>" + "var x = {'a': [1, 2, 3], 'b': 'filler'};\n" * 1500 + "</script>"
+
+
+def _page(body):
+    return f"<html><head><title>TeamRankings</title>{PAGE_FILLER}</head><body>{body}</body></html>"
+
+
+def _stat_page(rng, teams):
+    rows = []
+    for i, team in enumerate(teams):
+        values = [f"{rng.uniform(60, 120):.1f}" for _ in range(6)]
+        if rng.random() < 0.05:
+            values[2] = "--"
+        rows.append(f"<tr><td>{i+1}</td><td><a href=\"/ncaa-basketball/team/{i}\">{team}</a></td>"
+                    + "".join(f"<td>{v}</td>" for v in values) + "</tr>")
+    return _page(
+        '<table class="tr-table datatable scrollable"><thead><tr><th>Rank</th><th>Team</th>'
+        '<th>2024</th><th>Last 3</th><th>Last 1</th><th>Home</th><th>Away</th><th>2023</th></tr></thead>'
+        f'<tbody>{"".join(rows)}</tbody></table>'
+    )
+
+
+def _schedule_page(games):
+    rows = []
+    for i, (slug, away, home, neutral, game_time) in enumerate(games):
+        sep = "vs." if neutral else "at"
+        rows.append(f'<tr><td>{i+1}</td><td>{i%5}</td><td><a href="/ncaa-basketball/matchup/{slug}">'
+                    f'#{i+1} {away} {sep} #{i+50} {home}</a></td><td>{game_time}</td><td>Arena {i}</td></tr>')
+    return _page(
+        '<table class="tr-table datatable scrollable"><thead><tr><th>Rank</th><th>Hotness</th>'
+        '<th>Matchup</th><th>Time</th><th>Location</th></tr></thead>'
+        f'<tbody>{"".join(rows)}</tbody></table>'
+    )
+
+
+def _menu(away_abbr, home_abbr):
+    return f"<h2>Matchup Menu: {away_abbr} @ {home_abbr}</h2>"
+
+
+def _game_page(rng):
+    away, home = rng.randint(50, 100), rng.randint(50, 100)
+    return _page(
+        '<table class="matchup-table"><thead><tr><th>Final Score</th><th>1</th><th>2</th><th>T</th></tr></thead>'
+        f'<tbody><tr><td>Away</td><td>{away//2}</td><td>{away-away//2}</td><td>{away}</td></tr>'
+        f'<tr><td>Home</td><td>{home//2}</td><td>{home-home//2}</td><td>{home}</td></tr></tbody></table>'
+    )
+
+
+def _moneyline_page(rng, away_abbr, home_abbr):
+    ml = rng.choice([-250, -150, -120, 110, 130, 200])
+    tables = []
+    for lab, abbr, sign in [("tab-001", away_abbr, 1), ("tab-002", home_abbr, -1)]:
+        tables.append(f'<div id="{lab}"><table><tbody><tr><td>{abbr} {sign*ml:+d}</td><td>x</td>'
+                      f'<td>{sign*(ml-10):+d}</td></tr></tbody></table></div>')
+    return _page(_menu(away_abbr, home_abbr) + "".join(tables))
+
+
+def _movement_page(away_abbr, home_abbr, current, opening):
+    return _page(
+        _menu(away_abbr, home_abbr)
+        + f'<table class="movement-table"><tbody><tr><td>{current}</td><td>x</td><td>{opening}</td></tr></tbody></table>'
+    )
+
+
+def add_synthetic_day(archive, game_date_dashes, n_games=60, n_teams=360, seed=0):
+    """
+    Add a synthetic day of TeamRankings pages to an archive: the three
+    stat pages and the schedule (all for game_date_dashes), and the
+    matchup and moneyline/spread/over-under movement pages of n_games games.
+
+    Returns {page type: list of original URLs}
+    """
+    rng = random.Random(seed)
+    teams = [f"Team {i:03d}" for i in range(n_teams)]
+    fetch_date = datetime.now().strftime("%Y-%m-%d")
+    query = f"?date={game_date_dashes}"
+
+    urls = {'stat': [], 'schedule': [], 'game': [], 'moneyline': [], 'spread': [], 'ou': []}
+
+    for url in STAT_URLS.values():
+        archive.put(url + query, _stat_page(rng, teams), fetch_date)
+        urls['stat'].append(url + query)
+
+    picks = rng.sample(range(n_teams), 2*n_games)
+    games = []
+    for i in range(n_games):
+        away, home = teams[picks[2*i]], teams[picks[2*i+1]]
+        slug = f"{away}-{home}-{game_date_dashes}".lower().replace(" ", "-")
+        game_time = f"{rng.randint(1, 10)}:{rng.choice(['00', '30'])} PM"
+        games.append((slug, away, home, rng.random() < 0.1, game_time))
+
+        game_url = MATCHUP_URL + slug
+        away_abbr, home_abbr = f"A{i:02d}", f"H{i:02d}"
+        spread = rng.choice([-12.5, -7, -3.5, -1, 2, 4.5, 9])
+        total = rng.choice([128.5, 135, 141.5, 150, 158.5])
+        pages = [
+            ('game', game_url, _game_page(rng)),
+            ('moneyline', game_url + "/money-line-movement", _moneyline_page(rng, away_abbr, home_abbr)),
+            ('spread', game_url + "/spread-movement", _movement_page(away_abbr, home_abbr, f"{away_abbr} {spread:+g}", spread+0.5)),
+            ('ou', game_url + "/over-under-movement", _movement_page(away_abbr, home_abbr, f"Total {total}", total-1)),
+        ]
+        for kind, url, src in pages:
+            archive.put(url, src, fetch_date)
+            urls[kind].append(url)
+
+    archive.put(SCHEDULE_URL + query, _schedule_page(games), fetch_date)
+    urls['schedule'].append(SCHEDULE_URL + query)
+
+    return urls
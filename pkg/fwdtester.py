@@ -1,14 +1,15 @@
 import os
-import copy
 import simplejson as json
 import pathlib
 from datetime import datetime, timedelta
 
 from .backtester import Backtester
 from .model import ModelBase
+from .results import JsonlResultWriter
 from .constants import CONFERENCES, CONFIDENCES
+from .calibration import load_confidences
 from .errors import TeamNotFoundException, ModelPredictException
-from .teams import normalize_to_donchess_names
+from .teams import team_id, donchess_name
 from .utils import repl
 
 
@@ -50,11 +51,11 @@ class Forwardtester(Backtester):
         fpath = os.path.join(self.sched_datadir, fname)
         return fpath
 
-    def _get_forwardtest_fpath_json(self, test_name):
-        """Get path to JSON file for schedule data for given date stamp"""
+    def _get_forwardtest_fpath_jsonl(self, test_name):
+        """Get path to JSONL file (one game per line) for forwardtest results"""
         stamp = datetime.now().strftime("%Y%m%d")
         test_name = repl(test_name)
-        fname = test_name + "_" + stamp + ".json"
+        fname = test_name + "_" + stamp + ".jsonl"
         fpath = os.path.join(self.fwdtst_datadir, fname)
         return fpath
 
@@ -73,7 +74,6 @@ class Forwardtester(Backtester):
         Return it and/or print a summary.
         """
         schedule_data = self._get_schedule_data()
-        model = self.model
 
         if self.nohush:
             print(f"Starting the forwardtest")
@@ -81,29 +81,21 @@ class Forwardtester(Backtester):
         if len(schedule_data)==0:
             raise Exception("No schedule data")
 
+        our_games = [game for game in schedule_data if self._is_our_game(game)]
+        predictions = self._predict_games(our_games)
+
+        # Keep the results in memory too, for the summary (only a day or two of games)
         results = []
-        for game in schedule_data:
-            game_descr = f"{game['away_team']} @ {game['home_team']} ({game['game_date']})"
-            our_team = game['home_team'] in self.teams or game['away_team'] in self.teams
-            if len(self.teams)==0 or our_team:
-                try:
-                    away_points, home_points = model.predict(game)
-                except (TeamNotFoundException, ModelPredictException):
-                    # Note: first few days of season, no off/def data, so no predictions
-                    continue
-                item = copy.deepcopy(game)
-                item['predicted_away_points'] = round(away_points,1)
-                item['predicted_home_points'] = round(home_points,1)
-                item['predicted_away_spread'] = round(home_points - away_points, 1)
-                item['predicted_total']       = round(home_points + away_points, 1)
-                results.append(item)
-
-        if len(results)==0:
-            raise Exception("No results")
-
-        fpath = self._get_forwardtest_fpath_json(test_name)
-        with open(fpath, 'w') as f:
-            json.dump(results, f, indent=4, ignore_nan=True)
+        fpath = self._get_forwardtest_fpath_jsonl(test_name)
+        with JsonlResultWriter(fpath) as writer:
+            for game, prediction in zip(our_games, predictions):
+                if prediction is not None:
+                    game.set_prediction(*prediction)
+                    writer.write(game)
+                    results.append(game)
+
+            if len(results)==0:
+                raise Exception("No results")
 
         if self.nohush:
             print(f"Forwardtest results for all games have been dumped to file {fpath}")
@@ -125,6 +117,21 @@ class Forwardtester(Backtester):
             else:
                 tms = "(all)"
             print(f"\tTeams:\t\t\t{tms}")
+
+            model_name = type(self.model).__name__
+            confidences, version = load_confidences(self.datadir, model_name)
+            if confidences is None:
+                # No calibrated table for this model yet (see drivers/calibrate.py), use the hand-typed one
+                confidences = CONFIDENCES
+                print("\tConfidences:\t\tpkg/constants.py")
+                print("\t(conf = sum of the two conferences' hand-set scores)")
+            else:
+                # Calibrated scores are a win% vs Vegas (around 50 each, so about 100 per game),
+                # not on the scale of CONFIDENCES
+                print(f"\tConfidences:\t\tcalibrated for {model_name}, version {version}")
+                print("\t(conf = sum of the two conferences' W-L% vs Vegas in backtests)")
+            # Conferences without a score get the average
+            default_confidence = sum(confidences.values())/len(confidences)
             print("")
 
             unique_times = {g['game_time'] for g in results}
@@ -148,14 +155,14 @@ class Forwardtester(Backtester):
                         dog_spread = f"{game['home_team']} (+{spread})"
 
                     ateam = game['away_team']
-                    aconference = CONFERENCES[normalize_to_donchess_names(ateam)]
-                    aconfidence = CONFIDENCES[aconference]
+                    aconference = CONFERENCES[donchess_name(team_id(ateam))]
+                    aconfidence = confidences.get(aconference, default_confidence)
 
                     hteam = game['home_team']
-                    hconference = CONFERENCES[normalize_to_donchess_names(hteam)]
-                    hconfidence = CONFIDENCES[hconference]
+                    hconference = CONFERENCES[donchess_name(team_id(hteam))]
+                    hconfidence = confidences.get(hconference, default_confidence)
 
-                    conf = aconfidence + hconfidence
+                    conf = round(aconfidence + hconfidence, 1)
 
                     print(f"{matchup:24s}\t{dog_spread:20s}\t{conf}")
 
@@ -0,0 +1,218 @@
+import sys
+import json
+
+
+"""
+Compact record type for games
+
+Schedule files store each game as a nested dict:
+the game info, the final score, and an odds dict with
+moneyline, spread, and over/under sub-dicts. Loading a
+season of games as dicts (plus a deepcopy of each one to
+add the model's prediction) uses a lot of memory.
+
+GameRecord keeps the same information in one flat object
+with __slots__ (no per-instance dict), with the odds pulled
+up to top-level fields, and room for the model prediction.
+It also acts like a read-only dict of its fields that are
+set (game['home_team'], game.get('away_score'), 'x' in game),
+so code written for the schedule dicts keeps working.
+to_json() gives back the nested dict, exactly as it was loaded
+(including keys set to None, and keys it does not know about),
+plus any predictions.
+"""
+
+
+# Top-level game info, in the order they are stored in schedule files
+GAME_FIELDS = (
+    'game_url',
+    'away_team',
+    'home_team',
+    'neutral_site',
+    'game_time',
+    'game_date',
+    'away_score',
+    'home_score',
+)
+
+# Odds sub-dict name -> its fields
+ODDS_FIELDS = {
+    'moneyline': (
+        'vegas_away_moneyline',
+        'vegas_away_moneyline_opening',
+        'vegas_home_moneyline',
+        'vegas_home_moneyline_opening',
+    ),
+    'spread': (
+        'vegas_away_spread',
+        'vegas_home_spread',
+        'vegas_away_spread_opening',
+        'vegas_home_spread_opening',
+    ),
+    'ou': (
+        'vegas_ou_opening',
+        'vegas_ou_total',
+    ),
+}
+
+# String fields that repeat across many games (stored once, see from_json())
+INTERNED_FIELDS = ('away_team', 'home_team', 'game_time', 'game_date')
+
+PREDICTION_FIELDS = (
+    'predicted_away_points',
+    'predicted_home_points',
+    'predicted_away_spread',
+    'predicted_total',
+)
+
+FIELDS = GAME_FIELDS + tuple(k for fields in ODDS_FIELDS.values() for k in fields) + PREDICTION_FIELDS
+
+
+# Odds sub-dicts of a game with the usual odds (shared by every such game)
+ODDS_KEYS = tuple(ODDS_FIELDS.keys())
+
+
+class GameRecord(object):
+    """
+    One game: info, score, Vegas odds, and model prediction.
+    Fields that are not known (no score yet, no odds, not predicted) are None.
+    """
+    __slots__ = FIELDS + ('odds_keys', 'nulls', 'extra', 'extra_odds')
+
+    def __init__(self, **kwargs):
+        for k in FIELDS:
+            setattr(self, k, kwargs.pop(k, None))
+        # Names of the odds sub-dicts the game was loaded with (None if it had no odds dict)
+        self.odds_keys = None
+        # Fields that were in the dict the game was loaded from, with the value None
+        self.nulls = None
+        # Any other keys of the dict the game was loaded from (usually None)
+        self.extra = kwargs if len(kwargs)>0 else None
+        # Any other keys of its odds sub-dicts, {sub-dict name: {key: value}} (usually None)
+        self.extra_odds = None
+
+    @classmethod
+    def from_json(cls, d):
+        """Make a GameRecord from a schedule file's game dict (or a backtest result dict)"""
+        d = dict(d)
+        odds = d.get('odds')
+        if isinstance(odds, dict) and all(isinstance(sub, dict) for sub in odds.values()):
+            del d['odds']
+        else:
+            # No odds dict (or not one we know how to unpack, which is kept as is)
+            odds = None
+        # Share one copy of each team name, date, and time
+        for k in INTERNED_FIELDS:
+            if isinstance(d.get(k), str):
+                d[k] = sys.intern(d[k])
+        nulls = [k for k in FIELDS if k in d and d[k] is None]
+        record = cls(**d)
+        if odds is not None:
+            keys = tuple(odds.keys())
+            record.odds_keys = ODDS_KEYS if keys==ODDS_KEYS else keys
+            for name, sub in odds.items():
+                fields = ODDS_FIELDS.get(name, ())
+                for k, v in sub.items():
+                    if k in fields:
+                        setattr(record, k, v)
+                        if v is None:
+                            nulls.append(k)
+                    else:
+                        if record.extra_odds is None:
+                            record.extra_odds = {}
+                        record.extra_odds.setdefault(name, {})[k] = v
+        if len(nulls)>0:
+            record.nulls = tuple(nulls)
+        return record
+
+    def to_json(self):
+        """
+        Return the game as a dict, in the same (nested) form as the schedule files.
+        For a game made with from_json(), this is the dict it was made from
+        (plus any predictions set since).
+        """
+        nulls = self.nulls or ()
+        d = {}
+        for k in GAME_FIELDS:
+            v = getattr(self, k)
+            if v is not None or k in nulls:
+                d[k] = v
+        if self.extra is not None:
+            d.update(self.extra)
+        if self.odds_keys is not None:
+            d['odds'] = {}
+            for name in self.odds_keys:
+                sub = {}
+                for k in ODDS_FIELDS.get(name, ()):
+                    v = getattr(self, k)
+                    if v is not None or k in nulls:
+                        sub[k] = v
+                if self.extra_odds is not None and name in self.extra_odds:
+                    sub.update(self.extra_odds[name])
+                d['odds'][name] = sub
+        for k in PREDICTION_FIELDS:
+            v = getattr(self, k)
+            if v is not None or k in nulls:
+                d[k] = v
+        return d
+
+    def set_prediction(self, away_points, home_points):
+        """Store the model's predicted score (and the spread and total it implies)"""
+        self.predicted_away_points = round(away_points,1)
+        self.predicted_home_points = round(home_points,1)
+        self.predicted_away_spread = round(home_points - away_points, 1)
+        self.predicted_total       = round(home_points + away_points, 1)
+
+    @property
+    def away_spread(self):
+        """Real away spread (home score minus away score), or None if there is no score"""
+        if self.extra is not None and self.extra.get('away_spread') is not None:
+            return self.extra['away_spread']
+        if self.home_score is None or self.away_score is None:
+            return None
+        return self.home_score - self.away_score
+
+    # Read-only dict interface, over the fields that are set.
+    # Odds fields are available at the top level, e.g. game['vegas_away_spread']
+
+    def keys(self):
+        keys = [k for k in FIELDS if getattr(self, k) is not None]
+        if self.extra is not None:
+            keys += list(self.extra.keys())
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            v = getattr(self, key)
+            if v is not None:
+                return v
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def __repr__(self):
+        return f"GameRecord({self.game_date} {self.away_team} @ {self.home_team})"
+
+
+def load_games(fpath):
+    """Load a schedule file (list of game dicts) as a list of GameRecords"""
+    with open(fpath, 'r') as f:
+        return [GameRecord.from_json(d) for d in json.load(f)]
@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import numpy as np
+from geopy import distance
+from tzfpy import get_tz
+
+from .constants import (
+    GEO_LATLONG,
+    CONFERENCES,
+    TEAM_BIN_DIR,
+)
+from .utils import get_utc_offset_int
+from .teams import TEAM_REGISTRY
+
+
+"""
+Precomputed team x team travel distance/timezone/conference tables
+
+Computing great-circle distances and timezone lookups for every
+game is the most expensive part of a prediction. Since the set
+of schools does not change, we compute every pair once (see
+drivers/build_geo_table.py) and store the result as a binary
+file that is memory-mapped when the model starts up.
+"""
+
+
+GEO_TABLE_FNAME  = "geo_table.npy"
+GEO_HEADER_FNAME = "geo_table.json"
+
+# Miles are stored at full precision, so comparisons against the distance
+# thresholds (LARGE_DISTANCE, LOCAL_RIVALRY_DIST) match the geopy fallback
+GEO_TABLE_DTYPE = np.dtype([
+    ('miles', np.float64),
+    ('same_conference', np.bool_),
+])
+
+
+def get_team_data_hash():
+    """
+    Hash of the team data the table is built from (names, locations,
+    conferences), so we can tell if the table is stale
+    """
+    src = json.dumps([TEAM_REGISTRY.donchess_names, GEO_LATLONG, CONFERENCES], sort_keys=True)
+    return hashlib.sha1(src.encode('utf-8')).hexdigest()
+
+
+def build_geo_table(outdir=TEAM_BIN_DIR):
+    """
+    Compute distance (miles), timezone, and same-conference
+    flag for every pair of schools (indexed by team id),
+    and write the resulting table to outdir.
+    """
+    teams = TEAM_REGISTRY.donchess_names
+    n = len(teams)
+
+    timezones = [get_tz(*reversed(GEO_LATLONG[t])) for t in teams]
+    unique_tzs = sorted(set(timezones))
+    conferences = [CONFERENCES[t] for t in teams]
+
+    table = np.zeros((n, n), dtype=GEO_TABLE_DTYPE)
+    for i, away in enumerate(teams):
+        for j in range(i+1, n):
+            miles = distance.distance(GEO_LATLONG[away], GEO_LATLONG[teams[j]]).miles
+            table['miles'][i, j] = miles
+            table['miles'][j, i] = miles
+        table['same_conference'][i, :] = [c==conferences[i] for c in conferences]
+
+    header = {
+        'source_hash': get_team_data_hash(),
+        'teams':       teams,
+        'timezones':   unique_tzs,
+        'team_timezones':   [unique_tzs.index(tz) for tz in timezones],
+        'team_conferences': conferences,
+    }
+
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+    np.save(os.path.join(outdir, GEO_TABLE_FNAME), table)
+    with open(os.path.join(outdir, GEO_HEADER_FNAME), 'w') as f:
+        json.dump(header, f)
+
+    return GeoTable(table, header)
+
+
+class GeoTable(object):
+    """
+    Team x team table of travel distance and same-conference flags,
+    plus per-team conference and UTC offset.
+    Rows/columns are indexed by team id (see pkg/teams.py).
+    """
+    def __init__(self, table, header):
+        self.teams = header['teams']
+
+        self.miles = table['miles']
+        self.same_conference = table['same_conference']
+
+        self.conferences = np.array(header['team_conferences'])
+
+        # UTC offsets depend on the current date (DST), so look them
+        # up when the table is loaded, once per distinct timezone
+        offsets = [get_utc_offset_int(tz) for tz in header['timezones']]
+        self.utc_offsets = np.array(offsets)[header['team_timezones']]
+
+    @classmethod
+    def load(cls, bindir=TEAM_BIN_DIR):
+        """
+        Memory-map the geo table in bindir.
+        Returns None if the table has not been built,
+        or if it is out of date with the team data
+        (or was built in an older format).
+        """
+        tpath = os.path.join(bindir, GEO_TABLE_FNAME)
+        hpath = os.path.join(bindir, GEO_HEADER_FNAME)
+        if not (os.path.exists(tpath) and os.path.exists(hpath)):
+            return None
+
+        with open(hpath, 'r') as f:
+            header = json.load(f)
+        if header['source_hash'] != get_team_data_hash():
+            print(f"Geo table at {tpath} is out of date, re-run drivers/build_geo_table.py")
+            return None
+
+        table = np.load(tpath, mmap_mode='r')
+        if table.dtype != GEO_TABLE_DTYPE:
+            print(f"Geo table at {tpath} is out of date, re-run drivers/build_geo_table.py")
+            return None
+        return cls(table, header)
+
+
+_geo_table = None
+_geo_table_loaded = False
+
+
+def get_geo_table():
+    """Return the process-wide GeoTable, or None if it is not available"""
+    global _geo_table, _geo_table_loaded
+    if not _geo_table_loaded:
+        _geo_table = GeoTable.load()
+        _geo_table_loaded = True
+    return _geo_table
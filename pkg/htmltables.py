@@ -0,0 +1,306 @@
+from html.parser import HTMLParser
+from bs4.dammit import UnicodeDammit
+
+
+"""
+Streaming HTML table extraction for the web scrapers
+
+The scrapers only ever need one or two tables from each page
+(plus a header or two), so instead of building a complete
+BeautifulSoup tree of the page, we run the same underlying
+HTML tokenizer and only keep the contents of the tables we want.
+Parsing stops as soon as the requested number of tables is found.
+
+Text is extracted the same way as BeautifulSoup's .text
+(with html.parser): every string inside the element, except
+comments and the contents of <script>/<style>/<template> tags.
+"""
+
+
+# Tags that never have an end tag
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+    'link', 'menuitem', 'meta', 'param', 'source', 'track', 'wbr',
+    'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+    'nextid', 'spacer',
+}
+
+# Tags whose contents are not included in .text
+HIDDEN_TEXT_TAGS = {'script', 'style', 'template', 'rt', 'rp'}
+
+# Feed the tokenizer this many characters at a time, so we can stop early
+CHUNK_SIZE = 32768
+
+
+class HtmlCell(object):
+    """One <td> or <th>: its tag name, text, and the (href, text) of each link in it"""
+    def __init__(self, tag):
+        self.tag = tag
+        self.parts = []
+        self.links = []
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+class HtmlRow(object):
+    """One <tr>: its text, its cells, and the table sections (thead/tbody/tfoot) it is in"""
+    def __init__(self, sections):
+        self.parts = []
+        self.cells = []
+        self.sections = sections
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def find_cells(self, tag):
+        """Return the cells with this tag name (td or th)"""
+        return [cell for cell in self.cells if cell.tag==tag]
+
+    @property
+    def texts(self):
+        """Text of each <td> cell in the row"""
+        return [cell.text for cell in self.find_cells('td')]
+
+
+class HtmlTable(object):
+    """
+    One <table>: its attributes, plus every <tr> in it (in document order).
+    selector is the index of the selector (in a selector list) it matched.
+    """
+    def __init__(self, attrs, selector):
+        self.attrs = attrs
+        self.selector = selector
+        self.rows = []
+        # First <thead>/<tbody>/<tfoot> section of each kind
+        self.first_section = {}
+
+    def find_rows(self, section=None):
+        """
+        Return the rows in the first <section> (thead, tbody, tfoot)
+        of the table, or every row if section is None.
+        Returns None if the table has no such section.
+        """
+        if section is None:
+            return self.rows
+        first = self.first_section.get(section)
+        if first is None:
+            return None
+        return [row for row in self.rows if any(s is first for s in row.sections)]
+
+
+class HtmlPage(object):
+    """Tables (and header texts) extracted from a page"""
+    def __init__(self):
+        self.tables = []
+        self.texts = []
+
+
+def _parse_selector(selector):
+    """
+    Parse a (very) simple CSS selector list, like
+    "table.datatable" or "div#tab-001 table, div#tab-002 table",
+    into a list of lists of (tag, class, id) tuples
+    """
+    parsed = []
+    for alternative in selector.split(","):
+        compounds = []
+        for compound in alternative.split():
+            tag, cls, id_ = compound, None, None
+            if "#" in tag:
+                tag, id_ = tag.split("#", 1)
+            if "." in tag:
+                tag, cls = tag.split(".", 1)
+            compounds.append((tag or None, cls, id_))
+        parsed.append(compounds)
+    return parsed
+
+
+def _matches(compound, tag, attrs):
+    ctag, cls, id_ = compound
+    if ctag is not None and ctag!=tag:
+        return False
+    if cls is not None and cls not in (attrs.get('class') or "").split():
+        return False
+    if id_ is not None and attrs.get('id')!=id_:
+        return False
+    return True
+
+
+class TableExtractor(HTMLParser):
+    """
+    HTML tokenizer that keeps only the tables matching a selector,
+    plus the text of every text_tag element (e.g. h2), if given.
+    """
+    def __init__(self, selector, limit=None, text_tag=None):
+        super().__init__(convert_charrefs=True)
+        self.selectors = _parse_selector(selector)
+        self.limit = limit
+        self.text_tag = text_tag
+        self.page = HtmlPage()
+        self.done = False
+
+        # Stack of open elements: (tag, attrs, hidden text?)
+        self.stack = []
+        self.hidden = 0
+
+        # Table being extracted, and its depth in the stack
+        self.table = None
+        self.table_depth = None
+
+        # Open elements inside the table: (tag, object)
+        self.open = []
+
+        # Open text_tag elements (each is a list of strings)
+        self.open_texts = []
+
+    def _is_target(self, tag, attrs):
+        """Return the index of the selector this <table> matches, or None"""
+        for k, compounds in enumerate(self.selectors):
+            if not _matches(compounds[-1], tag, attrs):
+                continue
+            # Match ancestors to the rest of the selector, right to left
+            i = len(compounds) - 2
+            for stag, sattrs, _ in reversed(self.stack):
+                if i < 0:
+                    break
+                if _matches(compounds[i], stag, sattrs):
+                    i -= 1
+            if i < 0:
+                return k
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        target = None
+        if self.table is None and tag=='table':
+            target = self._is_target(tag, attrs)
+        if target is not None:
+            self.table = HtmlTable(attrs, target)
+            self.table_depth = len(self.stack)
+        elif self.table is not None:
+            if tag=='tr':
+                sections = tuple(obj for t, obj in self.open if t in ('thead', 'tbody', 'tfoot'))
+                row = HtmlRow(sections)
+                self.table.rows.append(row)
+                self.open.append((tag, row))
+            elif tag in ('td', 'th'):
+                cell = HtmlCell(tag)
+                rows = [obj for t, obj in self.open if t=='tr']
+                if len(rows)>0:
+                    rows[-1].cells.append(cell)
+                self.open.append((tag, cell))
+            elif tag=='a':
+                link = [attrs.get('href'), []]
+                for t, obj in self.open:
+                    if t in ('td', 'th'):
+                        obj.links.append(link)
+                self.open.append((tag, link))
+            elif tag in ('thead', 'tbody', 'tfoot'):
+                section = object()
+                self.table.first_section.setdefault(tag, section)
+                self.open.append((tag, section))
+            elif tag not in VOID_TAGS:
+                self.open.append((tag, None))
+
+        if tag==self.text_tag:
+            self.open_texts.append([])
+
+        if tag not in VOID_TAGS:
+            hidden = tag in HIDDEN_TEXT_TAGS
+            self.stack.append((tag, attrs, hidden))
+            if hidden:
+                self.hidden += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <tag/> is self-closing, same as BeautifulSoup
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # Close the most recent open element with this tag, and
+        # everything opened after it (unmatched end tags are ignored)
+        for i in range(len(self.stack)-1, -1, -1):
+            if self.stack[i][0]==tag:
+                break
+        else:
+            return
+
+        while len(self.stack) > i:
+            stag, _, hidden = self.stack.pop()
+            if hidden:
+                self.hidden -= 1
+            if stag==self.text_tag and len(self.open_texts)>0:
+                self.page.texts.append("".join(self.open_texts.pop()))
+            if self.table is not None:
+                if len(self.stack)==self.table_depth:
+                    self._finish_table()
+                elif len(self.open)>0:
+                    self.open.pop()
+
+    def _finish_table(self):
+        self.page.tables.append(self.table)
+        self.table = None
+        self.table_depth = None
+        self.open = []
+        if self.limit is not None and len(self.page.tables)>=self.limit:
+            self.done = True
+
+    def handle_data(self, data):
+        if self.hidden > 0:
+            return
+        for parts in self.open_texts:
+            parts.append(data)
+        if self.table is not None:
+            for t, obj in self.open:
+                if t in ('tr', 'td', 'th'):
+                    obj.parts.append(data)
+                elif t=='a':
+                    obj[1].append(data)
+
+
+def _to_str(html):
+    """Decode bytes (from requests) the same way BeautifulSoup would"""
+    if isinstance(html, bytes):
+        try:
+            return html.decode('utf-8')
+        except UnicodeDecodeError:
+            return UnicodeDammit(html).unicode_markup
+    return html
+
+
+def extract_tables(html, selector, limit=None, text_tag=None):
+    """
+    Extract the tables matching selector from html (str or bytes).
+
+    selector is a simple CSS selector list: tag, .class, #id,
+    and descendant combinators, e.g. "div#tab-001 table".
+    Stops parsing once limit tables have been found (if given).
+    If text_tag is given (e.g. "h2"), also collect the text of
+    every element with that tag (only up to where parsing stopped).
+
+    Returns an HtmlPage, with .tables (list of HtmlTable)
+    and .texts (list of str).
+    """
+    html = _to_str(html)
+    parser = TableExtractor(selector, limit=limit, text_tag=text_tag)
+    for i in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[i:i+CHUNK_SIZE])
+        if parser.done:
+            break
+    else:
+        parser.close()
+
+    # A table left open at the end of the page is still returned
+    if parser.table is not None:
+        parser._finish_table()
+
+    for table in parser.page.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                cell.links = [(href, "".join(parts)) for href, parts in cell.links]
+    return parser.page
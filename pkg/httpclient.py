@@ -0,0 +1,138 @@
+import os
+import json
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .ratelimit import get_rate_limiter, REQUESTS_PER_SECOND
+
+
+"""
+Shared HTTP client for the web scrapers
+
+One pooled requests.Session (keep-alive connections, retries
+with backoff) for every scraper and thread. Responses that come
+with an ETag or Last-Modified header are cached on disk, and
+later fetches of the same URL send If-None-Match/If-Modified-Since.
+An unchanged page then costs a 304 response instead of a full
+download.
+"""
+
+
+HTTP_TIMEOUT = 30
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+HTTP_POOL_SIZE = 16
+
+# Status codes worth retrying
+HTTP_RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+
+class HttpClient(object):
+    """
+    Pooled, rate-limited HTTP session with an on-disk
+    conditional GET cache (in cache_dir, if given).
+    """
+    def __init__(self, cache_dir=None, requests_per_second=REQUESTS_PER_SECOND):
+        self.cache_dir = cache_dir
+        self.requests_per_second = requests_per_second
+
+        retry = Retry(
+            total=HTTP_RETRIES,
+            backoff_factor=HTTP_BACKOFF,
+            status_forcelist=HTTP_RETRY_STATUSES,
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        if self.cache_dir is not None and not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _get_cache_fpaths(self, url):
+        """Return (metadata path, body path) of the cache entry for a URL"""
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return (
+            os.path.join(self.cache_dir, key + ".json"),
+            os.path.join(self.cache_dir, key + ".html"),
+        )
+
+    def _read_cache(self, url):
+        """Return (metadata, body) cached for a URL, or (None, None)"""
+        if self.cache_dir is None:
+            return (None, None)
+        meta_fpath, body_fpath = self._get_cache_fpaths(url)
+        try:
+            with open(meta_fpath, 'r') as f:
+                meta = json.load(f)
+            with open(body_fpath, 'rb') as f:
+                body = f.read()
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return (None, None)
+        if meta.get('url')!=url:
+            return (None, None)
+        return (meta, body)
+
+    def _write_cache(self, url, resp):
+        """Cache a response, if it has a validator (ETag or Last-Modified)"""
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if self.cache_dir is None or (etag is None and last_modified is None):
+            return
+        meta = {'url': url, 'etag': etag, 'last_modified': last_modified}
+        meta_fpath, body_fpath = self._get_cache_fpaths(url)
+        # Write body first, then metadata, each atomically
+        for fpath, mode, data in [(body_fpath, 'wb', resp.content), (meta_fpath, 'w', json.dumps(meta))]:
+            tmp_fpath = f"{fpath}.{threading.get_ident()}.tmp"
+            with open(tmp_fpath, mode) as f:
+                f.write(data)
+            os.replace(tmp_fpath, fpath)
+
+    def get(self, url):
+        """
+        Fetch a URL and return the response body (bytes).
+        Uses a conditional GET if we have a cached copy,
+        and returns the cached copy if the page has not changed.
+        """
+        meta, body = self._read_cache(url)
+        headers = {}
+        if meta is not None:
+            if meta['etag'] is not None:
+                headers['If-None-Match'] = meta['etag']
+            if meta['last_modified'] is not None:
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        get_rate_limiter(self.requests_per_second).wait(url)
+        resp = self.session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+
+        if resp.status_code==304 and body is not None:
+            return body
+
+        if resp.status_code==200:
+            self._write_cache(url, resp)
+        return resp.content
+
+
+_http_clients = {}
+_http_clients_lock = threading.Lock()
+
+
+def get_http_client(model_parameters):
+    """
+    Return the process-wide HttpClient for this data directory.
+    The response cache goes in data/http_cache/.
+    """
+    cache_dir = os.path.join(model_parameters['data_directory'], 'http_cache')
+    rate = model_parameters.get('requests_per_second', REQUESTS_PER_SECOND)
+    with _http_clients_lock:
+        client = _http_clients.get(cache_dir)
+        if client is None:
+            client = HttpClient(cache_dir, rate)
+            _http_clients[cache_dir] = client
+        client.requests_per_second = rate
+        return client
@@ -0,0 +1,303 @@
+import os
+import time
+import json
+import socket
+import sqlite3
+import threading
+
+
+"""
+Persistent queue of scrape jobs
+
+Jobs (scrape one date's stat pages, one date's schedule, or one
+game's outcome and odds pages) are stored in a SQLite database
+under data/jobs/, so a backfill that is interrupted, or that hits
+a failing page, picks up where it left off on the next run.
+
+Each job is unique by (kind, key): adding a job that is already
+waiting or running does nothing. A job that raises is retried
+with exponential backoff, and is marked failed (with the reason)
+after JOB_MAX_ATTEMPTS tries. Any number of threads and processes
+can work through the same queue at once.
+"""
+
+
+# Number of tries before a job is marked as failed
+JOB_MAX_ATTEMPTS = 5
+
+# Wait this many seconds before the first retry, doubling after each one
+JOB_BACKOFF = 30.0
+JOB_BACKOFF_MAX = 3600.0
+
+# A running job whose worker has not finished it in this many seconds
+# (e.g. the worker was killed) can be claimed by another worker
+JOB_LEASE = 1800.0
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    key          TEXT NOT NULL,
+    date         TEXT,
+    grp          TEXT,
+    payload      TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    next_at      REAL NOT NULL,
+    leased_until REAL,
+    worker       TEXT,
+    last_error   TEXT,
+    updated      REAL NOT NULL,
+    UNIQUE (kind, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_at);
+CREATE INDEX IF NOT EXISTS jobs_grp ON jobs (grp);
+"""
+
+
+class Job(object):
+    """One claimed job"""
+    def __init__(self, id, kind, key, date, group, payload, attempts):
+        self.id = id
+        self.kind = kind
+        self.key = key
+        self.date = date
+        self.group = group
+        self.payload = payload
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"{self.kind} {self.key}"
+
+
+class JobQueue(object):
+    """
+    SQLite-backed job queue. Each thread gets its own connection;
+    claiming a job is one write transaction, so two workers
+    (threads or processes) never get the same job.
+    """
+    def __init__(self, db_fpath):
+        self.db_fpath = db_fpath
+        os.makedirs(os.path.dirname(db_fpath), exist_ok=True)
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_fpath, timeout=60, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    def add(self, kind, key, payload=None, date=None, group=None):
+        """
+        Add a job, unless the same (kind, key) job is already waiting or running.
+        A job that is done or failed is reset and will run again.
+        Returns True if the job will run.
+        """
+        return self.add_many(kind, [(key, payload)], date=date, group=group) > 0
+
+    def add_many(self, kind, jobs, date=None, group=None):
+        """
+        Add a list of (key, payload) jobs of one kind, all at once
+        (no worker sees some of them without the others).
+        Returns the number of jobs that will run.
+        """
+        now = time.time()
+        added = 0
+        with self._transaction() as db:
+            for key, payload in jobs:
+                cur = db.execute(
+                    """
+                    INSERT INTO jobs (kind, key, date, grp, payload, status, attempts, next_at, updated)
+                    VALUES (?, ?, ?, ?, ?, 'pending', 0, ?, ?)
+                    ON CONFLICT (kind, key) DO UPDATE SET
+                        date=excluded.date, grp=excluded.grp, payload=excluded.payload,
+                        status='pending', attempts=0, next_at=excluded.next_at,
+                        last_error=NULL, updated=excluded.updated
+                    WHERE status IN ('done', 'failed')
+                    """,
+                    (kind, key, date, group, json.dumps(payload), now, now),
+                )
+                added += cur.rowcount
+        return added
+
+    def claim(self, dates=None):
+        """
+        Claim the next job that is ready to run (optionally, only jobs for these dates).
+        Returns a Job, or None if no job is ready right now.
+        """
+        now = time.time()
+        where, args = _dates_filter(dates)
+        with self._transaction() as db:
+            row = db.execute(
+                f"""
+                SELECT id, kind, key, date, grp, payload, attempts FROM jobs
+                WHERE ((status='pending' AND next_at<=?) OR (status='running' AND leased_until<?)) {where}
+                ORDER BY id LIMIT 1
+                """,
+                [now, now] + args,
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status='running', leased_until=?, worker=?, updated=? WHERE id=?",
+                (now + JOB_LEASE, self.worker, now, row[0]),
+            )
+        id, kind, key, date, group, payload, attempts = row
+        return Job(id, kind, key, date, group, json.loads(payload), attempts)
+
+    def complete(self, job):
+        """
+        Mark a job as done.
+        Returns {status: count} of the jobs in the job's group, after this one.
+        """
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET status='done', leased_until=NULL, last_error=NULL, updated=? WHERE id=?",
+                (time.time(), job.id),
+            )
+            return self._group_counts(db, job.group)
+
+    def fail(self, job, error, max_attempts=None):
+        """
+        Record a job failure (error is a str).
+        The job is retried after a backoff, or marked failed once
+        it has used up its attempts (max_attempts, default JOB_MAX_ATTEMPTS).
+        Returns {status: count} of the jobs in the job's group, after this one.
+        """
+        if max_attempts is None:
+            max_attempts = JOB_MAX_ATTEMPTS
+        now = time.time()
+        attempts = job.attempts + 1
+        if attempts >= max_attempts:
+            status, next_at = 'failed', now
+        else:
+            status = 'pending'
+            next_at = now + min(JOB_BACKOFF * 2**(attempts-1), JOB_BACKOFF_MAX)
+        with self._transaction() as db:
+            db.execute(
+                """
+                UPDATE jobs SET status=?, attempts=?, next_at=?, leased_until=NULL,
+                last_error=?, updated=? WHERE id=?
+                """,
+                (status, attempts, next_at, error, now, job.id),
+            )
+            return self._group_counts(db, job.group)
+
+    def _group_counts(self, db, group):
+        if group is None:
+            return {}
+        rows = db.execute("SELECT status, COUNT(*) FROM jobs WHERE grp=? GROUP BY status", (group,))
+        return dict(rows.fetchall())
+
+    def release_dead_workers(self):
+        """
+        Make running jobs claimed by processes on this host that
+        no longer exist (e.g. killed with Ctrl-C) ready to run again,
+        instead of waiting for their lease to expire.
+        Returns the number of jobs released.
+        """
+        host = socket.gethostname()
+        with self._transaction() as db:
+            rows = db.execute("SELECT id, worker FROM jobs WHERE status='running'").fetchall()
+            dead = []
+            for id, worker in rows:
+                whost, _, pid = (worker or "").rpartition(":")
+                if whost==host and pid.isdigit() and not _pid_alive(int(pid)):
+                    dead.append(id)
+            for id in dead:
+                db.execute("UPDATE jobs SET status='pending', leased_until=NULL, next_at=? WHERE id=?", (time.time(), id))
+        return len(dead)
+
+    def wait_time(self, dates=None):
+        """
+        Return how many seconds until a job may be ready to claim
+        (0 if one is ready now), or None if there are no
+        waiting or running jobs left.
+        """
+        now = time.time()
+        where, args = _dates_filter(dates)
+        db = self._connect()
+        row = db.execute(
+            f"""
+            SELECT MIN(CASE WHEN status='pending' THEN next_at ELSE leased_until END) FROM jobs
+            WHERE status IN ('pending', 'running') {where}
+            """,
+            args,
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - now)
+
+    def counts(self, dates=None):
+        """Return {status: number of jobs}"""
+        where, args = _dates_filter(dates)
+        db = self._connect()
+        rows = db.execute(f"SELECT status, COUNT(*) FROM jobs WHERE 1=1 {where} GROUP BY status", args)
+        return dict(rows.fetchall())
+
+    def failures(self, dates=None):
+        """Return a list of (kind, key, attempts, last error) of each failed job"""
+        where, args = _dates_filter(dates)
+        db = self._connect()
+        rows = db.execute(
+            f"SELECT kind, key, attempts, last_error FROM jobs WHERE status='failed' {where} ORDER BY id",
+            args,
+        )
+        return rows.fetchall()
+
+
+class _Transaction(object):
+    """Context manager for one write transaction (BEGIN IMMEDIATE ... COMMIT/ROLLBACK)"""
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.db.execute("COMMIT")
+        else:
+            self.db.execute("ROLLBACK")
+        return False
+
+
+def _dates_filter(dates):
+    if dates is None:
+        return "", []
+    dates = sorted(dates)
+    return f"AND date IN ({','.join('?'*len(dates))})", dates
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(datadir):
+    """
+    Return the process-wide scrape job queue for a data directory
+    (stored in data/jobs/scrape_jobs.db)
+    """
+    with _queues_lock:
+        if datadir not in _queues:
+            _queues[datadir] = JobQueue(os.path.join(datadir, 'jobs', 'scrape_jobs.db'))
+        return _queues[datadir]
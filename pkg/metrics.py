@@ -0,0 +1,452 @@
+import math
+import numpy as np
+
+from .constants import CONFERENCES
+from .errors import TeamNotFoundException
+from .teams import team_id, donchess_name
+
+
+"""
+Backtest metrics
+
+Backtest results (predicted GameRecords) are collected into
+columns, one NumPy array per field (see ResultColumns), and
+each batch of games is scored at once:
+
+- spread vs Vegas: model and Vegas RMSE, W-L, ROI at -110
+- over/under: total RMSE, W-L betting the side of the Vegas
+  total our predicted total is on, ROI at -110
+- moneyline: W-L and profit betting the team we predict to
+  win, at its Vegas moneyline
+
+The per-game values are summed for all games, and for every
+group of each breakdown (conference, team, date, month, Vegas
+spread bucket, home/neutral site) with one np.bincount() per
+value. MetricsAccumulator keeps running sums across batches,
+so only the sums for each group are kept, not the games, and
+turns them into a Metrics object for each group at the end.
+"""
+
+
+# Breakdowns computed by compute_metrics()
+GROUP_BYS = ['conference', 'team', 'date', 'month', 'spread', 'site']
+
+# Vegas spread buckets (lower bound of the size of the spread)
+SPREAD_BUCKETS = [0, 3, 7, 12]
+
+# Spread and over/under bets are assumed to be at -110 odds
+BET_AMOUNT = 110
+BET_PROFIT = 100
+
+# Per-game values summed up for each group (see _game_values())
+SUM_FIELDS = [
+    'n_games',
+    'n_spread',
+    'model_spread_se',
+    'vegas_spread_se',
+    'spread_wins',
+    'spread_losses',
+    'n_total',
+    'model_total_se',
+    'ou_wins',
+    'ou_losses',
+    'ou_pushes',
+    'ml_wins',
+    'ml_losses',
+    'ml_profit',
+]
+
+
+class ResultColumns(object):
+    """
+    Backtest results as columns. Add games (GameRecords) one at a
+    time with append(), then get the NumPy arrays with arrays().
+    Missing numbers (no odds, no score) are NaN.
+    """
+    STR_FIELDS = ['game_date', 'away_team', 'home_team']
+    NUM_FIELDS = [
+        'away_score',
+        'home_score',
+        'away_spread',
+        'predicted_away_points',
+        'predicted_home_points',
+        'predicted_away_spread',
+        'predicted_total',
+        'vegas_away_spread',
+        'vegas_ou_total',
+        'vegas_away_moneyline',
+        'vegas_home_moneyline',
+    ]
+
+    def __init__(self):
+        self.columns = {k: [] for k in self.STR_FIELDS + self.NUM_FIELDS + ['neutral_site']}
+
+    def __len__(self):
+        return len(self.columns['game_date'])
+
+    def append(self, game):
+        for k in self.STR_FIELDS:
+            self.columns[k].append(getattr(game, k))
+        for k in self.NUM_FIELDS:
+            v = getattr(game, k)
+            self.columns[k].append(np.nan if v is None else v)
+        self.columns['neutral_site'].append(bool(game.neutral_site))
+
+    def extend(self, games):
+        for game in games:
+            self.append(game)
+
+    def arrays(self):
+        """Return {field: NumPy array}"""
+        a = {}
+        for k in self.STR_FIELDS:
+            a[k] = np.array(self.columns[k], dtype=object)
+        for k in self.NUM_FIELDS:
+            a[k] = np.array(self.columns[k], dtype=float)
+        a['neutral_site'] = np.array(self.columns['neutral_site'], dtype=bool)
+        return a
+
+
+class Metrics(object):
+    """
+    Metrics for one group of games, computed from the
+    sums of the per-game values in SUM_FIELDS.
+    Rates are NaN when there are no games to compute them from.
+    """
+    def __init__(self, sums):
+        for k in SUM_FIELDS:
+            setattr(self, k, sums[k])
+
+        # Spread vs Vegas
+        self.wins = int(self.spread_wins)
+        self.losses = int(self.spread_losses)
+        self.rmse = _rmse(self.model_spread_se, self.n_spread)
+        self.vegas_rmse = _rmse(self.vegas_spread_se, self.n_spread)
+        self.win_pct = _pct(self.wins, self.wins + self.losses)
+        self.roi = _roi_110(self.wins, self.losses)
+
+        # Over/under
+        self.total_rmse = _rmse(self.model_total_se, self.n_total)
+        self.ou_win_pct = _pct(self.ou_wins, self.ou_wins + self.ou_losses)
+        self.ou_roi = _roi_110(self.ou_wins, self.ou_losses)
+
+        # Moneyline (profit is in units of 1 unit risked per bet)
+        self.ml_bets = self.ml_wins + self.ml_losses
+        self.ml_win_pct = _pct(self.ml_wins, self.ml_bets)
+        self.ml_roi = 100*self.ml_profit/self.ml_bets if self.ml_bets>0 else np.nan
+
+    def to_json(self):
+        return {
+            'n_games': self.n_games,
+            'n_spread': self.n_spread,
+            'rmse': self.rmse,
+            'vegas_rmse': self.vegas_rmse,
+            'wins': self.wins,
+            'losses': self.losses,
+            'win_pct': self.win_pct,
+            'roi': self.roi,
+            'n_total': self.n_total,
+            'total_rmse': self.total_rmse,
+            'ou_wins': self.ou_wins,
+            'ou_losses': self.ou_losses,
+            'ou_pushes': self.ou_pushes,
+            'ou_win_pct': self.ou_win_pct,
+            'ou_roi': self.ou_roi,
+            'ml_wins': self.ml_wins,
+            'ml_losses': self.ml_losses,
+            'ml_win_pct': self.ml_win_pct,
+            'ml_profit': self.ml_profit,
+            'ml_roi': self.ml_roi,
+        }
+
+
+class BacktestMetrics(object):
+    """
+    Metrics for all games (overall), and for each group of each
+    breakdown (groups[by][key], e.g. groups['conference']['ACC']),
+    with the groups of each breakdown in order
+    """
+    def __init__(self, overall, groups):
+        self.overall = overall
+        self.groups = groups
+
+    def best_day(self):
+        """Return (date, Metrics) of the day with the most wins vs Vegas (first one, if tied)"""
+        return self._extreme_day('wins')
+
+    def worst_day(self):
+        """Return (date, Metrics) of the day with the most losses vs Vegas (first one, if tied)"""
+        return self._extreme_day('losses')
+
+    def _extreme_day(self, attr):
+        best_date, best = None, None
+        for date, m in sorted(self.groups['date'].items()):
+            if getattr(m, attr) > (getattr(best, attr) if best is not None else 0):
+                best_date, best = date, m
+        return best_date, best
+
+    def to_json(self):
+        return {
+            'overall': self.overall.to_json(),
+            'groups': {
+                by: {key: m.to_json() for key, m in group.items()}
+                for by, group in self.groups.items()
+            },
+        }
+
+    def print_breakdown(self, by, min_games=1):
+        """Print a table of the metrics for each group of one breakdown"""
+        print("")
+        print(f"\tBreakdown by {by}:")
+        print("\t" + "\t".join([by, "N games", "RMSE", "W-L vs Vegas", "W-L%", "ROI", "O/U W-L", "ML W-L", "ML ROI"]))
+        for key, m in self.groups[by].items():
+            if m.n_games < min_games:
+                continue
+            cols = [
+                str(key),
+                str(m.n_games),
+                _fmt(m.rmse, 1),
+                f"{m.wins} - {m.losses}",
+                _fmt(m.win_pct, 1, "%"),
+                _fmt(m.roi, 1, "%"),
+                f"{m.ou_wins} - {m.ou_losses}",
+                f"{m.ml_wins} - {m.ml_losses}",
+                _fmt(m.ml_roi, 1, "%"),
+            ]
+            print("\t" + "\t".join(cols))
+        print("")
+
+
+class MetricsAccumulator(object):
+    """
+    Running sums of the per-game values (SUM_FIELDS), for all games
+    and for each group of each breakdown in group_bys (see GROUP_BYS).
+    Add backtest results a batch at a time (a ResultColumns) with add(),
+    and get the BacktestMetrics so far with get_metrics(). Memory use
+    grows with the number of groups, not the number of games.
+    """
+    def __init__(self, group_bys=GROUP_BYS):
+        self.group_bys = list(group_bys)
+        self.overall = np.zeros(len(SUM_FIELDS))
+        # {by: {group key: array of sums, in SUM_FIELDS order}}
+        self.sums = {by: {} for by in self.group_bys}
+        # Team name -> team/conference key lookups, kept across batches
+        self.caches = {by: {} for by in self.group_bys}
+
+    def add(self, columns):
+        """Add a batch of backtest results (a ResultColumns)"""
+        n = len(columns)
+        if n==0:
+            return
+        a = columns.arrays()
+        values = _game_values(a)
+        self.overall += [values[k].sum() for k in SUM_FIELDS]
+        for by in self.group_bys:
+            idx, keys = _group_keys(by, a, n, self.caches[by])
+            unique, sums = _group_sums(values, idx, keys)
+            group = self.sums[by]
+            for key, row in zip(unique.tolist(), sums):
+                if key in group:
+                    group[key] += row
+                else:
+                    group[key] = row
+
+    def get_metrics(self):
+        """Return the BacktestMetrics of every result added so far"""
+        overall = Metrics(_sums_dict(self.overall))
+        groups = {}
+        for by in self.group_bys:
+            group = self.sums[by]
+            groups[by] = {key: Metrics(_sums_dict(group[key])) for key in sorted(group)}
+
+        if 'spread' in groups:
+            # Smallest spreads first, instead of in alphabetical order
+            order = _spread_labels() + ["none"]
+            groups['spread'] = {k: groups['spread'][k] for k in order if k in groups['spread']}
+
+        return BacktestMetrics(overall, groups)
+
+
+def compute_metrics(columns, group_bys=GROUP_BYS):
+    """
+    Compute the metrics for a set of backtest results
+    (a ResultColumns), overall and broken down by each of
+    group_bys (see GROUP_BYS). Returns a BacktestMetrics.
+    """
+    accumulator = MetricsAccumulator(group_bys)
+    accumulator.add(columns)
+    return accumulator.get_metrics()
+
+
+def score_games(columns):
+    """
+    Score each game of a set of backtest results (a ResultColumns)
+    on its own: returns {field: per-game array} for each of SUM_FIELDS
+    (e.g. spread_wins is 1 for each game that won vs Vegas)
+    """
+    return _game_values(columns.arrays())
+
+
+def _game_values(a):
+    """Per-game arrays for each of SUM_FIELDS"""
+    n = len(a['game_date'])
+    real_spread = a['away_spread']
+    real_total = a['away_score'] + a['home_score']
+    vegas_spread = a['vegas_away_spread']
+    vegas_total = a['vegas_ou_total']
+    predicted_spread = a['predicted_away_spread']
+    predicted_total = a['predicted_total']
+
+    v = {'n_games': np.ones(n)}
+
+    # Spread vs Vegas
+    # Won the bet if the prediction and the outcome are on the same side of the Vegas spread
+    # (same calculation as the original backtest summary, where a push counts as a loss)
+    scored = ~np.isnan(vegas_spread) & ~np.isnan(real_spread) & ~np.isnan(predicted_spread)
+    with np.errstate(invalid='ignore'):
+        won = ((vegas_spread - predicted_spread) > 0) == ((vegas_spread - real_spread) > 0)
+    v['n_spread'] = scored.astype(float)
+    v['model_spread_se'] = np.where(scored, (predicted_spread - real_spread)**2, 0.0)
+    v['vegas_spread_se'] = np.where(scored, (vegas_spread - real_spread)**2, 0.0)
+    v['spread_wins'] = (scored & won).astype(float)
+    v['spread_losses'] = (scored & ~won).astype(float)
+
+    # Over/under: bet the side of the Vegas total that our total is on
+    # (no bet if our total is the Vegas total, a push if the real total is)
+    has_total = ~np.isnan(real_total) & ~np.isnan(predicted_total)
+    v['n_total'] = has_total.astype(float)
+    v['model_total_se'] = np.where(has_total, (predicted_total - real_total)**2, 0.0)
+    with np.errstate(invalid='ignore'):
+        ou_bet = has_total & ~np.isnan(vegas_total) & (predicted_total != vegas_total)
+        ou_push = ou_bet & (real_total == vegas_total)
+        ou_won = (predicted_total > vegas_total) == (real_total > vegas_total)
+    v['ou_wins'] = (ou_bet & ~ou_push & ou_won).astype(float)
+    v['ou_losses'] = (ou_bet & ~ou_push & ~ou_won).astype(float)
+    v['ou_pushes'] = ou_push.astype(float)
+
+    # Moneyline: bet the team we predict to win, at its moneyline
+    # (no bet if we predict a tie)
+    pick_home = a['predicted_home_points'] > a['predicted_away_points']
+    pick_away = a['predicted_away_points'] > a['predicted_home_points']
+    moneyline = np.where(pick_home, a['vegas_home_moneyline'], a['vegas_away_moneyline'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ml_bet = (pick_home | pick_away) & ~np.isnan(moneyline) & ~np.isnan(real_spread)
+        ml_won = np.where(pick_home, real_spread > 0, real_spread < 0)
+        payout = np.where(moneyline > 0, moneyline/100, 100/np.abs(moneyline))
+    v['ml_wins'] = (ml_bet & ml_won).astype(float)
+    v['ml_losses'] = (ml_bet & ~ml_won).astype(float)
+    v['ml_profit'] = np.where(ml_bet, np.where(ml_won, payout, -1.0), 0.0)
+
+    return v
+
+
+def _group_keys(by, a, n, cache=None):
+    """
+    Return (game index, group key) arrays for a breakdown.
+    Team and conference breakdowns have up to two keys per game
+    (a game between two teams of the same conference counts once).
+    cache is a dict of team name lookups to reuse.
+    """
+    if by in ['team', 'conference']:
+        lookup = _team_key if by=='team' else get_conference
+        if cache is None:
+            cache = {}
+        away = np.array([_cached(cache, lookup, t) for t in a['away_team']], dtype=object)
+        home = np.array([_cached(cache, lookup, t) for t in a['home_team']], dtype=object)
+        both = np.arange(n)
+        other = both[home != away]
+        return np.concatenate([both, other]), np.concatenate([away, home[other]])
+
+    idx = np.arange(n)
+    if by=='date':
+        return idx, a['game_date']
+    if by=='month':
+        return idx, np.array([d[:7] for d in a['game_date']], dtype=object)
+    if by=='site':
+        return idx, np.where(a['neutral_site'], 'neutral', 'home').astype(object)
+    if by=='spread':
+        return idx, _spread_buckets(a['vegas_away_spread'])
+    raise ValueError(f"Unknown metrics breakdown: {by}")
+
+
+def _group_sums(values, idx, keys):
+    """
+    Sum the per-game values for each group key. Returns (unique keys,
+    array of sums with one row per key and one column per SUM_FIELDS)
+    """
+    unique, codes = np.unique(keys.astype(str), return_inverse=True)
+    sums = np.empty((len(unique), len(SUM_FIELDS)))
+    for j, k in enumerate(SUM_FIELDS):
+        sums[:, j] = np.bincount(codes, weights=values[k][idx], minlength=len(unique))
+    return unique, sums
+
+
+def _sums_dict(sums):
+    """{field: number} from an array of sums in SUM_FIELDS order"""
+    return {k: _to_number(x) for k, x in zip(SUM_FIELDS, sums.tolist())}
+
+
+def _spread_buckets(vegas_spread):
+    """Label each game with the bucket of the size of its Vegas spread"""
+    labels = _spread_labels()
+    spread = np.abs(vegas_spread)
+    with np.errstate(invalid='ignore'):
+        bucket = np.searchsorted(SPREAD_BUCKETS, spread, side='right') - 1
+    keys = np.array([labels[b] for b in np.clip(bucket, 0, len(labels)-1)], dtype=object)
+    keys[np.isnan(spread)] = "none"
+    return keys
+
+
+def _spread_labels():
+    labels = []
+    for lo, hi in zip(SPREAD_BUCKETS, SPREAD_BUCKETS[1:]):
+        labels.append(f"{lo}-{hi}")
+    labels.append(f"{SPREAD_BUCKETS[-1]}+")
+    return labels
+
+
+def _team_key(name):
+    try:
+        return donchess_name(team_id(name))
+    except (TeamNotFoundException, KeyError, IndexError):
+        return name
+
+
+def get_conference(name):
+    """Return the conference of a team (any team name), or Unknown"""
+    return CONFERENCES.get(_team_key(name), "Unknown")
+
+
+def _cached(cache, f, x):
+    if x not in cache:
+        cache[x] = f(x)
+    return cache[x]
+
+
+def _to_number(x):
+    """Counts as int, everything else as float"""
+    x = float(x)
+    return int(x) if x.is_integer() else x
+
+
+def _rmse(se, n):
+    return math.sqrt(se/n) if n>0 else np.nan
+
+
+def _pct(wins, n):
+    return 100*(wins/n) if n>0 else np.nan
+
+
+def _roi_110(wins, losses):
+    """ROI (%) of wins/losses of bets at -110 odds"""
+    if wins + losses==0:
+        return np.nan
+    investment = (wins + losses)*BET_AMOUNT
+    gross = wins*(BET_AMOUNT + BET_PROFIT)
+    return 100*((gross - investment)/investment)
+
+
+def _fmt(x, digits, suffix=""):
+    if x is None or (isinstance(x, float) and math.isnan(x)):
+        return "-"
+    return f"{round(x, digits)}{suffix}"
@@ -1,31 +1,43 @@
 import os
+import sys
 import json
-import statistics
-from functools import cache
+import hashlib
+import ast
+import inspect
+import importlib.util
+import numpy as np
 from geopy import distance
 from tzfpy import get_tz
 
 # Names are hard
 from .teams import (
-    is_kenpom_team,
-    is_donch_team,
-    is_teamrankings_team,
-    donch2kenpom,
-    kenpom2donch,
-    donch2teamrankings,
-    teamrankings2donch,
-    normalize_to_teamrankings_names,
-    normalize_to_donchess_names,
+    team_id,
+    teamrankings_name,
+    donchess_name,
 )
 from .constants import (
     HOME_ADVANTAGE,
+    SPREAD_TOO_NARROW,
+    SPREAD_TOO_WIDE,
+    LARGE_DISTANCE,
+    LARGE_DISTANCE_MODIFIER,
+    LOCAL_RIVALRY_DIST,
+    IN_CONFERENCE_MODIFIER,
+    OUT_CONFERENCE_MODIFIER,
+    EXAGGERATED_CONFERENCES,
+    ZEROED_CONFERENCES,
+    OFFSET_MODIFIER,
     GEO_LATLONG,
     CONFERENCES,
 )
 from .utils import (
     assert_required_keys_present,
     get_utc_offset_int,
+    get_season_year,
 )
+from .store import get_stat_store
+from .cube import get_stat_cube
+from .geo import get_geo_table, get_team_data_hash
 from .errors import (
     ModelParameterException,
     ModelPredictException,
@@ -55,6 +67,25 @@ class ModelBase(object):
         'neutral_site'
     ]
 
+    # Model parameters that do not change predictions
+    # (left out of the model fingerprint)
+    fingerprint_ignored_params = [
+        'data_directory',
+        'quiet',
+        'print_stats',
+        'backtest_workers',
+        'backtest_chunk_days',
+        'prediction_cache',
+        # Scraper settings
+        'browser_pool_size',
+        'scraper_workers',
+        'scrape_job_workers',
+        'requests_per_second',
+        'archive_html',
+        'offline',
+        'base_url',
+    ]
+
     def __init__(self, model_parameters = {}):
         self.model_parameters = model_parameters
 
@@ -79,11 +110,146 @@ class ModelBase(object):
         """
         return NotImplemented
 
+    def predict_batch(self, games):
+        """
+        Make predictions for a list of games at once.
+
+        Models that can do this more efficiently than
+        one predict() call per game should redefine it.
+
+        Returns a tuple of NumPy arrays, one entry per game:
+        (predicted_away_points, predicted_home_points, valid)
+        where valid is a boolean mask of the games the model
+        was able to make a prediction for (NaN otherwise).
+        """
+        n = len(games)
+        away_points = np.full(n, np.nan)
+        home_points = np.full(n, np.nan)
+        valid = np.zeros(n, dtype=bool)
+        for i, game in enumerate(games):
+            try:
+                away_points[i], home_points[i] = self.predict(game)
+            except (TeamNotFoundException, ModelPredictException):
+                continue
+            valid[i] = True
+        return (away_points, home_points, valid)
+
+    def get_input_fpaths(self, game_date):
+        """
+        Return a list of the data files this model reads to make
+        predictions about games on game_date (YYYYMMDD format).
+
+        Return None if this is not known, in which case
+        predictions will not be cached (see Backtester).
+        """
+        return None
+
+    def get_fingerprint(self):
+        """
+        Return a hash that changes whenever this model's predictions
+        could change for the same input data: the source code of the
+        model class and its parent classes (and the modules they
+        live in, and the modules of this package those import, e.g.
+        store, geo, constants), tunable class/instance attributes,
+        team data, and model parameters.
+
+        Return None if the source code can't be found
+        (e.g. a model class defined in an interactive session).
+        """
+        parts = []
+        modules = set()
+        tunables = {}
+        for cls in reversed(type(self).__mro__):
+            if cls is object:
+                continue
+            parts.append(f"{cls.__module__}.{cls.__qualname__}")
+            modules.add(cls.__module__)
+            tunables.update(_get_tunables(vars(cls)))
+        tunables.update(_get_tunables(self.__dict__))
+
+        for name in sorted(_get_package_imports(modules)):
+            try:
+                parts.append(inspect.getsource(sys.modules[name]))
+            except (KeyError, TypeError, OSError):
+                return None
+
+        params = {k: v for k, v in self.model_parameters.items() if k not in self.fingerprint_ignored_params}
+        parts.append(json.dumps(tunables, sort_keys=True, default=repr))
+        parts.append(json.dumps(params, sort_keys=True, default=repr))
+        parts.append(get_team_data_hash())
+
+        h = hashlib.sha1()
+        for part in parts:
+            h.update(part.encode('utf-8'))
+        return h.hexdigest()
+
+
+def _get_package_imports(names):
+    """
+    Return the names of these modules, plus the modules of this
+    package that they import, and the ones those import, and so on
+    """
+    found = set()
+    todo = list(names)
+    while len(todo)>0:
+        name = todo.pop()
+        if name in found:
+            continue
+        found.add(name)
+        try:
+            module = sys.modules[name]
+            tree = ast.parse(inspect.getsource(module))
+        except (KeyError, TypeError, OSError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                deps = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                base = importlib.util.resolve_name("."*node.level + (node.module or ""), module.__package__)
+                # from . import constants imports a module, from .store import get_stat_store does not
+                deps = [base] + [f"{base}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for dep in deps:
+                if dep.startswith(__package__ + ".") and dep in sys.modules:
+                    todo.append(dep)
+    return found
+
+
+def _get_tunables(attrs):
+    """Return the public, non-method attributes in a class or instance dict"""
+    tunables = {}
+    for k, v in attrs.items():
+        if k.startswith('_') or k=='model_parameters':
+            continue
+        if isinstance(v, (bool, int, float, str, list, tuple, dict)) or v is None:
+            tunables[k] = v
+    return tunables
+
 
 class NCAABModel(ModelBase):
     """
     Define a class for an NCAAB basketball game.
+
+    Tunable model parameters are class attributes, so a child class
+    (or Backtester.sweep()) can change them without redefining methods.
     """
+    # Points of home court advantage
+    home_advantage = HOME_ADVANTAGE
+
+    # Offensive/defensive efficiency is a blend of season and last 3 games values
+    season_weight = 0.95
+    last3_weight  = 0.05
+
+    # Travel distance, conference, and time zone modifiers
+    large_distance_modifier = LARGE_DISTANCE_MODIFIER
+    in_conference_modifier  = IN_CONFERENCE_MODIFIER
+    out_conference_modifier = OUT_CONFERENCE_MODIFIER
+    offset_modifier         = OFFSET_MODIFIER
+
+    # Stat files the model reads its data from
+    input_prefixes = ["tempo", "off_eff", "def_eff"]
+
     def get_avg_tempo(self, game_date):
         """Return the average tempo for entire league"""
         year = self._get_year(game_date)
@@ -113,14 +279,8 @@ class NCAABModel(ModelBase):
 
     def get_school_off_eff(self, gp, school):
         """Return the offensive efficiency (blend of season average and last 3 average) for this school"""
-        game_date = gp['game_date'].replace("-", "")
-        year = self._get_year(game_date)
-        seas_eff  = self._get_school_template_func(gp, school, "off_eff", f"off_eff_{year}")
-        try:
-            last3_eff = self._get_school_template_func(gp, school, "off_eff", "off_eff_last_3")
-        except KeyError:
-            last3_eff = seas_eff
-        return 0.95*seas_eff + 0.05*last3_eff
+        seas_eff, last3_eff = self._get_school_eff_parts(gp, school, "off_eff")
+        return self.season_weight*seas_eff + self.last3_weight*last3_eff
 
     ### def get_school_def_eff(self, gp, school):
     ###     """Return the defensive efficiency for this season for this school"""
@@ -130,14 +290,13 @@ class NCAABModel(ModelBase):
 
     def get_school_def_eff(self, gp, school):
         """Return the defensive efficiency (blend of season average and last 3 average) for this school"""
-        game_date = gp['game_date'].replace("-", "")
-        year = self._get_year(game_date)
-        seas_eff  = self._get_school_template_func(gp, school, "def_eff", f"def_eff_{year}")
-        try:
-            last3_eff = self._get_school_template_func(gp, school, "def_eff", f"def_eff_last_3")
-        except KeyError:
-            last3_eff = seas_eff
-        return 0.95*seas_eff + 0.05*last3_eff
+        seas_eff, last3_eff = self._get_school_eff_parts(gp, school, "def_eff")
+        return self.season_weight*seas_eff + self.last3_weight*last3_eff
+
+    def get_input_fpaths(self, game_date):
+        """Return a list of the stat files used to make predictions on game_date"""
+        fpaths = [self._get_fpath_json(prefix, game_date) for prefix in self.input_prefixes]
+        return sorted(set(fpaths))
 
     def get_home_factor(self, game_parameters, away_points, home_points):
         """
@@ -150,8 +309,8 @@ class NCAABModel(ModelBase):
         # Currently using a very simple approach of giving home team +N points on the spread
         # But to keep the point total similar, we add/subtract N/2 from each side
         # (otherwise, introduces bias toward the over on over/under predictions)
-        away_points -= HOME_ADVANTAGE/2
-        home_points += HOME_ADVANTAGE/2
+        away_points -= self.home_advantage/2
+        home_points += self.home_advantage/2
         return (away_points, home_points)
 
     def get_geotime_factor(self, game_parameters, away_points, home_points):
@@ -163,18 +322,27 @@ class NCAABModel(ModelBase):
         # ---------------------------
         # Travel distance factors:
 
-        # Get lat long and dist btwn
-        away_latlong = GEO_LATLONG[normalize_to_donchess_names(game_parameters['away_team'])]
-        home_latlong = GEO_LATLONG[normalize_to_donchess_names(game_parameters['home_team'])]
-        dist = distance.distance(away_latlong, home_latlong).miles
+        # (Names were resolved up front, so learned aliases are fine here)
+        away_team = donchess_name(team_id(game_parameters['away_team']))
+        home_team = donchess_name(team_id(game_parameters['home_team']))
+
+        # Get dist btwn, from the precomputed geo table if we have one
+        geo = get_geo_table()
+        if geo is not None:
+            a = team_id(game_parameters['away_team'])
+            h = team_id(game_parameters['home_team'])
+            dist = float(geo.miles[a, h])
+        else:
+            away_latlong = GEO_LATLONG[away_team]
+            home_latlong = GEO_LATLONG[home_team]
+            dist = distance.distance(away_latlong, home_latlong).miles
 
         # Large travel distance factor:
-        LARGE_DISTANCE_MODIFIER = 6.0
-        # (Note: increasing this value sligtly increases MSE, but also increases W-L vs Vegas)
+        # (Note: increasing large_distance_modifier sligtly increases MSE, but also increases W-L vs Vegas)
         # Home has edge if travel distance > 2000 miles
-        if dist > 2000:
-            away_points -= LARGE_DISTANCE_MODIFIER/2
-            home_points += LARGE_DISTANCE_MODIFIER/2
+        if dist > LARGE_DISTANCE:
+            away_points -= self.large_distance_modifier/2
+            home_points += self.large_distance_modifier/2
 
         # Short distances (regional/state matchups):
         # Visitors have an edge (fan base is closer)
@@ -192,75 +360,76 @@ class NCAABModel(ModelBase):
         # and give visitor +2 if distance < 100
         # 
         # If different conference, +1 home
-        away_conf = CONFERENCES[normalize_to_donchess_names(game_parameters['away_team'])]
-        home_conf = CONFERENCES[normalize_to_donchess_names(game_parameters['home_team'])]
+        away_conf = CONFERENCES[away_team]
+        home_conf = CONFERENCES[home_team]
 
         # In-conference matchups give visitors this edge
-        IN_CONFERENCE_MODIFIER  = 1.0
-        OUT_CONFERENCE_MODIFIER = 0.5
+        in_conf_modifier  = self.in_conference_modifier
+        out_conf_modifier = self.out_conference_modifier
 
         # Spot adjustments to in/out conference adjustments (totally empirical, needs verification)
-        if away_conf in ['ACC', 'BE']:
+        if away_conf in EXAGGERATED_CONFERENCES:
             # Need exaggerated in/out conf modifiers
-            IN_CONFERENCE_MODIFIER  = 3*IN_CONFERENCE_MODIFIER
-            OUT_CONFERENCE_MODIFIER = 3*OUT_CONFERENCE_MODIFIER
-        if away_conf in ['ASun', 'BW', 'CAA']:
+            in_conf_modifier  = 3*in_conf_modifier
+            out_conf_modifier = 3*out_conf_modifier
+        if away_conf in ZEROED_CONFERENCES:
             # Need smaller in/out conf modifiers
-            IN_CONFERENCE_MODIFIER  = 0.0
-            OUT_CONFERENCE_MODIFIER = 0.0
-
-        LOCAL_RIVALRY_DIST = 150
+            in_conf_modifier  = 0.0
+            out_conf_modifier = 0.0
 
         if away_conf==home_conf:
             if dist <= LOCAL_RIVALRY_DIST:
                 # Visitor gets double modifier b/c easy travel distance for away fans
-                away_points += 2*(IN_CONFERENCE_MODIFIER/2)
-                home_points -= 2*(IN_CONFERENCE_MODIFIER/2)
+                away_points += 2*(in_conf_modifier/2)
+                home_points -= 2*(in_conf_modifier/2)
             else:
-                away_points += IN_CONFERENCE_MODIFIER/2
-                home_points -= IN_CONFERENCE_MODIFIER/2
+                away_points += in_conf_modifier/2
+                home_points -= in_conf_modifier/2
         else:
             if dist > LOCAL_RIVALRY_DIST:
                 # Home gets double modifier b/c different conf and too far for away fans
-                away_points -= 2*(OUT_CONFERENCE_MODIFIER/2)
-                home_points += 2*(OUT_CONFERENCE_MODIFIER/2)
+                away_points -= 2*(out_conf_modifier/2)
+                home_points += 2*(out_conf_modifier/2)
             else:
-                away_points -= OUT_CONFERENCE_MODIFIER/2
-                home_points += OUT_CONFERENCE_MODIFIER/2
+                away_points -= out_conf_modifier/2
+                home_points += out_conf_modifier/2
 
         # ---------------------------
         # Time zone factors:
 
-        # Get the time zone
-        away_tz = get_tz(*reversed(away_latlong))
-        home_tz = get_tz(*reversed(home_latlong))
+        # Get the time zone, and use the time zone to get UTC offset
+        if geo is not None:
+            away_utc_offset = int(geo.utc_offsets[a])
+            home_utc_offset = int(geo.utc_offsets[h])
+        else:
+            away_tz = get_tz(*reversed(away_latlong))
+            home_tz = get_tz(*reversed(home_latlong))
+            away_utc_offset = get_utc_offset_int(away_tz)
+            home_utc_offset = get_utc_offset_int(home_tz)
 
-        # Now use the time zone to get UTC offset
         # The offset values will look like:
         # [far west] Hawaii  = 9 -> 4
         # [west] Los_Angeles = 8 -> 3
         # [mountain] Denver  = 7 -> 2
         # [central] Chicago  = 6 -> 1
         # [eastern] New_York = 5 -> 0
-        away_offset = abs(get_utc_offset_int(away_tz))-5
-        home_offset = abs(get_utc_offset_int(home_tz))-5
+        away_offset = abs(away_utc_offset)-5
+        home_offset = abs(home_utc_offset)-5
 
         # Number of hours difference in timezones btwn away/home
         # If the magnitude is larger, then time difference effects are more likely
         offset_diff = away_offset - home_offset
 
-        OFFSET_MODIFIER = 0.5
-
         if offset_diff > 0:
             # If offset diff is POSITIVE, home is more east and away is more west 
             # (away team is more disadvantaged)
-            away_points -= offset_diff*OFFSET_MODIFIER/2
-            home_points += offset_diff*OFFSET_MODIFIER/2
+            away_points -= offset_diff*self.offset_modifier/2
+            home_points += offset_diff*self.offset_modifier/2
         else:
             # If offset diff is NEGATIVE, home is more west and away is more east
             # (away team is less disadvantaged, but still disadvantaged)
-            away_points -= -1*offset_diff*OFFSET_MODIFIER/4
-            home_points += -1*offset_diff*OFFSET_MODIFIER/4
+            away_points -= -1*offset_diff*self.offset_modifier/4
+            home_points += -1*offset_diff*self.offset_modifier/4
 
         # Account for effects of early start/late start:
 
@@ -310,13 +479,12 @@ class NCAABModel(ModelBase):
             msg = f"Error: missing a required key in game inputs: {self.required_game_params}"
             raise ModelPredictException(msg)
 
-        # Whatever names we were given, find our way to the teamrankings ones
+        # Whatever names we were given, find our way to the team ids
         # This may throw a TeamNotFoundException, catch it wherever we are calling predict()
-        away_team = normalize_to_teamrankings_names(game_parameters['away_team'])
-        home_team = normalize_to_teamrankings_names(game_parameters['home_team'])
+        away_id = team_id(game_parameters['away_team'])
+        home_id = team_id(game_parameters['home_team'])
 
         game_date = game_parameters['game_date'].replace("-", "")
-        game_descr = away_team + " @ " + home_team
 
         # Tempo gives the rate at which a team has possession of the ball
         # Offensive/defensive efficiency is the rate at which a team gets/gives up points when they have possession
@@ -327,10 +495,10 @@ class NCAABModel(ModelBase):
         avg_tempo   = self.get_avg_tempo(game_date)
 
         # TODO: fix this
-        away_tempo = self.get_school_tempo(game_parameters, away_team)
+        away_tempo = self.get_school_tempo(game_parameters, away_id)
         away_tempo_pct_add = self._get_pct_adjustment(away_tempo, avg_tempo)
 
-        home_tempo = self.get_school_tempo(game_parameters, home_team)
+        home_tempo = self.get_school_tempo(game_parameters, home_id)
         home_tempo_pct_add = self._get_pct_adjustment(home_tempo, avg_tempo)
 
         # Additive, not multiplicative
@@ -342,19 +510,19 @@ class NCAABModel(ModelBase):
         # Offense
         avg_off_eff = 100*self.get_avg_off_eff(game_date)
 
-        away_off_eff = 100*self.get_school_off_eff(game_parameters, away_team)
+        away_off_eff = 100*self.get_school_off_eff(game_parameters, away_id)
         away_off_eff_pct_add = self._get_pct_adjustment(away_off_eff, avg_off_eff)
 
-        home_off_eff = 100*self.get_school_off_eff(game_parameters, home_team)
+        home_off_eff = 100*self.get_school_off_eff(game_parameters, home_id)
         home_off_eff_pct_add = self._get_pct_adjustment(home_off_eff, avg_off_eff)
 
         # Defense
         avg_def_eff = 100*self.get_avg_def_eff(game_date)
 
-        away_def_eff = 100*self.get_school_def_eff(game_parameters, away_team)
+        away_def_eff = 100*self.get_school_def_eff(game_parameters, away_id)
         away_def_eff_pct_add = self._get_pct_adjustment(away_def_eff, avg_def_eff)
 
-        home_def_eff = 100*self.get_school_def_eff(game_parameters, home_team)
+        home_def_eff = 100*self.get_school_def_eff(game_parameters, home_id)
         home_def_eff_pct_add = self._get_pct_adjustment(home_def_eff, avg_def_eff)
 
         # Defense efficiency = points allowed, so higher def percent add = more points allowed to opponent
@@ -371,8 +539,6 @@ class NCAABModel(ModelBase):
         e_home_points = e_tempo*(e_home_off_output/100.0)
 
         # Look for too big/too small spreads BEFORE adding modifiers
-        SPREAD_TOO_NARROW = 0
-        SPREAD_TOO_WIDE = 21
         if abs(e_away_points-e_home_points) < SPREAD_TOO_NARROW:
             msg = f"Error: could not make prediction, spread is too narrow (< {SPREAD_TOO_NARROW})"
             raise ModelPredictException(msg)
@@ -391,6 +557,7 @@ class NCAABModel(ModelBase):
         e_away_points, e_home_points = self.get_geotime_factor(game_parameters, e_away_points, e_home_points)
 
         if not ('quiet' in self.model_parameters and self.model_parameters['quiet'] is True):
+            away_team, home_team = teamrankings_name(away_id), teamrankings_name(home_id)
             p = f"Generated model prediction for {game_parameters['game_date']}"
             if e_away_points > e_home_points:
                 print(f"{p}: {away_team} {round(e_away_points,1)} - {round(e_home_points,1)} {home_team}")
@@ -399,10 +566,212 @@ class NCAABModel(ModelBase):
 
         return (round(e_away_points, 1), round(e_home_points, 1))
 
+    def predict_batch(self, games):
+        """
+        Given a list of game parameter dictionaries
+        (e.g., one day or one season of games),
+        make a prediction for every game at once.
+
+        Team data is gathered into arrays, and the model math
+        is done with array operations instead of one game at a time.
+        Games that predict() would raise an exception for
+        (missing data, spread too narrow/wide) are not predicted.
+
+        Returns a tuple of NumPy arrays, one entry per game:
+        (predicted_away_points, predicted_home_points, valid)
+        """
+        if not self._has_batch_math():
+            # A child class redefined predict() or its math, so we can't skip it
+            return super().predict_batch(games)
+
+        inputs = self.gather_batch_inputs(games)
+        return self.predict_batch_inputs(games, inputs)
+
+    def gather_batch_inputs(self, games):
+        """
+        Part 1 of predict_batch(): look up the tempo/off/def values
+        for every game, and gather them into arrays.
+
+        The result only depends on the data for these games,
+        not on tunable model parameters like home_advantage or
+        season_weight, so it can be reused to make predictions
+        with many different parameter values (see Backtester.sweep()).
+
+        Returns None if a child class redefined predict() or its math,
+        since the gathered inputs would not be used.
+        """
+        if not self._has_batch_math():
+            return None
+
+        n = len(games)
+        ids = np.zeros((n, 2), dtype=int)
+        valid = np.ones(n, dtype=bool)
+
+        # Columns: away, home, league average
+        tempo   = np.full((n, 3), np.nan)
+        off_eff = np.full((n, 3), np.nan)
+        def_eff = np.full((n, 3), np.nan)
+
+        # If the efficiency getters are ours, gather season and last 3 values
+        # separately, and blend them in predict_batch_inputs().
+        # Columns: away season, home season, away last 3, home last 3
+        blend = (type(self).get_school_off_eff is NCAABModel.get_school_off_eff
+                 and type(self).get_school_def_eff is NCAABModel.get_school_def_eff)
+        off_eff_parts = np.full((n, 4), np.nan)
+        def_eff_parts = np.full((n, 4), np.nan)
+
+        # League averages only depend on the date
+        averages = {}
+        for i, game_parameters in enumerate(games):
+            try:
+                assert_required_keys_present(game_parameters, self.required_game_params)
+                away_id = team_id(game_parameters['away_team'])
+                home_id = team_id(game_parameters['home_team'])
+
+                game_date = game_parameters['game_date'].replace("-", "")
+                if game_date not in averages:
+                    averages[game_date] = (
+                        self.get_avg_tempo(game_date),
+                        self.get_avg_off_eff(game_date),
+                        self.get_avg_def_eff(game_date),
+                    )
+                avg_tempo, avg_off_eff, avg_def_eff = averages[game_date]
+                if avg_tempo is None or avg_off_eff is None or avg_def_eff is None:
+                    raise ModelPredictException(f"Error: no league average data for {game_date}")
+
+                tempo[i]   = (self.get_school_tempo(game_parameters, away_id),
+                              self.get_school_tempo(game_parameters, home_id),
+                              avg_tempo)
+                if blend:
+                    away_off = self._get_school_eff_parts(game_parameters, away_id, "off_eff")
+                    home_off = self._get_school_eff_parts(game_parameters, home_id, "off_eff")
+                    away_def = self._get_school_eff_parts(game_parameters, away_id, "def_eff")
+                    home_def = self._get_school_eff_parts(game_parameters, home_id, "def_eff")
+                    off_eff_parts[i] = (away_off[0], home_off[0], away_off[1], home_off[1])
+                    def_eff_parts[i] = (away_def[0], home_def[0], away_def[1], home_def[1])
+                    off_eff[i, 2] = avg_off_eff
+                    def_eff[i, 2] = avg_def_eff
+                else:
+                    off_eff[i] = (self.get_school_off_eff(game_parameters, away_id),
+                                  self.get_school_off_eff(game_parameters, home_id),
+                                  avg_off_eff)
+                    def_eff[i] = (self.get_school_def_eff(game_parameters, away_id),
+                                  self.get_school_def_eff(game_parameters, home_id),
+                                  avg_def_eff)
+            except (KeyError, TeamNotFoundException, ModelPredictException):
+                valid[i] = False
+                continue
+            ids[i] = (away_id, home_id)
+
+        inputs = {
+            'ids': ids,
+            'valid': valid,
+            'tempo': tempo,
+            'off_eff': off_eff,
+            'def_eff': def_eff,
+        }
+        if blend:
+            inputs['off_eff_parts'] = off_eff_parts
+            inputs['def_eff_parts'] = def_eff_parts
+        return inputs
+
+    def predict_batch_inputs(self, games, inputs):
+        """
+        Parts 2-4 of predict_batch(): given the arrays gathered by
+        gather_batch_inputs(), do the same math as predict(),
+        on whole columns at a time, using this model's parameters.
+        (Order of operations is kept the same, so results are identical.)
+        """
+        ids = inputs['ids']
+        valid = inputs['valid'].copy()
+        tempo = inputs['tempo']
+
+        off_eff = inputs['off_eff'].copy()
+        def_eff = inputs['def_eff'].copy()
+        if 'off_eff_parts' in inputs:
+            # Same blend as get_school_off_eff()/get_school_def_eff()
+            off_parts, def_parts = inputs['off_eff_parts'], inputs['def_eff_parts']
+            off_eff[:, 0:2] = self.season_weight*off_parts[:, 0:2] + self.last3_weight*off_parts[:, 2:4]
+            def_eff[:, 0:2] = self.season_weight*def_parts[:, 0:2] + self.last3_weight*def_parts[:, 2:4]
+
+        # ----------
+        # Part 2 - expected tempo and offense/defense output
+
+        avg_tempo = tempo[:, 2]
+        away_tempo_pct_add = 100*tempo[:, 0]/avg_tempo - 100
+        home_tempo_pct_add = 100*tempo[:, 1]/avg_tempo - 100
+        e_tempo = (100 + away_tempo_pct_add + home_tempo_pct_add)*avg_tempo/100
+
+        off_eff = 100*off_eff
+        def_eff = 100*def_eff
+        avg_off_eff = off_eff[:, 2]
+        away_off_eff_pct_add = 100*off_eff[:, 0]/avg_off_eff - 100
+        home_off_eff_pct_add = 100*off_eff[:, 1]/avg_off_eff - 100
+        avg_def_eff = def_eff[:, 2]
+        away_def_eff_pct_add = 100*def_eff[:, 0]/avg_def_eff - 100
+        home_def_eff_pct_add = 100*def_eff[:, 1]/avg_def_eff - 100
+
+        e_away_off_output = (100 + away_off_eff_pct_add + home_def_eff_pct_add)*avg_off_eff/100
+        e_home_off_output = (100 + home_off_eff_pct_add + away_def_eff_pct_add)*avg_off_eff/100
+
+        e_away_points = e_tempo*(e_away_off_output/100.0)
+        e_home_points = e_tempo*(e_home_off_output/100.0)
+
+        # ----------
+        # Part 3 - filter out too big/too small spreads BEFORE adding modifiers
+
+        with np.errstate(invalid='ignore'):
+            spread = np.abs(e_away_points - e_home_points)
+            valid &= ~(spread < SPREAD_TOO_NARROW)
+            valid &= ~(spread > SPREAD_TOO_WIDE)
+
+        # -----------
+        # Part 4 - modify expected number of points for known factors
+
+        if type(self).get_home_factor is NCAABModel.get_home_factor:
+            # Default home factor is plain arithmetic, so it works on arrays too
+            e_away_points, e_home_points = self.get_home_factor(games, e_away_points, e_home_points)
+        else:
+            for i in np.flatnonzero(valid):
+                e_away_points[i], e_home_points[i] = self.get_home_factor(games[i], e_away_points[i], e_home_points[i])
+
+        if type(self).get_geotime_factor is NCAABModel.get_geotime_factor and get_geo_table() is not None:
+            e_away_points, e_home_points = self._get_geotime_factor_batch(games, valid, ids, e_away_points, e_home_points)
+        else:
+            for i in np.flatnonzero(valid):
+                e_away_points[i], e_home_points[i] = self.get_geotime_factor(games[i], e_away_points[i], e_home_points[i])
+
+        e_away_points[~valid] = np.nan
+        e_home_points[~valid] = np.nan
+
+        # Round the same way predict() does (np.round rounds halves differently)
+        away_points = np.array([round(x, 1) for x in e_away_points.tolist()])
+        home_points = np.array([round(x, 1) for x in e_home_points.tolist()])
+
+        if not ('quiet' in self.model_parameters and self.model_parameters['quiet'] is True):
+            for i in np.flatnonzero(valid):
+                away_team, home_team = teamrankings_name(ids[i, 0]), teamrankings_name(ids[i, 1])
+                p = f"Generated model prediction for {games[i]['game_date']}"
+                if e_away_points[i] > e_home_points[i]:
+                    print(f"{p}: {away_team} {away_points[i]} - {home_points[i]} {home_team}")
+                else:
+                    print(f"{p}: {home_team} {home_points[i]} - {away_points[i]} {away_team}")
+
+        return (away_points, home_points, valid)
+
 
     # ----------------------------------------
     # Below are private utility/helper methods
 
+    def _has_batch_math(self):
+        """
+        True if predict_batch_inputs() does the same math as predict():
+        a child class has not redefined predict(), or _get_pct_adjustment()
+        (which predict_batch_inputs() does on whole columns instead of calling)
+        """
+        return (type(self).predict is NCAABModel.predict
+                and type(self)._get_pct_adjustment is NCAABModel._get_pct_adjustment)
+
     def _get_fpath_json(self, prefix, stamp):
         """
         Get the filename + path of the JSON file containing
@@ -417,55 +786,134 @@ class NCAABModel(ModelBase):
         fpath = os.path.join(jdatadir, fname)
         return fpath
 
-    @cache
+    def _get_team_key(self, prefix):
+        """Get the name of the team name column in a JSON file of team ranking data"""
+        return f'{prefix}_team'
+
+    def _get_snapshot(self, prefix, stamp):
+        """
+        Get the (parsed, indexed) contents of the JSON file
+        containing team ranking data, from the shared stat store.
+        Each file is only parsed once per process.
+        """
+        fpath = self._get_fpath_json(prefix, stamp)
+        return get_stat_store().get(fpath, self._get_team_key(prefix))
+
+    def _get_cube(self, stamp):
+        """
+        Return the season stat cube, if it has been built
+        and has data for this date (YYYYMMDD), otherwise None
+        (in which case data is read from the JSON files).
+        """
+        cube = get_stat_cube(self.model_parameters['data_directory'], self._get_year(stamp))
+        if cube is not None and cube.has_date(stamp):
+            return cube
+        return None
+
     def _get_avg_template_func(self, game_date, fpath_prefix, dimension):
         """
-        Template function for fetching data,
-        computing the average of a dimension,
-        and returning it.
-        """
-        with open(self._get_fpath_json(fpath_prefix, game_date), 'r') as f:
-            dat = json.load(f)
-
-        # JSON object just loaded is a list of dictionaries,
-        # with each dimension prefixed by "tempo" or "off_eff" or etc
-        # [{  'tempo_team': 'Drake',
-        #     'tempo_rank': 120,
-        #     'tempo_2024':
-        #     'tempo_last3':
-        #     'tempo_last1':
-        #     'tempo_home':
-        #     'tempo_away':
-        # }, ..., ]
-
-        m = []
-        for item in dat:
-            if item[dimension] is not None:
-                m.append(item[dimension])
-        if len(m)>0:
-            return statistics.mean(m)
+        Template function for fetching the league
+        average of a dimension, and returning it.
+        Averages are computed once, when the stat file
+        is loaded into the stat store (or stat cube).
+        """
+        cube = self._get_cube(game_date)
+        if cube is not None:
+            return cube.get_average(game_date, dimension)
+
+        return self._get_snapshot(fpath_prefix, game_date).get_average(dimension)
 
     def _get_year(self, game_date):
-        # Any game after August is part of the next season
-        if int(game_date[4:6])>8:
-            year = int(game_date[0:4])
-        else:
-            year = int(game_date[0:4]) - 1
-        return year
+        return get_season_year(game_date)
+
+    def _get_school_eff_parts(self, gp, school, prefix):
+        """
+        Return the (season, last 3 games) values of an
+        efficiency stat (off_eff or def_eff) for this school
+        """
+        game_date = gp['game_date'].replace("-", "")
+        year = self._get_year(game_date)
+        seas_eff  = self._get_school_template_func(gp, school, prefix, f"{prefix}_{year}")
+        try:
+            last3_eff = self._get_school_template_func(gp, school, prefix, f"{prefix}_last_3")
+        except KeyError:
+            last3_eff = seas_eff
+        return (seas_eff, last3_eff)
 
     def _get_school_template_func(self, game_parameters, school, fpath_prefix, dimension):
         """
         Template function for fetching data, getting the
         dimension value for a given school, and returning it.
+        School can be a team id or a team name.
         """
         game_date = game_parameters['game_date'].replace("-", "")
-        with open(self._get_fpath_json(fpath_prefix, game_date), 'r') as f:
-            dat = json.load(f)
-        for item in dat:
-            if item[f'{fpath_prefix}_team']==school:
-                if item[dimension] is not None:
-                    return item[dimension]
-        raise TeamNotFoundException(f"Team {school} on date {game_date} could not be found")
+        cube = self._get_cube(game_date)
+        if cube is not None and cube.is_exact(dimension):
+            value = cube.get_value(team_id(school), game_date, dimension)
+        else:
+            item = self._get_snapshot(fpath_prefix, game_date).get_row(school)
+            value = item[dimension] if item is not None else None
+        if value is not None:
+            return value
+        raise TeamNotFoundException(f"Team {teamrankings_name(team_id(school))} on date {game_date} could not be found")
+
+    def _get_geotime_factor_batch(self, games, valid, ids, away_points, home_points):
+        """
+        Array version of get_geotime_factor(), using the precomputed geo table.
+        Applies the same adjustments in the same order to every valid,
+        non-neutral-site game (other games get an adjustment of 0).
+
+        ids is an (n, 2) array of (away, home) team ids.
+        """
+        geo = get_geo_table()
+        n = len(games)
+
+        # Skip neutral site games, assume both teams equally affected
+        neutral = np.array([bool(game_parameters['neutral_site']) for game_parameters in games], dtype=bool)
+        apply = valid & ~neutral
+        a, h = ids[:, 0], ids[:, 1]
+
+        dist = geo.miles[a, h].astype(float)
+        same_conf = geo.same_conference[a, h]
+        away_conf = geo.conferences[a]
+
+        # Travel distance factors
+        adj = np.where(apply & (dist > LARGE_DISTANCE), self.large_distance_modifier/2, 0.0)
+        away_points = away_points - adj
+        home_points = home_points + adj
+
+        # In/out conference factors
+        in_conf_modifier  = np.full(n, float(self.in_conference_modifier))
+        out_conf_modifier = np.full(n, float(self.out_conference_modifier))
+
+        exaggerated = np.isin(away_conf, EXAGGERATED_CONFERENCES)
+        in_conf_modifier  = np.where(exaggerated, 3*in_conf_modifier, in_conf_modifier)
+        out_conf_modifier = np.where(exaggerated, 3*out_conf_modifier, out_conf_modifier)
+
+        zeroed = np.isin(away_conf, ZEROED_CONFERENCES)
+        in_conf_modifier  = np.where(zeroed, 0.0, in_conf_modifier)
+        out_conf_modifier = np.where(zeroed, 0.0, out_conf_modifier)
+
+        local = dist <= LOCAL_RIVALRY_DIST
+        in_adj  = np.where(local, 2*(in_conf_modifier/2), in_conf_modifier/2)
+        out_adj = np.where(local, out_conf_modifier/2, 2*(out_conf_modifier/2))
+        in_adj  = np.where(apply & same_conf, in_adj, 0.0)
+        out_adj = np.where(apply & ~same_conf, out_adj, 0.0)
+
+        away_points = away_points + in_adj
+        home_points = home_points - in_adj
+        away_points = away_points - out_adj
+        home_points = home_points + out_adj
+
+        # Time zone factors
+        offset_diff = (np.abs(geo.utc_offsets[a])-5) - (np.abs(geo.utc_offsets[h])-5)
+        tz_adj = np.where(offset_diff > 0, offset_diff*self.offset_modifier/2, -1*offset_diff*self.offset_modifier/4)
+        tz_adj = np.where(apply, tz_adj, 0.0)
+
+        away_points = away_points - tz_adj
+        home_points = home_points + tz_adj
+
+        return (away_points, home_points)
 
     def _get_pct_adjustment(self, school_val, avg_val):
         """Return the tempo % adjustment for this school"""
@@ -492,15 +940,13 @@ class KenpomNCAABModel(NCAABModel):
         fpath = os.path.join(jdatadir, fname)
         return fpath
 
-    def _get_school_template_func(self, game_parameters, school, fpath_prefix, dimension):
-        game_date = game_parameters['game_date'].replace("-", "")
-        with open(self._get_fpath_json(fpath_prefix, game_date), 'r') as f:
-            dat = json.load(f)
-        for item in dat:
-            if item[f'team_name']==school:
-                if item[dimension] is not None:
-                    return item[dimension]
-        raise TeamNotFoundException(f"Team {school} on date {game_date} could not be found")
+    def _get_team_key(self, prefix):
+        """Get the name of the team name column in the kenpom JSON file"""
+        return 'team_name'
+
+    def _get_cube(self, stamp):
+        """Kenpom data is not in the season stat cube"""
+        return None
 
     def get_avg_tempo(self, game_date):
         """Return the average tempo for entire league"""
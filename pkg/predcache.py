@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+
+
+"""
+Persistent cache of model predictions, for incremental backtests
+
+Predictions are stored in one file per model fingerprint
+(see ModelBase.get_fingerprint()), grouped by game date.
+Each date is stored with a hash of the contents of the stat
+files the model read for that date, so a re-scraped stat file
+invalidates just that date. Re-running a backtest with an
+unchanged model only computes predictions for new games.
+"""
+
+
+class PredictionCache(object):
+    """
+    Cached (away_points, home_points) predictions for one model fingerprint,
+    keyed by game date, then by game key (see get_game_key()).
+    """
+    def __init__(self, cache_dir, fingerprint):
+        self.fingerprint = fingerprint
+        self.fpath = os.path.join(cache_dir, f"predictions_{fingerprint}.json")
+        self.dates = {}
+        self.modified = False
+        try:
+            with open(self.fpath, 'r') as f:
+                self.dates = json.load(f)
+        except FileNotFoundError:
+            pass
+        except json.decoder.JSONDecodeError:
+            print(f"Invalid prediction cache file at {self.fpath}, ignoring it")
+
+    @staticmethod
+    def hash_inputs(fpaths):
+        """Hash the contents of a list of input files (missing files are fine)"""
+        h = hashlib.sha1()
+        for fpath in fpaths:
+            h.update(fpath.encode('utf-8'))
+            try:
+                with open(fpath, 'rb') as f:
+                    h.update(f.read())
+            except FileNotFoundError:
+                h.update(b"missing")
+        return h.hexdigest()
+
+    @staticmethod
+    def get_game_key(game, game_params):
+        """Key for a game: the values of all the game parameters the model uses"""
+        return "|".join(str(game.get(k)) for k in game_params)
+
+    def get_date(self, date, inputs_hash):
+        """
+        Return the dict of {game key: [away_points, home_points]}
+        cached for this date, or an empty dict if there is nothing
+        cached or the input files have changed since.
+        """
+        entry = self.dates.get(date)
+        if entry is None or entry['inputs']!=inputs_hash:
+            return {}
+        return entry['games']
+
+    def put_date(self, date, inputs_hash, games):
+        """Add predictions to the cache for this date, replacing any stale ones"""
+        entry = self.dates.get(date)
+        if entry is None or entry['inputs']!=inputs_hash:
+            entry = {'inputs': inputs_hash, 'games': {}}
+            self.dates[date] = entry
+        entry['games'].update(games)
+        self.modified = True
+
+    def save(self):
+        """Write the cache to disk (atomically), if anything changed"""
+        if not self.modified:
+            return
+        cache_dir = os.path.dirname(self.fpath)
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        tmp_fpath = self.fpath + ".tmp"
+        with open(tmp_fpath, 'w') as f:
+            json.dump(self.dates, f)
+        os.replace(tmp_fpath, self.fpath)
+        self.modified = False
@@ -0,0 +1,49 @@
+import time
+import threading
+from urllib.parse import urlsplit
+
+
+"""
+Per-host rate limiting for the web scrapers
+
+Instead of sleeping after every request, each request waits
+for its turn at the host it is going to. Requests to a host are
+spaced out evenly, no matter how many threads are making them.
+"""
+
+
+# Default max number of requests per second to any one host
+REQUESTS_PER_SECOND = 4.0
+
+
+class HostRateLimiter(object):
+    """Spaces out the start of requests to each host by 1/requests_per_second"""
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND):
+        self.interval = 1.0/requests_per_second
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until it is our turn to make a request to the host in url"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            t = max(now, self._next.get(host, now))
+            self._next[host] = t + self.interval
+        if t > now:
+            time.sleep(t - now)
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(requests_per_second=REQUESTS_PER_SECOND):
+    """Return the process-wide HostRateLimiter (shared by every scraper and thread)"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = HostRateLimiter(requests_per_second)
+        else:
+            _rate_limiter.interval = 1.0/requests_per_second
+        return _rate_limiter
@@ -0,0 +1,173 @@
+import os
+import simplejson as json
+from datetime import datetime
+
+from .games import GameRecord
+from .metrics import ResultColumns, MetricsAccumulator, GROUP_BYS
+
+
+"""
+Streaming backtest results
+
+Backtests write each game's result to a JSONL file (one JSON
+object per line) as soon as it is predicted. The summary metrics
+only keep running sums for each group of games (see
+MetricsAccumulator in pkg/metrics.py), so memory use stays
+small for long backtests.
+"""
+
+
+# Number of results the summary collects before adding them to its running sums
+SUMMARY_BATCH_GAMES = 1000
+
+
+class JsonlResultWriter(object):
+    """
+    Writes results (GameRecords) to a JSONL file, one per line, as they are produced.
+    The file is written under a temporary name, and only moved into place
+    once it is closed with at least one result in it.
+    Use as a context manager.
+    """
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self.tmp_fpath = f"{fpath}.{os.getpid()}.tmp"
+        self.count = 0
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.tmp_fpath, 'w')
+        return self
+
+    def write(self, game):
+        self.f.write(json.dumps(game.to_json(), ignore_nan=True) + "\n")
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self.f.close()
+        if exc_type is None and self.count>0:
+            os.replace(self.tmp_fpath, self.fpath)
+        else:
+            os.remove(self.tmp_fpath)
+        return False
+
+
+def read_results(fpath):
+    """Iterate over the results (as GameRecords) in a JSONL results file"""
+    with open(fpath, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield GameRecord.from_json(json.loads(line))
+
+
+class BacktestSummary(object):
+    """
+    Backtest summary: collects the results a batch of games at a time
+    (as columns, see pkg/metrics.py), and keeps running sums of the
+    metrics (spread, over/under, and moneyline vs Vegas, overall and
+    by conference, team, date, etc.) instead of the games themselves
+    """
+    def __init__(self, group_bys=GROUP_BYS):
+        self.n_games = 0
+        self.n_results = 0
+        self.accumulator = MetricsAccumulator(group_bys)
+        self.batch = ResultColumns()
+        self.metrics = None
+
+    def add_games(self, n):
+        """Count games in the schedule (whether or not they were predicted)"""
+        self.n_games += n
+
+    def add_result(self, game):
+        """Add one predicted game (GameRecord) to the summary"""
+        self.batch.append(game)
+        self.n_results += 1
+        self.metrics = None
+        if len(self.batch) >= SUMMARY_BATCH_GAMES:
+            self._add_batch()
+
+    def _add_batch(self):
+        self.accumulator.add(self.batch)
+        self.batch = ResultColumns()
+
+    def get_metrics(self):
+        """Return the BacktestMetrics for the results added so far"""
+        if self.metrics is None:
+            self._add_batch()
+            self.metrics = self.accumulator.get_metrics()
+        return self.metrics
+
+    def print_summary(self, test_name, start_date, end_date, teams):
+        """Print the summary table"""
+        print("")
+        print("")
+        print("\t==================================================")
+        print(f"\tModel Backtest Summary: {test_name}")
+        print("\t==================================================")
+
+        print(f"\tTest name:\t\t{test_name}")
+
+        # Start date
+        print(f"\tStart date:\t\t{start_date}")
+
+        # End date
+        print(f"\tEnd date:\t\t{end_date}")
+
+        # Number of days
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        ndays = (end-start).days
+        print(f"\tN days:\t\t\t{ndays}")
+
+        # Number of games
+        print(f"\tN games total:\t\t{self.n_games}")
+        print(f"\tN games analyzed:\t{self.n_results}")
+
+        # Teams
+        if len(teams)>0:
+            tms = ", ".join(sorted(list(set(teams))))
+        else:
+            tms = "(all)"
+        print(f"\tTeams:\t\t\t{tms}")
+
+        metrics = self.get_metrics()
+        m = metrics.overall
+
+        if m.n_spread>0:
+            # Model Spread RMSE
+            print(f"\tModel Spread RMSE:\t{round(m.rmse,1)}")
+
+            # Vegas Spread RMSE
+            print(f"\tVegas Spread RMSE:\t{round(m.vegas_rmse,1)}")
+
+            # Total games played vs Vegas
+            print(f"\tN games vs Vegas:\t{m.wins + m.losses}")
+
+            # Model Spread W-L vs Vegas
+            print(f"\tW-L vs Vegas:\t\t{m.wins} - {m.losses}")
+
+            # Win Pct vs Vegas
+            print(f"\tW-L% vs Vegas:\t\t{round(m.win_pct, 1)}%")
+
+            # Best and worst one-day W-L
+            for label, (date, day) in [("Best 1-day W-L:\t", metrics.best_day()), ("Worst 1-day W-L:", metrics.worst_day())]:
+                if day is None:
+                    print(f"\t{label}\t0 - 0 (0%)")
+                else:
+                    print(f"\t{label}\t{day.wins} - {day.losses} ({int(day.win_pct)}%)")
+
+            # ROI vs Vegas (assuming -110 odds for every bet)
+            print(f"\tROI vs Vegas (-110):\t{round(m.roi,1)}%")
+
+        if m.ou_wins + m.ou_losses>0:
+            # Over/under, betting the side of the Vegas total our total is on
+            print(f"\tO/U W-L vs Vegas:\t{m.ou_wins} - {m.ou_losses} ({round(m.ou_win_pct, 1)}%)")
+            print(f"\tO/U ROI (-110):\t\t{round(m.ou_roi,1)}%")
+
+        if m.ml_bets>0:
+            # Moneyline, betting the team we predict to win
+            print(f"\tML W-L:\t\t\t{m.ml_wins} - {m.ml_losses} ({round(m.ml_win_pct, 1)}%)")
+            print(f"\tML ROI:\t\t\t{round(m.ml_roi,1)}%")
+
+        # Table is complete
+        print("")
+        print("")
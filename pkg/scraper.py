@@ -2,13 +2,50 @@ import os
 import re
 import json
 import time
+import threading
 from datetime import datetime, timedelta
-import requests
-from selenium import webdriver
-from bs4 import BeautifulSoup
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
-from .errors import TeamRankingsParseError
-from .teams import kenpom2donch, donch2teamrankings
+from .browser import get_browser_pool, BROWSER_POOL_SIZE
+from .httpclient import get_http_client
+from .ratelimit import get_rate_limiter, REQUESTS_PER_SECOND
+from .archive import get_html_archive
+from .htmltables import extract_tables
+from . import jobqueue
+from .jobqueue import get_job_queue
+from .errors import TeamRankingsParseError, ArchivedPageNotFound
+from .teams import team_id, teamrankings_name
+from .utils import dump_json_atomic
+
+
+# Number of games to fetch outcome/odds pages for at once
+# (requests are still rate limited per host)
+SCRAPER_WORKERS = 8
+
+# Number of scrape jobs to run at once (see drain_scrape_jobs)
+SCRAPE_JOB_WORKERS = 4
+
+# Number of tries for each scrape job run during a backtest
+# (see drain_scrape_jobs). A page that keeps failing is skipped
+# instead of holding up the backtest through minutes of backoff;
+# drivers/backfill.py retries it with backoff (see pkg/jobqueue.py)
+INLINE_SCRAPE_ATTEMPTS = 1
+
+# Seconds between checks for new scrape jobs, while waiting on retries or other workers
+SCRAPE_JOB_POLL = 1.0
+
+# Seconds between scrape progress reports
+SCRAPE_PROGRESS_INTERVAL = 10.0
+
+
+def get_journal_fpath(fpath):
+    """
+    Get the path of the journal for a schedule JSON file.
+    The journal only exists while the schedule is being scraped,
+    so a schedule file with no journal is complete.
+    """
+    return os.path.splitext(fpath)[0] + ".journal.jsonl"
 
 
 class TeamRankingsDataScraper(object):
@@ -25,6 +62,9 @@ class TeamRankingsDataScraper(object):
     }
     data_subdir = 'teamrankings'
 
+    # CSS selector for the table we scrape (page is loaded once this appears)
+    page_ready_selector = "table.datatable"
+
     def __init__(self, model_parameters):
         self.model_parameters = model_parameters
         self.trdir = os.path.join(self.model_parameters['data_directory'], self.data_subdir)
@@ -38,6 +78,14 @@ class TeamRankingsDataScraper(object):
         # Verbosity
         self.nohush = not ('quiet' in self.model_parameters and self.model_parameters['quiet'] is True)
 
+        # Raw HTML archive (offline mode reads pages from it, instead of the web)
+        self.archive = get_html_archive(self.model_parameters['data_directory'])
+        self.archive_html = self.model_parameters.get('archive_html', True)
+        self.offline = self.model_parameters.get('offline', False) is True
+
+        # Fetch pages from this server instead of the real sites (e.g. a fixture server)
+        self.base_url = self.model_parameters.get('base_url', None)
+
     def _get_fpath_json(self, prefix, stamp):
         """
         Get the filename + path of the JSON file where we are
@@ -50,6 +98,45 @@ class TeamRankingsDataScraper(object):
         fpath = os.path.join(self.jdatadir, fname)
         return fpath
 
+    def _get_page(self, url):
+        """
+        Get the HTML source of a page from the web, and add it to the
+        raw HTML archive. In offline mode, get it from the archive instead.
+        """
+        if self.offline:
+            return self._get_page_archived(url)
+        src = self._get_page_html(self._get_fetch_url(url))
+        if self.archive_html:
+            self.archive.put(url, src)
+        return src
+
+    def _get_fetch_url(self, url):
+        """
+        Get the URL to actually fetch a page from. If the base_url model
+        parameter is set (e.g. to a fixture server, see pkg/fixtures.py),
+        https://host/path?query becomes base_url/host/path?query
+        """
+        if self.base_url is None:
+            return url
+        parts = urlsplit(url)
+        fetch_url = self.base_url.rstrip("/") + "/" + parts.netloc + parts.path
+        if parts.query:
+            fetch_url += "?" + parts.query
+        return fetch_url
+
+    def _get_page_archived(self, url):
+        """
+        Get the most recent copy of a page from the raw HTML archive.
+        A URL for a specific date (?date=YYYY-MM-DD) also matches the
+        page without a date that was fetched on that date.
+        Raises ArchivedPageNotFound if it is not in the archive
+        (rather than parsing an empty page, and losing its data).
+        """
+        src = self.archive.find(url)
+        if src is None:
+            raise ArchivedPageNotFound(f"Page {url} is not in the archive")
+        return src
+
     def _get_page_html(self, url):
         # If we try to use requests, none of the tables load, and all data is None
         return self._get_page_html_selenium(url)
@@ -59,47 +146,29 @@ class TeamRankingsDataScraper(object):
         Use requests to fetch the url,
         then return the HTML source of the loaded page.
         (This is much faster than using Selenium, so use it when possible)
+        Uses the shared HTTP client (see pkg/httpclient.py), which is
+        rate limited per host and skips re-downloading unchanged pages.
         """
-        resp = requests.get(url)
-        time.sleep(1)
-        src = resp.content
-        return src
+        return get_http_client(self.model_parameters).get(url)
 
     def _get_page_html_selenium(self, url):
         """
-        Use Selenium webdriver to fetch the url,
-        then return the HTML source of the loaded page.
+        Use a (pooled, already running) Selenium webdriver to fetch
+        the url, wait for the data table to render, then return
+        the HTML source of the loaded page.
         (This is extremely slow, only use if absolutely necessary)
         """
-        ffopt = webdriver.FirefoxOptions()
-        ffopt.add_argument("--headless")
-        ffopt.set_preference("general.useragent.override", "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.1")
-        browser = webdriver.Firefox(options=ffopt)
-        browser.set_page_load_timeout(4)
-
-        try:
-            browser.get(url)
-            time.sleep(2)
-        except:
-            pass
-
-        src = browser.page_source
-
-        try:
-            browser.close()
-        except:
-            pass
-
-        return src
+        size = self.model_parameters.get('browser_pool_size', BROWSER_POOL_SIZE)
+        get_rate_limiter(self.model_parameters.get('requests_per_second', REQUESTS_PER_SECOND)).wait(url)
+        return get_browser_pool(size).get_page_html(url, self.page_ready_selector)
 
     def _get_datatable(self, html):
-        """Get the main DataTables table. Useful b/c we never need the soup otherwise."""
-        soup = BeautifulSoup(html, 'html.parser')
-        #table = soup.find('table', attrs={"id": "DataTables_Table_0"})
-        table = soup.find('table', attrs={"class": "datatable"})
-        if table is None:
+        """Get the main DataTables table (the only part of the page we parse)."""
+        #page = extract_tables(html, "table#DataTables_Table_0", limit=1)
+        page = extract_tables(html, "table.datatable", limit=1)
+        if len(page.tables)==0:
             raise TeamRankingsParseError("Data table cannot be found on page")
-        return table
+        return page.tables[0]
 
     def _html2json(self, html, prefix):
         """Extract data from HTML and send to JSON."""
@@ -107,18 +176,18 @@ class TeamRankingsDataScraper(object):
 
         # Extract column headers, adding the prefix to each
         headers = []
-        header_row = table.find('thead').find('tr')
-        column_headers = header_row.find_all('th')
+        header_row = table.find_rows('thead')[0]
+        column_headers = header_row.find_cells('th')
         for column_header in column_headers:
             header = prefix + "_" + column_header.text.lower().replace(' ','_')
             headers.append(header)
 
         ranking = []
 
-        table_rows = table.find('tbody').find_all('tr')
+        table_rows = table.find_rows('tbody')
         for row in table_rows:
             item = {}
-            cols = row.find_all('td')
+            cols = row.find_cells('td')
             for j, (header, col) in enumerate(zip(headers, cols)):
                 if j==0:
                     # Column 0 is always an integer rank
@@ -136,34 +205,59 @@ class TeamRankingsDataScraper(object):
 
         return ranking
 
-    def fetch_all(self, game_date_dashes, force=False):
+    def _get_stats_date(self, game_date_dashes):
         """
-        For the given date, download corresponding HTML pages with team data,
-        scrape the team data from the page, and export to JSON file.
+        If we are requesting predictions for tomorrow, it will
+        nominally ask for stats from tomorrow. Use today's date instead.
         """
         dt = datetime.strptime(game_date_dashes, "%Y-%m-%d")
         t = datetime.now()
-        # If we are requesting predictions for tomorrow, it will
-        # nominally ask for stats from tomorrow. Use today's date instead.
         if dt > t:
-            game_date_dashes = t.strftime("%Y-%m-%d")
+            return t.strftime("%Y-%m-%d")
+        return game_date_dashes
+
+    def get_missing_pages(self, dates):
+        """
+        Plan which pages need to be scraped for a list of dates.
+        Returns a list of (stat name, date) pairs with no JSON file yet.
+        """
+        pages = []
+        for game_date_dashes in dates:
+            game_date_dashes = self._get_stats_date(game_date_dashes)
+            for k in self.urls.keys():
+                page = (k, game_date_dashes)
+                fpath = self._get_fpath_json(k, game_date_dashes.replace("-", ""))
+                if not os.path.exists(fpath) and page not in pages:
+                    pages.append(page)
+        return pages
 
-        game_date_nodashes = game_date_dashes.replace("-", "")
+    def fetch_all(self, game_date_dashes, force=False):
+        """
+        For the given date, download corresponding HTML pages with team data,
+        scrape the team data from the page, and export to JSON file.
+        """
         for k in self.urls.keys():
-            fpath = self._get_fpath_json(k, game_date_nodashes)
-            if (force is True) or (os.path.exists(fpath) is False):
+            self.fetch_page(k, game_date_dashes, force=force)
 
-                url = self.urls[k]
-                if game_date_dashes != datetime.now().strftime("%Y-%m-%d"):
-                    url += f"?date={game_date_dashes}"
+    def fetch_page(self, k, game_date_dashes, force=False):
+        """
+        Download the HTML page for one stat (k) on the given date,
+        scrape the team data from the page, and export to JSON file.
+        """
+        game_date_dashes = self._get_stats_date(game_date_dashes)
+        fpath = self._get_fpath_json(k, game_date_dashes.replace("-", ""))
+        if (force is True) or (os.path.exists(fpath) is False):
 
-                this_src = self._get_page_html(url)
-                this_json = self._html2json(this_src, k)
+            url = self.urls[k]
+            if game_date_dashes != datetime.now().strftime("%Y-%m-%d"):
+                url += f"?date={game_date_dashes}"
 
-                if self.nohush:
-                    print(f"Dumping TeamRankings team data to {fpath}")
-                with open(fpath, 'w') as f:
-                    json.dump(this_json, f)
+            this_src = self._get_page(url)
+            this_json = self._html2json(this_src, k)
+
+            if self.nohush:
+                print(f"Dumping TeamRankings team data to {fpath}")
+            dump_json_atomic(fpath, this_json)
 
 
 class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
@@ -188,7 +282,7 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
 
         schedule = []
 
-        table_rows = table.find('tbody').find_all('tr')
+        table_rows = table.find_rows('tbody')
 
         if len(table_rows)==0 or "No data available" in table_rows[0].text:
             msg = "No data found on schedule page, specified date may be invalid"
@@ -199,7 +293,7 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
         for row in table_rows:
             add_game = True
             game = {}
-            cols = row.find_all('td')
+            cols = row.find_cells('td')
             for j, col in enumerate(cols):
                 # col 1 = irrelevant rank
                 # col 2 = hotness
@@ -208,13 +302,12 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
                 # col 5 = location
                 if j==2:
                     # matchup name, plus link
-                    try:
-                        link = "https://teamrankings.com" + col.find('a').attrs['href']
-                    except AttributeError:
+                    if len(col.links)==0:
                         # Game does not have link, skip it
                         add_game = False
                         break
-                    text = col.find('a').text
+                    href, text = col.links[0]
+                    link = "https://teamrankings.com" + href
                     is_neutral = False
                     try:
                         # Match "A at B"
@@ -243,22 +336,13 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
         # This does not save the JSON to a file, only returns it
         return schedule
 
-    def _get_movementtable(self, soup):
-        """Get the main movement table on odds pages. Useful b/c we never need the soup otherwise."""
-        table = soup.find('table', attrs={"class": "movement-table"})
-        if table is None:
-            raise TeamRankingsParseError("Odds table cannot be found on game page")
-        return table
-
-    def _get_team_abbrs_matchup_menu(self, soup):
+    def _get_team_abbrs_matchup_menu(self, page):
         """
-        Get team abbreviations from header text.
+        Get team abbreviations from header (h2) text.
         Example: "Matchup Menu: TEX @ OSU"
         """
         away_abbr, home_abbr = None, None
-        h2s = soup.find_all('h2')
-        for h2 in h2s:
-            txt = h2.text
+        for txt in page.texts:
             if "Matchup Menu" in txt:
                 versus = txt.split(":")[1]
                 teams = versus.split(" @ ")
@@ -267,17 +351,16 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
         return away_abbr, home_abbr
 
     def _html2json_g(self, html):
-        soup = BeautifulSoup(html, 'html.parser')
+        page = extract_tables(html, "table.matchup-table")
 
         away_score, home_score = None, None
-        tables = soup.find_all('table', attrs={'class': 'matchup-table'})
-        for table in tables:
-            header1 = table.find('tr').find('th')
+        for table in page.tables:
+            header1 = table.rows[0].find_cells('th')[0]
             if "Final Score" in header1.text:
-                rows = table.find('tbody').find_all('tr')
+                rows = table.find_rows('tbody')
                 away_row, home_row = rows[0], rows[1]
 
-                away_cols, home_cols = away_row.find_all('td'), home_row.find_all('td')
+                away_cols, home_cols = away_row.find_cells('td'), home_row.find_cells('td')
                 try:
                     away_score = int(away_cols[3].text)
                     home_score = int(home_cols[3].text)
@@ -292,22 +375,23 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
 
     def _html2json_ml(self, html):
         """Extract moneyline odds data from HTML, and send to JSON"""
-        soup = BeautifulSoup(html, 'html.parser')
-        away_abbr, home_abbr = self._get_team_abbrs_matchup_menu(soup)
+        labs = ['tab-001', 'tab-002']
+        page = extract_tables(html, ", ".join(f"div#{lab} table" for lab in labs), text_tag='h2')
+        away_abbr, home_abbr = self._get_team_abbrs_matchup_menu(page)
 
         odds = {}
 
         away_ml, home_ml = None, None
-        for lab in ['tab-001', 'tab-002']:
-            div = soup.find('div', attrs={'id': lab})
-            try:
-                table = div.find('table')
-            except AttributeError:
+        for k, lab in enumerate(labs):
+            # First table in each tab
+            tables = [table for table in page.tables if table.selector==k]
+            if len(tables)==0:
                 msg = "Could not find moneyline odds table"
                 raise TeamRankingsParseError(msg)
+            table = tables[0]
+
+            cells = table.find_rows('tbody')[0].find_cells('td')
 
-            cells = table.find('tbody').find('tr').find_all('td')
-            
             current, opening_ml = cells[0].text, cells[2].text
             k, current_ml = current.split(" ")
 
@@ -322,14 +406,12 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
 
     def _html2json_sp(self, html):
         """Extract spread odds data from HTML, and send to JSON"""
-        soup = BeautifulSoup(html, 'html.parser')
-        away_abbr, home_abbr = self._get_team_abbrs_matchup_menu(soup)
-
-        table = soup.find('table', attrs={"class": "movement-table"})
+        page = extract_tables(html, "table.movement-table", text_tag='h2')
+        away_abbr, home_abbr = self._get_team_abbrs_matchup_menu(page)
 
         try:
-            cells = table.find('tr').find_all('td')
-        except AttributeError:
+            cells = page.tables[0].rows[0].find_cells('td')
+        except IndexError:
             msg = "Could not find spread odds table"
             raise TeamRankingsParseError(msg)
 
@@ -358,13 +440,12 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
 
     def _html2json_ou(self, html):
         """Extract o/u odds data from HTML, and send to JSON"""
-        soup = BeautifulSoup(html, 'html.parser')
-        away_abbr, home_abbr = self._get_team_abbrs_matchup_menu(soup)
+        page = extract_tables(html, "table.movement-table", text_tag='h2')
+        away_abbr, home_abbr = self._get_team_abbrs_matchup_menu(page)
 
-        table = soup.find('table', attrs={"class": "movement-table"})
         try:
-            cells = table.find('tr').find_all('td')
-        except AttributeError:
+            cells = page.tables[0].rows[0].find_cells('td')
+        except IndexError:
             msg = "Could not find over/under odds table"
             raise TeamRankingsParseError(msg)
 
@@ -377,42 +458,176 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
         odds['vegas_ou_total']   = round(current_ou, 1)
         return odds
 
-    def fetch_all(self, game_date_dashes, force=False):
+    def _fetch_game(self, game, todtom):
         """
-        For the given date, download corresponding HTML pages with schedule data,
-        scrape the schedule data from the page, and export to JSON file.
+        Get the outcome (unless today/tomorrow) and odds data for one game.
+        Returns a dict of new keys for the game dict. Raises
+        TeamRankingsParseError if the game outcome could not be found.
+        (This runs in a worker thread, so it does not modify game.)
+        """
+        game_descr = f"{game['away_team']} @ {game['home_team']} ({game['game_date']})"
+
+        game_url = game['game_url']
+
+        game_json = {}
+
+        # -------------
+        # a) Results
+        # If today/tomorrow game, no need to get game outcome
+        if not todtom:
+            if self.nohush:
+                print(f"Retrieving TeamRankings.com outcome data for {game_descr}")
+
+            # Get the game page, to get the final score
+            g_src = self._get_page(game_url)
+
+            try:
+                g_json = self._html2json_g(g_src)
+            except TeamRankingsParseError as e:
+                # Could not find outcome of game: fail, so the caller can retry
+                # (or save the game without an outcome, see _get_no_outcome_json())
+                raise TeamRankingsParseError(f"Could not find outcome of game {game_descr}: {e}")
+
+            # Game outcome gets copied directly into game dict
+            game_json.update(g_json)
+
+        # -------------
+        # b) Odds
+
+        if self.nohush:
+            print(f"Retrieving TeamRankings.com odds data for {game_descr}")
+
+        # Now get each odds page
+        try:
+            ml_src = self._get_page(game_url + "/money-line-movement")
+            ml_json = self._html2json_ml(ml_src)
+        except TeamRankingsParseError:
+            ml_json = {}
+
+        try:
+            sp_src = self._get_page(game_url + "/spread-movement")
+            sp_json = self._html2json_sp(sp_src)
+        except TeamRankingsParseError:
+            sp_json = {}
+
+        try:
+            ou_src = self._get_page(game_url + "/over-under-movement")
+            ou_json = self._html2json_ou(ou_src)
+        except TeamRankingsParseError:
+            ou_json = {}
+
+        # Game odds get copied into "odds" sub-dict
+        game_json['odds'] = {}
+        game_json['odds']['moneyline'] = ml_json
+        game_json['odds']['spread']    = sp_json
+        game_json['odds']['ou']        = ou_json
+
+        return game_json
+
+    def _get_no_outcome_json(self):
+        """
+        New keys for a game whose outcome could not be scraped:
+        no outcome and no odds (so it is not predicted or scored)
+        """
+        game_json = {'away_score': None, 'home_score': None}
+        game_json['odds'] = {'moneyline': {}, 'spread': {}, 'ou': {}}
+        return game_json
+
+    def _get_schedule_url(self, game_date_dashes):
+        url = self.urls["trschedule"]
+        if game_date_dashes != datetime.now().strftime("%Y-%m-%d"):
+            url += f"?date={game_date_dashes}"
+        return url
+
+    def _get_schedule_prefix(self, game_date_dashes):
+        """
+        Get the file prefix for a date's schedule data:
+        todtom if we are requesting sched data for today/tomorrow
+        (we won't have outcomes, and sched data goes in a different file),
+        otherwise trschedule.
+        (the name must match backtester _get_schedule_fpath_json())
+
+        In offline mode, "today" is the day the archived schedule page
+        was fetched, so re-parsing gives the same file as the original scrape.
         """
         dt = datetime.strptime(game_date_dashes, "%Y-%m-%d")
         y = datetime.now() - timedelta(days=1)
-
-        # If we are requesting sched data for today/tomorrow,
-        # we won't have outcomes, and sched data goes in a different file
-        todtom = False
+        if self.offline:
+            entry = self.archive.find_entry(self._get_schedule_url(game_date_dashes))
+            if entry is not None:
+                y = datetime.strptime(entry['fetch_date'], "%Y-%m-%d") - timedelta(days=1)
         if dt > y:
-            todtom = True
+            # This is the prefix used for game data when we don't yet know the outcome (fwdtest)
+            return "todtom"
+        # This is the prefix used for game data when we know the outcome (backtest)
+        return "trschedule"
 
-        game_date_nodashes = game_date_dashes.replace("-", "")
+    def fetch_all(self, game_date_dashes, force=False):
+        """
+        For the given date, download corresponding HTML pages with schedule data,
+        scrape the schedule data from the page, and export to JSON file.
+        """
+        k = self._get_schedule_prefix(game_date_dashes)
+        todtom = (k=="todtom")
+        fpath = self._get_fpath_json(k, game_date_dashes.replace("-", ""))
+        journal_fpath = get_journal_fpath(fpath)
 
         # ----------------------
         # Step 1: Get daily schedule, compile game info plus links to each game
-        # (the name below must match backtester _get_schedule_fpath_json())
-        if todtom:
-            # This is the prefix used for game data when we don't yet know the outcome (fwdtest)
-            k = "todtom"
-        else:
-            # This is the prefix used for game data when we know the outcome (backtest)
-            k = "trschedule"
-        fpath = self._get_fpath_json(k, game_date_nodashes)
+        sched_json = self._start_schedule(game_date_dashes, force=force)
+
+        # ----------------------
+        # Step 2: Gather results and odds for each game (requires visiting multiple links)
+        # Games are fetched concurrently; each game dict is updated in place, so order is kept
+        todo = [i for i, game in enumerate(sched_json) if 'odds' not in game.keys()]
+        workers = self.model_parameters.get('scraper_workers', SCRAPER_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self._fetch_game, sched_json[i], todtom): i for i in todo}
+            for future in as_completed(futures):
+                try:
+                    game_json = future.result()
+                except TeamRankingsParseError as e:
+                    # Keep the rest of the day's games
+                    print(f"{e}, saving the game without outcome or odds data")
+                    game_json = self._get_no_outcome_json()
+                i = futures[future]
+                sched_json[i].update(game_json)
+
+                # Append each game's new data to the journal, so an interrupted scrape can resume
+                self._append_journal(journal_fpath, {'index': i, 'game': game_json})
+
+        # ----------------------
+        # Step 3: Compact the journal into the final schedule file (game info plus odds data)
+        self._compact_journal(fpath, sched_json)
+
+    def _start_schedule(self, game_date_dashes, force=False):
+        """
+        Get the schedule for a date (games, plus any outcome/odds data we already have):
+        resume from the journal if there is one, load the schedule file if there
+        is one, otherwise scrape the schedule page. Starts a journal if any
+        games still need outcome/odds data.
+        """
+        k = self._get_schedule_prefix(game_date_dashes)
+        fpath = self._get_fpath_json(k, game_date_dashes.replace("-", ""))
+        journal_fpath = get_journal_fpath(fpath)
+
+        if force is True and os.path.exists(journal_fpath):
+            os.remove(journal_fpath)
+
+        if os.path.exists(journal_fpath):
+            # Resume an interrupted scrape from the journal
+            if self.nohush:
+                print(f"Resuming TeamRankings.com schedule scrape for {game_date_dashes} from {journal_fpath}")
+            return self._read_journal(journal_fpath)
+
         if (force is True) or (os.path.exists(fpath) is False):
-            url = self.urls[k]
-            if game_date_dashes != datetime.now().strftime("%Y-%m-%d"):
-                url += f"?date={game_date_dashes}"
+            url = self._get_schedule_url(game_date_dashes)
 
             if self.nohush:
                 print(f"Retrieving TeamRankings.com daily schedule for {game_date_dashes}")
 
             try:
-                sched_src = self._get_page_html(url)
+                sched_src = self._get_page(url)
                 sched_json = self._html2json_sched(sched_src)
                 for game in sched_json:
                     game['game_date'] = game_date_dashes
@@ -421,89 +636,70 @@ class TeamRankingsScheduleScraper(TeamRankingsDataScraper):
                 sched_json = []
 
             # Don't export schedule to JSON file yet, first get odds data
+            self._start_journal(journal_fpath, sched_json)
 
         else:
             # Load existing schedule data
             with open(fpath, 'r') as f:
                 sched_json = json.load(f)
 
-        # ----------------------
-        # Step 2: Gather results and odds for each game (requires visiting multiple links)
-        for game in sched_json:
-            if 'odds' in game.keys():
-                # Game already has odds data in it, so skip
-                continue
-
-            game_descr = f"{game['away_team']} @ {game['home_team']} ({game['game_date']})"
+            if any('odds' not in game.keys() for game in sched_json):
+                self._start_journal(journal_fpath, sched_json)
 
-            game_url = game['game_url']
-
-            # -------------
-            # 2a) Results
-            # If today/tomorrow game, no need to get game outcome
-            if not todtom:
-                if self.nohush:
-                    print(f"Retrieving TeamRankings.com outcome data for {game_descr}")
-
-                # Get the game page, to get the final score
-                g_src = self._get_page_html(game_url)
+        return sched_json
 
+    def _compact_journal(self, fpath, sched_json=None):
+        """
+        Write the final schedule file (game info plus odds data) from the
+        journal, if there is one, then remove the journal.
+        """
+        journal_fpath = get_journal_fpath(fpath)
+        if not os.path.exists(journal_fpath):
+            return
+        if sched_json is None:
+            sched_json = self._read_journal(journal_fpath)
+        dump_json_atomic(fpath, sched_json, indent=4)
+        os.remove(journal_fpath)
+
+    def _start_journal(self, journal_fpath, sched_json):
+        """Start a new journal with the day's schedule (before any outcome/odds data)"""
+        with open(journal_fpath, 'w') as f:
+            f.write(json.dumps({'schedule': sched_json}) + "\n")
+
+    def _append_journal(self, journal_fpath, record):
+        with open(journal_fpath, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _read_journal(self, journal_fpath):
+        """
+        Rebuild the schedule from a journal: the schedule,
+        plus the outcome/odds data of each game scraped so far
+        """
+        sched_json = []
+        with open(journal_fpath, 'rb+') as f:
+            good = 0
+            for line in f:
                 try:
-                    g_json = self._html2json_g(g_src)
-                except TeamRankingsParseError:
-                    # Could not find outcome of game
-                    if self.nohush:
-                        print(f"Could not find outcome of game {game_descr}, skipping")
-                    continue
-
-                # Game outcome gets copied directly into game dict
-                for k, v in g_json.items():
-                    game[k] = v
-
-            # -------------
-            # 2b) Odds
-
-            if self.nohush:
-                print(f"Retrieving TeamRankings.com odds data for {game_descr}")
-
-            # Now get each odds page
-            try:
-                ml_src = self._get_page_html(game_url + "/money-line-movement")
-                ml_json = self._html2json_ml(ml_src)
-            except TeamRankingsParseError:
-                ml_json = {}
-
-            try:
-                sp_src = self._get_page_html(game_url + "/spread-movement")
-                sp_json = self._html2json_sp(sp_src)
-            except TeamRankingsParseError:
-                sp_json = {}
-
-            try:
-                ou_src = self._get_page_html(game_url + "/over-under-movement")
-                ou_json = self._html2json_ou(ou_src)
-            except TeamRankingsParseError:
-                ou_json = {}
-
-            # Game odds get copied into "odds" sub-dict
-            game['odds'] = {}
-            game['odds']['moneyline'] = ml_json
-            game['odds']['spread']    = sp_json
-            game['odds']['ou']        = ou_json
-
-            # Save some time by dumping schedule each time we have added new odds data to one game
-            with open(fpath, 'w') as f:
-                json.dump(sched_json, f, indent=4)
-
-        # ----------------------
-        # Step 3: Final dump of game info plus odds data
-        with open(fpath, 'w') as f:
-            json.dump(sched_json, f, indent=4)
+                    record = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                if 'schedule' in record:
+                    sched_json = record['schedule']
+                else:
+                    sched_json[record['index']].update(record['game'])
+            # Drop a partial last line (from a scrape that was killed mid-write),
+            # so new records are appended after the last complete one
+            f.truncate(good)
+        return sched_json
 
 
 class KenpomDataScraper(TeamRankingsDataScraper):
     url = "https://kenpom.com/"
     data_subdir = 'kenpom'
+    page_ready_selector = "table#ratings-table"
 
     def _get_fpath_json(self):
         """
@@ -531,18 +727,18 @@ class KenpomDataScraper(TeamRankingsDataScraper):
         This scrapes the HTML to compile a list of dictionaries,
         one key per Kenpom column.
         """
-        soup = BeautifulSoup(html, 'html.parser')
+        page = extract_tables(html, "table#ratings-table", limit=1)
 
         # Prep data structure
         ranking = []
 
-        table = soup.find('table', id='ratings-table')
-        for row in table.find_all('tr'):
-            columns = row.find_all('td')
+        table = page.tables[0]
+        for row in table.find_rows():
+            columns = row.find_cells('td')
             if len(columns)>0:
                 item = {}
                 item['team_rank']  = columns[0].text
-                item['team_name']  = donch2teamrankings(kenpom2donch(columns[1].text))
+                item['team_name']  = teamrankings_name(team_id(columns[1].text))
                 item['net_rating'] = float(columns[4].text)
                 item['off_rating'] = float(columns[5].text)
                 item['def_rating'] = float(columns[7].text)
@@ -564,11 +760,259 @@ class KenpomDataScraper(TeamRankingsDataScraper):
         fpath = self._get_fpath_json()
         if (force is True) or (os.path.exists(fpath) is False):
 
-            this_src = self._get_page_html(self.url)
+            this_src = self._get_page(self.url)
             this_json = self._html2json(this_src)
 
             if self.nohush:
                 print(f"Dumping Kenpom team data to {fpath}")
-            with open(fpath, 'w') as f:
-                json.dump(this_json, f)
+            dump_json_atomic(fpath, this_json)
+
+    def get_missing_pages(self, dates):
+        """There is only one Kenpom page (today's ratings), for every date"""
+        if len(dates)>0 and not os.path.exists(self._get_fpath_json()):
+            return [(None, dates[0])]
+        return []
+
+    def fetch_page(self, k, game_date_dashes, force=False):
+        self.fetch_all(game_date_dashes, force=force)
+
+
+
+def _reparse_date(scraper_class, model_parameters, date):
+    """Re-run one scraper for one date, offline (runs in a worker process)"""
+    scraper = scraper_class(model_parameters)
+    try:
+        scraper.fetch_all(date, force=True)
+    except (TeamRankingsParseError, ArchivedPageNotFound) as e:
+        return f"{scraper_class.__name__} {date}: {e}"
+    return None
+
+
+def reparse_archive(model_parameters, workers=None):
+    """
+    Rebuild the JSON output of every scraper from the raw HTML
+    archive, with no network access. Each (scraper, date) pair
+    is re-parsed in parallel, in a pool of worker processes.
+
+    Returns a list of (scraper, date) errors.
+    """
+    params = dict(model_parameters)
+    params['offline'] = True
+    params['quiet'] = True
+
+    # Find the dates each scraper has pages for:
+    # the ?date= in the URL, or the fetch date if there is none
+    scraper_urls = [
+        (TeamRankingsDataScraper, set(TeamRankingsDataScraper.urls.values())),
+        (TeamRankingsScheduleScraper, set(TeamRankingsScheduleScraper.urls.values())),
+        (KenpomDataScraper, {KenpomDataScraper.url}),
+    ]
+    jobs = set()
+    archive = get_html_archive(params['data_directory'])
+    for entry in archive.entries():
+        base_url, _, date = entry['url'].partition("?date=")
+        for scraper_class, urls in scraper_urls:
+            if base_url in urls:
+                if scraper_class is KenpomDataScraper:
+                    # Only one Kenpom file, so only the latest page matters
+                    date = ""
+                jobs.add((scraper_class, date or entry['fetch_date']))
+
+    jobs = sorted(jobs, key=lambda job: (job[0].__name__, job[1]))
+    if len(jobs)==0:
+        return []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_reparse_date, scraper_class, params, date) for scraper_class, date in jobs]
+        errors = [future.result() for future in futures]
+
+    return [e for e in errors if e is not None]
+
+
+# Scrapers that can be named in a scrape job
+SCRAPER_CLASSES = {
+    cls.__name__: cls for cls in (TeamRankingsDataScraper, TeamRankingsScheduleScraper, KenpomDataScraper)
+}
+
+
+def add_scrape_job(queue, kind, scraper_class, date, prefix=None):
+    """
+    Add a job to the scrape job queue (see pkg/jobqueue.py):
+    kind 'data' scrapes one team stat page (prefix is the stat name,
+    see get_missing_pages()) or, if prefix is None, all of a date's
+    stat pages; kind 'schedule' scrapes a date's schedule (which adds
+    one 'game' job per game, to get its outcome and odds).
+    """
+    payload = {'scraper': scraper_class.__name__, 'date': date, 'prefix': prefix}
+    key = f"{scraper_class.__name__}:{date}" if prefix is None else f"{scraper_class.__name__}:{prefix}:{date}"
+    return queue.add(kind, key, payload, date=date)
+
+
+def _run_scrape_job(model_parameters, queue, job):
+    """Run one scrape job (raises if the job failed)"""
+    scraper = SCRAPER_CLASSES[job.payload['scraper']](model_parameters)
+    date = job.payload['date']
+
+    if job.kind=='data':
+        if job.payload.get('prefix') is None:
+            scraper.fetch_all(date)
+        else:
+            scraper.fetch_page(job.payload['prefix'], date)
+
+    elif job.kind=='schedule':
+        sched_json = scraper._start_schedule(date)
+        k = scraper._get_schedule_prefix(date)
+        group = f"{k}_{date.replace('-', '')}"
+        todo = [i for i, game in enumerate(sched_json) if 'odds' not in game.keys()]
+        if len(todo)==0:
+            scraper._compact_journal(scraper._get_fpath_json(k, date.replace("-", "")), sched_json)
+        # Add every game at once, so the date's last game job is only done when every game is
+        games = []
+        for i in todo:
+            payload = {'scraper': job.payload['scraper'], 'date': date, 'prefix': k, 'index': i, 'game': sched_json[i]}
+            games.append((f"{group}:{i}", payload))
+        queue.add_many('game', games, date=date, group=group)
+
+    elif job.kind=='game':
+        k = job.payload['prefix']
+        game_json = scraper._fetch_game(job.payload['game'], k=="todtom")
+        fpath = scraper._get_fpath_json(k, date.replace("-", ""))
+        scraper._append_journal(get_journal_fpath(fpath), {'index': job.payload['index'], 'game': game_json})
+
+    else:
+        raise ValueError(f"Unknown scrape job kind {job.kind}")
+
+
+def _give_up_game_job(model_parameters, job):
+    """
+    A game job failed for good: journal the game as having
+    no outcome or odds, so the rest of the date's games are kept
+    """
+    if job.kind!='game':
+        return
+    scraper = SCRAPER_CLASSES[job.payload['scraper']](model_parameters)
+    fpath = scraper._get_fpath_json(job.payload['prefix'], job.date.replace("-", ""))
+    scraper._append_journal(get_journal_fpath(fpath), {'index': job.payload['index'], 'game': scraper._get_no_outcome_json()})
+
+
+def _finish_game_job(model_parameters, job, counts):
+    """
+    Once the last game job for a date's schedule is done (or has
+    failed for good), compact the schedule journal into the final
+    schedule file.
+    """
+    if job.kind!='game' or counts.get('pending', 0) + counts.get('running', 0) > 0:
+        return
+    scraper = SCRAPER_CLASSES[job.payload['scraper']](model_parameters)
+    if counts.get('failed', 0) > 0:
+        print(f"{counts['failed']} games on {job.date} could not be scraped, saved them without outcome or odds data")
+    scraper._compact_journal(scraper._get_fpath_json(job.payload['prefix'], job.date.replace("-", "")))
 
+
+def _format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds//3600}h{(seconds%3600)//60:02d}m"
+    if seconds >= 60:
+        return f"{seconds//60}m{seconds%60:02d}s"
+    return f"{seconds}s"
+
+
+class ScrapeProgress(object):
+    """
+    Counts scrape jobs as they finish, and prints progress
+    (jobs done, jobs left, rate, and ETA) every SCRAPE_PROGRESS_INTERVAL seconds
+    """
+    def __init__(self, queue, dates=None, nohush=True):
+        self.queue = queue
+        self.dates = dates
+        self.nohush = nohush
+        self.start = time.monotonic()
+        self.last_report = self.start
+        self.finished = 0
+        self._lock = threading.Lock()
+
+    def job_finished(self):
+        with self._lock:
+            self.finished += 1
+            now = time.monotonic()
+            if now - self.last_report < SCRAPE_PROGRESS_INTERVAL:
+                return
+            self.last_report = now
+        self.report()
+
+    def report(self):
+        if not self.nohush:
+            return
+        counts = self.queue.counts(self.dates)
+        left = counts.get('pending', 0) + counts.get('running', 0)
+        elapsed = time.monotonic() - self.start
+        total = self.finished + left
+        pct = 100.0*self.finished/total if total>0 else 100.0
+        msg = f"Scraped {self.finished} of {total} jobs ({pct:.0f}%) in {_format_duration(elapsed)}"
+        if self.finished>0 and left>0:
+            rate = self.finished/elapsed
+            msg += f", {rate:.2f} jobs/sec, ETA {_format_duration(left/rate)}"
+        print(msg)
+
+
+def drain_scrape_jobs(model_parameters, dates=None, workers=None, max_attempts=None):
+    """
+    Run scrape jobs from the queue (only jobs for these dates, if given)
+    in a pool of worker threads, until none are left. Failed jobs are retried
+    with backoff, up to max_attempts tries (default JOB_MAX_ATTEMPTS, see
+    pkg/jobqueue.py); other processes can drain the same queue at the same time.
+
+    Returns a list of (kind, key, attempts, last error) of jobs that failed for good.
+    """
+    nohush = not ('quiet' in model_parameters and model_parameters['quiet'] is True)
+    queue = get_job_queue(model_parameters['data_directory'])
+    if workers is None:
+        workers = model_parameters.get('scrape_job_workers', SCRAPE_JOB_WORKERS)
+    if max_attempts is None:
+        max_attempts = jobqueue.JOB_MAX_ATTEMPTS
+
+    released = queue.release_dead_workers()
+    if nohush and released>0:
+        print(f"Restarting {released} scrape jobs left running by a stopped process")
+
+    progress = ScrapeProgress(queue, dates, nohush)
+
+    # Idle workers wait for a job to finish (it may have added new jobs,
+    # or been the last one) or for a retry to come due
+    job_finished = threading.Condition()
+
+    def work():
+        while True:
+            job = queue.claim(dates)
+            if job is None:
+                wait = queue.wait_time(dates)
+                if wait is None:
+                    return
+                with job_finished:
+                    job_finished.wait(timeout=min(wait, SCRAPE_JOB_POLL))
+                continue
+            try:
+                _run_scrape_job(model_parameters, queue, job)
+            except Exception as e:
+                counts = queue.fail(job, f"{type(e).__name__}: {e}", max_attempts)
+                if nohush:
+                    print(f"Scrape job {job} failed (attempt {job.attempts+1} of {max_attempts}): {type(e).__name__}: {e}")
+                if job.attempts+1 >= max_attempts:
+                    _give_up_game_job(model_parameters, job)
+                    progress.job_finished()
+            else:
+                counts = queue.complete(job)
+                progress.job_finished()
+            _finish_game_job(model_parameters, job, counts)
+            with job_finished:
+                job_finished.notify_all()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(work) for _ in range(workers)]
+        for future in futures:
+            future.result()
+
+    if progress.finished>0:
+        progress.report()
+    return queue.failures(dates)
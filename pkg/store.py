@@ -0,0 +1,133 @@
+import os
+import json
+import math
+import threading
+from collections import OrderedDict
+
+from .teams import TEAM_REGISTRY
+
+
+"""
+In-memory store for the per-date stat snapshot files
+(tempo_YYYYMMDD.json, kenpom_data.json, etc.)
+
+Each file is parsed once per process and indexed by team id,
+so a model lookup is one dict access instead of a file
+parse plus a linear scan. The league average of a stat
+column is computed the first time it is asked for.
+"""
+
+
+# Max number of snapshot files held in memory at once.
+# A 90-day TeamRankings backtest touches 3 files per day.
+STAT_STORE_SIZE = 512
+
+
+def league_average(values):
+    """
+    Return the mean of a list of stat values (skipping None),
+    or None if there are no values
+    """
+    m = [v for v in values if v is not None]
+    if len(m)>0:
+        return math.fsum(m)/len(m)
+    return None
+
+
+class StatSnapshot(object):
+    """
+    One parsed stat file: the list of rows as stored
+    on disk, an index of those rows by team id,
+    and the league averages of the stat columns used so far.
+    """
+    def __init__(self, rows, team_key):
+        self.rows = rows
+        self.team_key = team_key
+        self.index = {}
+        for item in rows:
+            tid = TEAM_REGISTRY.ids.get(item[team_key])
+            if tid is not None:
+                # Keep the first row for a team, same as a linear scan would
+                self.index.setdefault(tid, item)
+
+        # Computed on first use, since not every column is numeric
+        # (e.g. Kenpom stores team_rank as text)
+        self.averages = {}
+
+    def get_row(self, school):
+        """
+        Return the row for this school (team id or any team name),
+        or None if it is not in the file
+        """
+        return self.index.get(TEAM_REGISTRY.team_id(school))
+
+    def get_average(self, column):
+        """
+        Return the league average of a stat column
+        (None if no team has a value).
+        Raises KeyError if the column is not in the file.
+        """
+        if column in self.averages:
+            return self.averages[column]
+        if len(self.rows)==0 or column==self.team_key or column not in self.rows[0]:
+            raise KeyError(column)
+        # Averages are over every row in the file, including
+        # teams that are not in the team registry
+        average = league_average(item.get(column) for item in self.rows)
+        self.averages[column] = average
+        return average
+
+
+class StatSnapshotStore(object):
+    """
+    Bounded LRU cache of StatSnapshot objects, keyed by file path.
+
+    Each lookup checks the file's mtime, so a file that is
+    re-scraped (e.g. fetch_all(force=True)) is reloaded
+    the next time it is requested.
+    """
+    def __init__(self, maxsize=STAT_STORE_SIZE):
+        self.maxsize = maxsize
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fpath, team_key):
+        """
+        Return the StatSnapshot for the file at fpath,
+        loading it from disk if it is not already cached
+        (or if it has changed on disk since it was cached).
+
+        Raises FileNotFoundError if the file does not exist.
+        """
+        mtime = os.stat(fpath).st_mtime_ns
+
+        with self._lock:
+            entry = self._snapshots.get(fpath)
+            if entry is not None and entry[0]==mtime:
+                self._snapshots.move_to_end(fpath)
+                return entry[1]
+
+        with open(fpath, 'r') as f:
+            rows = json.load(f)
+        snapshot = StatSnapshot(rows, team_key)
+
+        with self._lock:
+            self._snapshots[fpath] = (mtime, snapshot)
+            self._snapshots.move_to_end(fpath)
+            while len(self._snapshots) > self.maxsize:
+                self._snapshots.popitem(last=False)
+
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+# One store per process, shared by every model instance
+_stat_store = StatSnapshotStore()
+
+
+def get_stat_store():
+    """Return the process-wide StatSnapshotStore"""
+    return _stat_store
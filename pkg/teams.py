@@ -1,8 +1,13 @@
 import json
 import os
-from rapidfuzz import fuzz
+import hashlib
+import numbers
+import threading
+import numpy as np
+from rapidfuzz import fuzz, process
 
 from .constants import (
+    TEAM_DIR,
     DONCH_TEAMS,
     KENPOM_TEAMS,
     TR_TEAMS,
@@ -10,6 +15,7 @@ from .constants import (
     KENPOM2DONCH_MAP,
     DONCH2TR_MAP,
     TR2DONCH_MAP,
+    SAG2DONCH_MAP,
 )
 from .errors import TeamNotFoundException
 
@@ -19,6 +25,237 @@ Utility functions related to team names and geography
 """
 
 
+# Sets, for O(1) membership tests
+DONCH_TEAMS_SET  = set(DONCH_TEAMS)
+KENPOM_TEAMS_SET = set(KENPOM_TEAMS)
+TR_TEAMS_SET     = set(TR_TEAMS)
+
+# Fuzzy matches accepted by TeamNameResolver are remembered here
+LEARNED_ALIASES_FPATH = os.path.join(TEAM_DIR, 'learned_aliases.json')
+
+
+class TeamNameResolver(object):
+    """
+    Resolves team names that are not an exact match for
+    any key of a names map (e.g. new NCAA mascot strings),
+    using fuzzy matching.
+
+    Names are fuzzy-matched in batches against a precomputed
+    list of lowercase keys. If the resolver has an alias file,
+    accepted matches are printed and saved to it, so later runs
+    resolve them in O(1) (check the file if a match looks wrong).
+    Names that match more than one team are reported as
+    ambiguous instead of being resolved.
+    """
+    # Minimum fuzz.partial_ratio score for a fuzzy match
+    score_cutoff = 98
+
+    def __init__(self, names_map, section, alias_fpath=LEARNED_ALIASES_FPATH):
+        self.names_map = names_map
+        self.section = section
+        self.alias_fpath = alias_fpath
+
+        self.keys = list(names_map.keys())
+        self.choices = [k.lower() for k in self.keys]
+        self.lower_map = {}
+        for key, choice in zip(self.keys, self.choices):
+            self.lower_map.setdefault(choice, key)
+
+        # name -> key in names_map
+        self.learned = {}
+        # name -> list of candidate keys
+        self.ambiguous = {}
+        self.unresolved = set()
+
+        self._lock = threading.Lock()
+
+        for name, key in self._load_aliases().get(section, {}).items():
+            if key in names_map:
+                self.learned[name] = key
+
+    def _load_aliases(self):
+        if self.alias_fpath is None or not os.path.exists(self.alias_fpath):
+            return {}
+        with open(self.alias_fpath, 'r') as f:
+            return json.load(f)
+
+    def _save_aliases(self):
+        """Merge our learned aliases into the on-disk alias table"""
+        if self.alias_fpath is None:
+            return
+        aliases = self._load_aliases()
+        aliases[self.section] = dict(sorted(self.learned.items()))
+        tmp_fpath = self.alias_fpath + ".tmp"
+        with open(tmp_fpath, 'w') as f:
+            json.dump(aliases, f, indent=4)
+        os.replace(tmp_fpath, self.alias_fpath)
+
+    def resolve(self, name):
+        """Return the key of names_map that this name refers to, or None"""
+        return self.resolve_batch([name]).get(name)
+
+    def resolve_batch(self, names):
+        """
+        Resolve a collection of names in one pass.
+        Returns a dict mapping each name that could be resolved
+        to the key of names_map that it refers to.
+        """
+        resolved = {}
+        pending = []
+        with self._lock:
+            for name in set(names):
+                if name in self.names_map:
+                    resolved[name] = name
+                elif name in self.learned:
+                    resolved[name] = self.learned[name]
+                elif name.lower() in self.lower_map:
+                    resolved[name] = self.lower_map[name.lower()]
+                elif name not in self.unresolved and name not in self.ambiguous:
+                    pending.append(name)
+
+            if len(pending)==0:
+                return resolved
+
+            # One batched fuzzy match for every name we have not seen before
+            scores = process.cdist(
+                [name.lower() for name in pending],
+                self.choices,
+                scorer=fuzz.partial_ratio,
+                score_cutoff=self.score_cutoff,
+                workers=-1,
+            )
+
+            learned_new = False
+            for name, row in zip(pending, scores):
+                candidates = [self.keys[j] for j in np.flatnonzero(row > self.score_cutoff)]
+                targets = {self.names_map[key] for key in candidates}
+                if len(targets)==1:
+                    resolved[name] = candidates[0]
+                    self.learned[name] = candidates[0]
+                    learned_new = True
+                    if self.alias_fpath is not None:
+                        print(f"Learned team name alias {name} -> {candidates[0]} (saved to {self.alias_fpath})")
+                elif len(targets)>1:
+                    self.ambiguous[name] = candidates
+                    print(f"Ambiguous team name {name}, could be any of: {', '.join(candidates)}")
+                else:
+                    self.unresolved.add(name)
+
+            if learned_new:
+                self._save_aliases()
+
+        return resolved
+
+
+class TeamRegistry(object):
+    """
+    Assigns every school a stable integer team id,
+    and maps every known name for that school
+    (Donchess/NCAA mascot names, Kenpom, TeamRankings, Sagarin)
+    to that id, so any name can be resolved with one hash lookup.
+
+    Team ids are positions in the sorted list of TeamRankings names,
+    so arrays indexed by team id (e.g. the geo table) line up.
+    """
+    def __init__(self):
+        # id -> name in each universe we use internally
+        self.teamrankings_names = sorted(TR_TEAMS_SET)
+        self.donchess_names = [TR2DONCH_MAP[name] for name in self.teamrankings_names]
+
+        # Any name -> id
+        # If a name is used by more than one universe,
+        # precedence is TeamRankings, Donchess, Kenpom, Sagarin
+        self.ids = {}
+        for tid, name in enumerate(self.teamrankings_names):
+            self.ids[name] = tid
+        for name in DONCH_TEAMS:
+            self.ids.setdefault(name, self.ids[DONCH2TR_MAP[name]])
+        for name in KENPOM_TEAMS:
+            self.ids.setdefault(name, self.ids[DONCH2TR_MAP[KENPOM2DONCH_MAP[name]]])
+        for name, donch_name in SAG2DONCH_MAP.items():
+            # Sagarin has some schools that TeamRankings does not
+            if donch_name in DONCH2TR_MAP:
+                self.ids.setdefault(name, self.ids[DONCH2TR_MAP[donch_name]])
+
+        # Exact names only, for the normalize_to_*() functions
+        self.exact_ids = dict(self.ids)
+
+        # New names (e.g. scraped from a schedule) are added by resolve_names(),
+        # and remembered in the learned alias table
+        self.resolver = TeamNameResolver(self.exact_ids, 'team_registry')
+        for name, key in self.resolver.learned.items():
+            self.ids.setdefault(name, self.ids[key])
+
+    def __len__(self):
+        return len(self.teamrankings_names)
+
+    def team_id(self, team):
+        """
+        Return the integer team id for a team name from any universe.
+        (Team ids are passed through unchanged.)
+        """
+        if isinstance(team, numbers.Integral):
+            return int(team)
+        try:
+            return self.ids[team]
+        except KeyError:
+            raise TeamNotFoundException(f"Could not find team id for team {team}")
+
+    def exact_team_id(self, team):
+        """
+        Return the integer team id for a team name from any universe,
+        without using learned aliases. Raises TeamNotFoundException.
+        """
+        try:
+            return self.exact_ids[team]
+        except KeyError:
+            raise TeamNotFoundException(f"Could not find team id for team {team}")
+
+    def resolve_names(self, names):
+        """
+        Make sure every name in names can be looked up in O(1),
+        fuzzy matching any new names in a single batch.
+        This is the only way new names are learned
+        (team_id() lookups never fuzzy match).
+        Returns the set of names that could not be resolved.
+        """
+        new_names = [name for name in set(names) if name not in self.ids]
+        resolved = self.resolver.resolve_batch(new_names)
+        for name, key in resolved.items():
+            self.ids.setdefault(name, self.ids[key])
+        return set(new_names) - set(resolved)
+
+
+TEAM_REGISTRY = TeamRegistry()
+
+# One resolver per names map passed to lookup()
+_lookup_resolvers = {}
+
+
+def team_id(team_name):
+    """Return the integer team id for a team name from any universe"""
+    return TEAM_REGISTRY.team_id(team_name)
+
+
+def resolve_team_names(names):
+    """
+    Resolve a batch of (possibly new) team names up front,
+    so later team_id() calls for them are O(1).
+    Returns the set of names that could not be resolved.
+    """
+    return TEAM_REGISTRY.resolve_names(names)
+
+
+def teamrankings_name(tid):
+    """Return the TeamRankings name for a team id"""
+    return TEAM_REGISTRY.teamrankings_names[tid]
+
+
+def donchess_name(tid):
+    """Return the Donchess name for a team id"""
+    return TEAM_REGISTRY.donchess_names[tid]
+
+
 def get_kenpom_teams():
     return KENPOM_TEAMS
 
@@ -33,18 +270,17 @@ def get_teamrankings_teams():
 
 def is_kenpom_team(team_name):
     """Is this team name in the Kenpom set of team names?"""
-    kenpom_list = get_kenpom_teams()
-    return team_name in kenpom_list
+    return team_name in KENPOM_TEAMS_SET
 
 
 def is_donch_team(team_name):
     """Is this team name in the donch set of team names?"""
-    return team_name in DONCH_TEAMS
+    return team_name in DONCH_TEAMS_SET
 
 
 def is_teamrankings_team(team_name):
     """Is this team name in the teamrankings set of team names?"""
-    return team_name in TR_TEAMS
+    return team_name in TR_TEAMS_SET
 
 
 def lookup(team_name, names_map):
@@ -55,22 +291,31 @@ def lookup(team_name, names_map):
 
     There are multiple name lookup maps in JSON files,
     so this is a generic function that parameterizes it.
+
+    Names that are not an exact (or exact up to case) match
+    are fuzzy matched once, and remembered for the rest of
+    the run (but not saved, see TeamNameResolver).
     """
     # First, check if the name is an exact match
     if team_name in names_map:
         return names_map[team_name]
 
-    # Second, check if case is an issue
-    for name in names_map:
-        if name.lower()==team_name.lower():
-            return names_map[name]
+    # Resolvers are kept per names map, and aliases are saved per set of keys
+    entry = _lookup_resolvers.get(id(names_map))
+    if entry is None or entry[0] is not names_map:
+        keys_hash = hashlib.sha1(json.dumps(sorted(names_map)).encode('utf-8')).hexdigest()
+        entry = (names_map, TeamNameResolver(names_map, f"lookup_{keys_hash[:12]}", alias_fpath=None))
+        _lookup_resolvers[id(names_map)] = entry
+    resolver = entry[1]
 
-    # Third, see if it is a matter of one or two characters
-    for name in names_map:
-        if fuzz.partial_ratio(name.lower(), team_name.lower()) > 98:
-            return names_map[name]
+    key = resolver.resolve(team_name)
+    if key is not None:
+        return names_map[key]
 
     # Give up
+    if team_name in resolver.ambiguous:
+        candidates = ", ".join(resolver.ambiguous[team_name])
+        raise TeamNotFoundException(f"Ambiguous team name {team_name}, could be any of: {candidates}")
     raise TeamNotFoundException(f"Could not find Donchess team {team_name}")
 
 
@@ -99,28 +344,22 @@ def normalize_to_teamrankings_names(team_name):
     Whatever name we have, wherever it is from,
     normalize it back to a TeamRankings name
     """
-    if is_teamrankings_team(team_name):
-        return team_name
-    elif is_donch_team(team_name):
-        return donch2teamrankings(team_name)
-    elif is_kenpom_team(team_name):
-        return donch2teamrankings(kenpom2donch(team_name))
-    else:
+    try:
+        return teamrankings_name(TEAM_REGISTRY.exact_team_id(team_name))
+    except TeamNotFoundException:
         raise TeamNotFoundException(f"Could not normalize to TeamRankings name: {team_name}")
 
 
 def normalize_to_donchess_names(team_name):
     """
     Whatever name we have, wherever it is from,
-    normalize it back to a TeamRankings name
+    normalize it back to a Donchess name
     """
     if is_donch_team(team_name):
         return team_name
-    elif is_teamrankings_team(team_name):
-        return teamrankings2donch(team_name)
-    elif is_kenpom_team(team_name):
-        return kenpom2donch(team_name)
-    else:
+    try:
+        return donchess_name(TEAM_REGISTRY.exact_team_id(team_name))
+    except TeamNotFoundException:
         raise TeamNotFoundException(f"Could not normalize to Donchess name: {team_name}")
 
 
@@ -1,6 +1,7 @@
 import json
 import os
 import pytz
+import threading
 from datetime import datetime
 
 
@@ -21,6 +22,17 @@ def load_json(path_to_file, fname):
     return d
 
 
+def dump_json_atomic(fpath, data, **kwargs):
+    """
+    Write data to a JSON file atomically (write a temporary file,
+    then rename it), so an interrupted write never leaves a
+    partial file behind. kwargs are passed to json.dump().
+    """
+    tmp_fpath = f"{fpath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_fpath, 'w') as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_fpath, fpath)
+
 
 def assert_required_keys_present(d, keys):
     """
@@ -46,3 +58,13 @@ def get_utc_offset_int(timezone_name):
     except pytz.exceptions.UnknownTimeZoneError:
         raise ValueError(f"Error: pytz could not understand time zone {timezone_name}")
 
+
+
+def get_season_year(stamp):
+    """
+    Return the year a season started in, given a YYYYMMDD date stamp.
+    Any game after August is part of the next season.
+    """
+    if int(stamp[4:6])>8:
+        return int(stamp[0:4])
+    return int(stamp[0:4]) - 1
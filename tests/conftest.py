@@ -0,0 +1,95 @@
+import sys
+import os
+import json
+import random
+
+import pytest
+
+# hack (same as the drivers): make pkg importable without installing it
+pkg_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, pkg_root)
+
+
+# Dates of the synthetic season written by the season_datadir fixture
+SEASON_DATES = ["2025-01-10", "2025-01-11", "2025-01-12"]
+
+
+def write_synthetic_season(datadir, dates=SEASON_DATES, n_games=40, seed=0):
+    """
+    Write TeamRankings stat files (tempo, off_eff, def_eff) for every
+    team, and a schedule file with outcomes and odds, for each date
+    """
+    from pkg.teams import get_teamrankings_teams
+
+    rng = random.Random(seed)
+    teams = sorted(set(get_teamrankings_teams()))
+    base = {t: (rng.uniform(62, 75), rng.uniform(0.9, 1.2), rng.uniform(0.9, 1.2)) for t in teams}
+    trdir = os.path.join(datadir, 'teamrankings', 'json')
+    scheddir = os.path.join(datadir, 'schedule', 'json')
+    os.makedirs(trdir, exist_ok=True)
+    os.makedirs(scheddir, exist_ok=True)
+
+    for date in dates:
+        stamp = date.replace("-", "")
+        for k, prefix in enumerate(['tempo', 'off_eff', 'def_eff']):
+            rows = []
+            for rank, team in enumerate(teams):
+                v = base[team][k]*rng.uniform(0.98, 1.02)
+                rows.append({
+                    f'{prefix}_rank': rank+1,
+                    f'{prefix}_team': team,
+                    f'{prefix}_2024': round(v, 3),
+                    f'{prefix}_last_3': round(v*rng.uniform(0.9, 1.1), 3),
+                    f'{prefix}_last_1': round(v*rng.uniform(0.8, 1.2), 3),
+                    f'{prefix}_home': None if rank%50==0 else round(v, 3),
+                    f'{prefix}_away': round(v, 3),
+                    f'{prefix}_2023': round(v, 3),
+                })
+            with open(os.path.join(trdir, f"{prefix}_{stamp}.json"), 'w') as f:
+                json.dump(rows, f)
+
+        games = []
+        picks = rng.sample(teams, 2*n_games)
+        for g in range(n_games):
+            spread = round(rng.uniform(-15, 15)*2)/2
+            games.append({
+                'game_url': f"https://teamrankings.com/ncaa-basketball/matchup/{g}-{stamp}",
+                'away_team': picks[2*g],
+                'home_team': picks[2*g+1],
+                'neutral_site': g%9==0,
+                'game_time': f"{rng.choice([9, 12, 16, 18, 19]):02d}00",
+                'game_date': date,
+                'away_score': rng.randint(50, 95),
+                'home_score': rng.randint(50, 95),
+                'odds': {
+                    'moneyline': {'vegas_away_moneyline': -150 if spread<0 else 130, 'vegas_home_moneyline': 130 if spread<0 else -150},
+                    'spread': {'vegas_away_spread': spread, 'vegas_home_spread': -spread} if g%11 else {},
+                    'ou': {'vegas_ou_total': round(rng.uniform(130, 160), 1)},
+                },
+            })
+        with open(os.path.join(scheddir, f"trschedule_{stamp}.json"), 'w') as f:
+            json.dump(games, f)
+
+
+@pytest.fixture
+def season_datadir(tmp_path):
+    """A data directory with a few days of synthetic stats and games (see SEASON_DATES)"""
+    datadir = str(tmp_path / "data")
+    write_synthetic_season(datadir)
+    return datadir
+
+
+@pytest.fixture(scope='session')
+def geo_table_dir(tmp_path_factory):
+    """A directory with the team pair geo table (see pkg/geo.py), built from the team data"""
+    from pkg.geo import build_geo_table
+    bindir = str(tmp_path_factory.mktemp("geo"))
+    build_geo_table(bindir)
+    return bindir
+
+
+@pytest.fixture(scope='session')
+def geo_table(geo_table_dir):
+    """The geo table in geo_table_dir, memory-mapped the way the model loads it"""
+    from pkg.geo import GeoTable
+    return GeoTable.load(geo_table_dir)
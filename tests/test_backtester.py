@@ -0,0 +1,56 @@
+import os
+import json
+from collections import Counter
+
+import pytest
+
+from conftest import SEASON_DATES
+from pkg.backtester import Backtester
+from pkg.constants import CONFERENCES
+from pkg.metrics import SUM_FIELDS, get_conference
+from pkg.model import NCAABModel
+from pkg.results import read_results
+
+
+def test_group_by_conference_matches_per_conference_backtests(season_datadir):
+    model = NCAABModel({'data_directory': season_datadir, 'quiet': True})
+    start, end = SEASON_DATES[0], SEASON_DATES[-1]
+
+    backtester = Backtester(model, start, end)
+    with pytest.raises(Exception, match="Unknown group_by"):
+        backtester.backtest("all_games", group_by=['weekday'])
+    metrics = backtester.backtest("all_games", group_by=['conference'])
+    assert metrics.overall.n_games > 100
+
+    # The conferences with the most games
+    results_fpath = backtester._get_backtest_fpath_jsonl("all_games")
+    counts = Counter()
+    for game in read_results(results_fpath):
+        counts.update({get_conference(game.away_team), get_conference(game.home_team)})
+    confs = [c for c, _ in counts.most_common() if c!="Unknown"][:3]
+
+    for conf in confs:
+        conf_teams = [k for k, v in CONFERENCES.items() if v==conf]
+        conf_metrics = Backtester(model, start, end, teams=conf_teams).backtest("conference")
+        group = metrics.groups['conference'][conf]
+        for k in SUM_FIELDS:
+            assert getattr(group, k)==pytest.approx(getattr(conf_metrics.overall, k)), (conf, k)
+    assert os.path.exists(backtester._get_backtest_fpath_metrics("all_games"))
+
+
+def test_worker_processes_do_not_print_predictions(season_datadir, capfd):
+    games = []
+    for date in SEASON_DATES:
+        with open(os.path.join(season_datadir, 'schedule', 'json', f"trschedule_{date.replace('-', '')}.json"), 'r') as f:
+            games += json.load(f)
+    params = {'data_directory': season_datadir, 'quiet': False, 'prediction_cache': False}
+    expected = Backtester(NCAABModel(dict(params, quiet=True)), SEASON_DATES[0], SEASON_DATES[-1])._predict_new_games(games)
+    capfd.readouterr()
+
+    backtester = Backtester(NCAABModel(dict(params, backtest_workers=2)), SEASON_DATES[0], SEASON_DATES[-1])
+    assert backtester._predict_new_games(games)==expected
+    out = capfd.readouterr().out
+    assert "Generated model prediction" not in out
+    assert "Worker 1 of 2 predicted" in out and "Worker 2 of 2 predicted" in out
+    # The parent's model is not made quiet
+    assert backtester.model.model_parameters['quiet'] is False
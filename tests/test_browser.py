@@ -0,0 +1,66 @@
+import time
+import threading
+
+from pkg import browser
+
+
+class FakeBrowser(object):
+    def __init__(self):
+        self.page_source = ""
+
+    def get(self, url):
+        # Slow enough that the other threads have to wait for the session
+        time.sleep(0.01)
+        self.page_source = f"<html>{url}</html>"
+
+    def quit(self):
+        pass
+
+
+class FakeSession(object):
+    started = 0
+
+    def __init__(self, load_timeout):
+        FakeSession.started += 1
+        self.browser = FakeBrowser()
+        self.pages = 0
+
+    def close(self):
+        pass
+
+
+def test_retired_sessions_wake_waiters(monkeypatch):
+    monkeypatch.setattr(browser, 'BrowserSession', FakeSession)
+    FakeSession.started = 0
+    # Every session is retired after one page, so the threads waiting
+    # for the only slot must be woken when it is freed
+    pool = browser.BrowserPool(size=1, page_budget=1)
+
+    pages = []
+    def worker(i):
+        for j in range(5):
+            pages.append(pool.get_page_html(f"{i}-{j}"))
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    assert not any(t.is_alive() for t in threads)
+    assert len(pages)==20
+    assert FakeSession.started==20
+    assert pool._nsessions==0
+
+
+def test_sessions_are_reused(monkeypatch):
+    monkeypatch.setattr(browser, 'BrowserSession', FakeSession)
+    FakeSession.started = 0
+    pool = browser.BrowserPool(size=2, page_budget=3)
+
+    for i in range(5):
+        assert pool.get_page_html(str(i))==f"<html>{i}</html>"
+    assert FakeSession.started==2
+    assert pool._nsessions==1
+
+    pool.close()
+    assert pool._nsessions==0
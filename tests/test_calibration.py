@@ -0,0 +1,159 @@
+import os
+import random
+
+import pytest
+
+from pkg.calibration import ConfidenceCalibrator, load_confidences, get_confidence_table_fpaths
+from pkg.games import GameRecord
+from pkg.metrics import get_conference
+from pkg.results import JsonlResultWriter
+
+
+TEAMS = ["Duke", "North Carolina", "Kansas", "Baylor", "Gonzaga", "Houston", "Purdue", "Michigan St"]
+
+
+def make_games(n, seed=0):
+    rng = random.Random(seed)
+    games = []
+    for i in range(n):
+        away, home = rng.sample(TEAMS, 2)
+        d = {
+            'away_team': away,
+            'home_team': home,
+            # One game per date, so no two games are the same game
+            'game_date': f"2024-{i//28+1:02d}-{i%28+1:02d}",
+            'away_score': rng.randint(50, 90),
+            'home_score': rng.randint(50, 90),
+            'odds': {'spread': {'vegas_away_spread': rng.choice([-7.5, -3, 0.5, 4, 10.5])}} if rng.random() < 0.9 else {},
+        }
+        game = GameRecord.from_json(d)
+        game.set_prediction(rng.randint(55, 85), rng.randint(55, 85))
+        games.append(game)
+    return games
+
+
+def write_results(fpath, games, mtime):
+    with JsonlResultWriter(fpath) as writer:
+        for game in games:
+            writer.write(game)
+    os.utime(fpath, (mtime, mtime))
+
+
+def spread_won(game):
+    """Did the model win vs the Vegas spread (None if there is no bet)"""
+    real, vegas, pred = game.away_spread, game.vegas_away_spread, game.predicted_away_spread
+    if real is None or vegas is None:
+        return None
+    return ((vegas - pred) > 0)==((vegas - real) > 0)
+
+
+def naive_records(games):
+    records = {}
+    for game in games:
+        won = spread_won(game)
+        if won is None:
+            continue
+        for conf in {get_conference(game.away_team), get_conference(game.home_team)}:
+            records.setdefault(conf, [0, 0])[0 if won else 1] += 1
+    return records
+
+
+@pytest.fixture
+def datadir(tmp_path):
+    os.makedirs(tmp_path / "backtest" / "json")
+    return str(tmp_path)
+
+
+def results_fpath(datadir, name, stamp="20250101"):
+    return os.path.join(datadir, 'backtest', 'json', f"{name}_{stamp}.jsonl")
+
+
+def make_calibrator(datadir, **kwargs):
+    return ConfidenceCalibrator(datadir, "NCAABModel", ["a", "b"], quiet=True, **kwargs)
+
+
+def test_confidences_from_results(datadir):
+    games = make_games(300)
+    write_results(results_fpath(datadir, "a"), games[:200], 1000)
+    write_results(results_fpath(datadir, "b"), games[200:], 2000)
+
+    calibrator = make_calibrator(datadir, prior_games=10)
+    assert calibrator.update()==2
+    table = calibrator.get_table()
+
+    records = naive_records(games)
+    assert table['records']==records
+    bets = [spread_won(game) for game in games if spread_won(game) is not None]
+    assert table['n_games']==len(bets)
+    rate = sum(bets)/len(bets)
+    for conf, (wins, losses) in records.items():
+        assert table['confidences'][conf]==pytest.approx(100*(wins + 10*rate)/(wins + losses + 10), abs=0.05)
+    assert (table['start_date'], table['end_date'])==("2024-01-01", "2024-11-20")
+
+
+def test_games_count_once_and_newest_wins(datadir):
+    games = make_games(50)
+    write_results(results_fpath(datadir, "a"), games, 1000)
+    # Re-run of the same games, with the opposite result vs Vegas for the first one
+    flipped = make_games(50)
+    game = next(game for game in flipped if spread_won(game) is not None)
+    won = spread_won(game)
+    vegas = game.vegas_away_spread
+    pred = vegas + 2 if vegas > game.predicted_away_spread else vegas - 2
+    game.set_prediction(70, 70 + pred)
+    assert spread_won(game)!=won
+    write_results(results_fpath(datadir, "b"), flipped, 2000)
+
+    calibrator = make_calibrator(datadir)
+    calibrator.update()
+    assert calibrator.get_table()['records']==naive_records(flipped)
+
+
+def test_only_new_files_are_read_and_tables_are_versioned(datadir):
+    games = make_games(200)
+    write_results(results_fpath(datadir, "a"), games[:100], 1000)
+    assert load_confidences(datadir, "NCAABModel")==(None, None)
+
+    calibrator = make_calibrator(datadir)
+    assert calibrator.update()==1
+    table = calibrator.save()
+    assert table['version']==1
+    assert load_confidences(datadir, "NCAABModel")==(table['confidences'], 1)
+
+    # Nothing new: nothing is read, and no new version
+    calibrator = make_calibrator(datadir)
+    assert calibrator.update()==0
+    assert calibrator.save()['version']==1
+    assert len(get_confidence_table_fpaths(datadir, "NCAABModel"))==1
+
+    # A new results file makes a new version, from all the games so far
+    write_results(results_fpath(datadir, "b"), games[100:], 2000)
+    calibrator = make_calibrator(datadir)
+    assert calibrator.update()==1
+    table = calibrator.save()
+    assert table['version']==2
+    assert table['records']==naive_records(games)
+    assert load_confidences(datadir, "NCAABModel")==(table['confidences'], 2)
+
+
+def test_models_are_calibrated_separately(datadir):
+    games = make_games(200)
+    write_results(results_fpath(datadir, "a"), games[:100], 1000)
+    write_results(results_fpath(datadir, "b", "20250102"), games[:100], 1500)
+    # Other backtests, e.g. of another model, are not read
+    write_results(results_fpath(datadir, "a_kenpom"), games[100:], 2000)
+    write_results(results_fpath(datadir, "c"), games[100:], 2000)
+
+    calibrator = make_calibrator(datadir)
+    assert calibrator.update()==2
+    assert calibrator.save()['records']==naive_records(games[:100])
+
+    calibrator = ConfidenceCalibrator(datadir, "KenpomNCAABModel", ["a_kenpom"], quiet=True)
+    assert calibrator.update()==1
+    table = calibrator.save()
+    assert (table['version'], table['model'])==(1, "KenpomNCAABModel")
+    assert table['records']==naive_records(games[100:])
+
+    assert load_confidences(datadir, "KenpomNCAABModel")==(table['confidences'], 1)
+    assert load_confidences(datadir, "NCAABModel")[0]!=table['confidences']
+    assert load_confidences(datadir, "OtherModel")==(None, None)
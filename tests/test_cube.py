@@ -0,0 +1,97 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from conftest import SEASON_DATES
+from pkg import model as model_module
+from pkg.cube import StatCube, build_stat_cube, CUBE_PREFIXES
+from pkg.errors import ModelPredictException
+from pkg.model import NCAABModel
+from pkg.store import StatSnapshotStore
+from pkg.teams import TEAM_REGISTRY
+
+
+STAMPS = [date.replace("-", "") for date in SEASON_DATES]
+
+
+def stat_fpath(datadir, prefix, stamp):
+    return os.path.join(datadir, 'teamrankings', 'json', f"{prefix}_{stamp}.json")
+
+
+def test_cube_values_equal_json_store(season_datadir):
+    # One column that float32 can't reproduce exactly
+    fpath = stat_fpath(season_datadir, 'tempo', STAMPS[0])
+    with open(fpath, 'r') as f:
+        rows = json.load(f)
+    rows[0]['tempo_2023'] = 70.123456789
+    with open(fpath, 'w') as f:
+        json.dump(rows, f)
+
+    build_stat_cube(season_datadir, 2024)
+    cube = StatCube.load(season_datadir, 2024)
+    assert cube.dates==STAMPS
+    assert not cube.is_exact('tempo_2023')
+
+    store = StatSnapshotStore()
+    for stamp in STAMPS:
+        assert cube.has_date(stamp)
+        for prefix in CUBE_PREFIXES:
+            snapshot = store.get(stat_fpath(season_datadir, prefix, stamp), f"{prefix}_team")
+            for column in snapshot.rows[0]:
+                if column==f"{prefix}_team":
+                    continue
+                assert cube.get_average(stamp, column)==snapshot.get_average(column)
+                if not cube.is_exact(column):
+                    continue
+                for tid in range(len(TEAM_REGISTRY)):
+                    row = snapshot.get_row(tid)
+                    assert cube.get_value(tid, stamp, column)==(None if row is None else row[column])
+        with pytest.raises(KeyError):
+            cube.get_value(0, stamp, 'kenpom_rating')
+
+    # The latest snapshot on or before a date
+    np.testing.assert_array_equal(cube.as_of(STAMPS[1] + "9"), cube.values[:, 1, :])
+    with pytest.raises(KeyError):
+        cube.as_of("20250101")
+
+
+def test_changed_files_are_not_served(season_datadir):
+    build_stat_cube(season_datadir, 2024)
+    fpath = stat_fpath(season_datadir, 'off_eff', STAMPS[1])
+    with open(fpath, 'r') as f:
+        rows = json.load(f)
+    with open(fpath, 'w') as f:
+        json.dump(rows[:10], f)
+
+    cube = StatCube.load(season_datadir, 2024)
+    assert [cube.has_date(stamp) for stamp in STAMPS]==[True, False, True]
+
+
+def predict_all(model, games):
+    predictions = []
+    for game in games:
+        try:
+            predictions.append(model.predict(game))
+        except ModelPredictException:
+            predictions.append(None)
+    return predictions
+
+
+def test_predictions_equal_with_and_without_cube(season_datadir, monkeypatch):
+    games = []
+    for stamp in STAMPS:
+        with open(os.path.join(season_datadir, 'schedule', 'json', f"trschedule_{stamp}.json"), 'r') as f:
+            games += json.load(f)
+    build_stat_cube(season_datadir, 2024)
+
+    model = NCAABModel({'data_directory': season_datadir, 'quiet': True})
+    assert model._get_cube(STAMPS[0]) is not None
+    with_cube = predict_all(model, games)
+    assert sum(p is not None for p in with_cube) > 100
+
+    monkeypatch.setattr(model_module, 'get_stat_cube', lambda datadir, year: None)
+    model = NCAABModel({'data_directory': season_datadir, 'quiet': True})
+    assert model._get_cube(STAMPS[0]) is None
+    assert predict_all(model, games)==with_cube
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from pkg.archive import get_html_archive
+from pkg.fixtures import add_synthetic_day
+from pkg.games import GameRecord, load_games
+from pkg.scraper import TeamRankingsScheduleScraper
+
+
+GAME = {
+    'game_url': "https://teamrankings.com/ncaa-basketball/matchup/duke-kansas",
+    'away_team': "Duke",
+    'home_team': "Kansas",
+    'neutral_site': False,
+    'game_time': "1600",
+    'game_date': "2024-01-10",
+    'away_score': 70,
+    'home_score': 75,
+    'odds': {
+        'moneyline': {
+            'vegas_away_moneyline': 150,
+            'vegas_away_moneyline_opening': 140,
+            'vegas_home_moneyline': -170,
+            'vegas_home_moneyline_opening': -160,
+        },
+        'spread': {
+            'vegas_away_spread': 3.5,
+            'vegas_home_spread': -3.5,
+            'vegas_away_spread_opening': 3.0,
+            'vegas_home_spread_opening': -3.0,
+        },
+        'ou': {
+            'vegas_ou_opening': 141.5,
+            'vegas_ou_total': 143.0,
+        },
+    },
+}
+
+
+def variant(**changes):
+    d = json.loads(json.dumps(GAME))
+    for k, v in changes.items():
+        if v is KeyError:
+            del d[k]
+        else:
+            d[k] = v
+    return d
+
+
+@pytest.mark.parametrize("d", [
+    GAME,
+    # Not played yet, no odds yet
+    variant(away_score=KeyError, home_score=KeyError, odds=KeyError),
+    # Keys set to None
+    variant(away_score=None, home_score=None, neutral_site=None),
+    variant(odds={'moneyline': {}, 'spread': {'vegas_away_spread': None}, 'ou': {}}),
+    variant(odds=None),
+    # Keys GameRecord does not know about
+    variant(location="Allen Fieldhouse", away_spread=5),
+    variant(odds={'spread': {'vegas_away_spread': 3.5, 'book': "x"}, 'live': {'vegas_ou_total': 140}}),
+    variant(odds={'moneyline': {}, 'spread': {}, 'ou': {}, 'notes': "closed"}),
+    # A backtest result
+    variant(predicted_away_points=72.1, predicted_home_points=74.0, predicted_away_spread=1.9, predicted_total=146.1),
+])
+def test_round_trip(d):
+    game = GameRecord.from_json(d)
+    assert game.to_json()==d
+    assert GameRecord.from_json(game.to_json()).to_json()==d
+
+
+def test_round_trip_scraped_schedule(tmp_path):
+    datadir = str(tmp_path)
+    add_synthetic_day(get_html_archive(datadir), "2024-01-10", n_games=5)
+    scraper = TeamRankingsScheduleScraper({'data_directory': datadir, 'offline': True, 'quiet': True})
+    scraper.fetch_all("2024-01-10")
+
+    fpath = scraper._get_fpath_json('trschedule', '20240110')
+    with open(fpath, 'r') as f:
+        sched_json = json.load(f)
+    games = load_games(fpath)
+    assert len(games)==5
+    assert [game.to_json() for game in games]==sched_json
+
+
+def test_mapping_interface():
+    game = GameRecord.from_json(variant(away_score=None, location="Allen Fieldhouse"))
+    assert game['home_team']=="Kansas"
+    assert game['vegas_away_spread']==3.5
+    assert game['location']=="Allen Fieldhouse"
+    # Fields set to None read as missing
+    assert 'away_score' not in game
+    assert game.get('away_score', -1)==-1
+    with pytest.raises(KeyError):
+        game['away_score']
+    assert 'home_score' in game
+    assert set(game.keys())==set(dict(game.items()).keys())
+    assert 'odds' not in game.keys()
+
+
+def test_prediction_and_spread():
+    game = GameRecord.from_json(GAME)
+    assert game.away_spread==5
+    game.set_prediction(72.06, 74.0)
+    d = game.to_json()
+    assert d['predicted_away_points']==72.1
+    assert d['predicted_away_spread']==1.9
+    assert d['predicted_total']==146.1
+    assert GameRecord.from_json(variant(home_score=None)).away_spread is None
@@ -0,0 +1,74 @@
+import os
+import json
+
+import numpy as np
+from geopy import distance
+from tzfpy import get_tz
+
+from conftest import SEASON_DATES
+from pkg import model as model_module
+from pkg.constants import GEO_LATLONG, CONFERENCES
+from pkg.errors import ModelPredictException
+from pkg.geo import GeoTable, GEO_TABLE_FNAME, GEO_HEADER_FNAME
+from pkg.model import NCAABModel
+from pkg.teams import TEAM_REGISTRY
+from pkg.utils import get_utc_offset_int
+
+
+def test_table_equals_geopy(geo_table):
+    teams = TEAM_REGISTRY.donchess_names
+    assert geo_table.teams==teams
+    assert geo_table.miles.dtype==np.float64
+
+    # Every pair, both ways round, is exactly what geopy gives
+    for i, away in enumerate(teams):
+        miles = [distance.distance(GEO_LATLONG[away], GEO_LATLONG[home]).miles for home in teams]
+        assert geo_table.miles[i].tolist()==miles, away
+        assert geo_table.same_conference[i].tolist()==[CONFERENCES[away]==CONFERENCES[home] for home in teams]
+
+    assert geo_table.conferences.tolist()==[CONFERENCES[t] for t in teams]
+    assert geo_table.utc_offsets.tolist()==[get_utc_offset_int(get_tz(*reversed(GEO_LATLONG[t]))) for t in teams]
+
+
+def test_stale_tables_are_not_loaded(geo_table_dir, tmp_path, capsys):
+    table = np.load(os.path.join(geo_table_dir, GEO_TABLE_FNAME))
+    with open(os.path.join(geo_table_dir, GEO_HEADER_FNAME), 'r') as f:
+        header = json.load(f)
+
+    # An older table, with float32 miles
+    old_table = np.zeros(table.shape, dtype=[('miles', np.float32), ('same_conference', np.bool_)])
+    np.save(str(tmp_path / GEO_TABLE_FNAME), old_table)
+    with open(tmp_path / GEO_HEADER_FNAME, 'w') as f:
+        json.dump(header, f)
+    assert GeoTable.load(str(tmp_path)) is None
+
+    # A table built from different team data
+    np.save(str(tmp_path / GEO_TABLE_FNAME), table)
+    with open(tmp_path / GEO_HEADER_FNAME, 'w') as f:
+        json.dump(dict(header, source_hash="x"), f)
+    assert GeoTable.load(str(tmp_path)) is None
+    assert capsys.readouterr().out.count("out of date")==2
+
+    assert GeoTable.load(str(tmp_path / "missing")) is None
+
+
+def test_predictions_equal_with_and_without_table(season_datadir, geo_table, monkeypatch):
+    games = []
+    for date in SEASON_DATES:
+        with open(os.path.join(season_datadir, 'schedule', 'json', f"trschedule_{date.replace('-', '')}.json"), 'r') as f:
+            games += json.load(f)
+
+    def predict_all(use_geo_table):
+        monkeypatch.setattr(model_module, 'get_geo_table', lambda: geo_table if use_geo_table else None)
+        model = NCAABModel({'data_directory': season_datadir, 'quiet': True})
+        predictions = []
+        for game in games:
+            try:
+                predictions.append(model.predict(game))
+            except ModelPredictException:
+                predictions.append(None)
+        return predictions
+
+    with_table = predict_all(True)
+    assert sum(p is not None for p in with_table) > 100
+    assert predict_all(False)==with_table
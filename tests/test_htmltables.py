@@ -0,0 +1,285 @@
+import re
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from bs4 import BeautifulSoup
+
+from pkg import scraper as scraper_module
+from pkg.archive import HtmlArchive
+from pkg.errors import TeamRankingsParseError
+from pkg.fixtures import add_synthetic_day
+from pkg.htmltables import extract_tables
+from pkg.scraper import TeamRankingsScheduleScraper, KenpomDataScraper
+
+
+# ---------------------------
+# BeautifulSoup parsers, as the scrapers were before pkg/htmltables.py
+# (the new parsers must give the same output)
+
+def soup_datatable(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', attrs={"class": "datatable"})
+    if table is None:
+        raise TeamRankingsParseError("Data table cannot be found on page")
+    return table
+
+
+def soup_stat(html, prefix):
+    table = soup_datatable(html)
+    headers = [prefix + "_" + th.text.lower().replace(' ','_') for th in table.find('thead').find('tr').find_all('th')]
+    ranking = []
+    for row in table.find('tbody').find_all('tr'):
+        item = {}
+        for j, (header, col) in enumerate(zip(headers, row.find_all('td'))):
+            if j==0:
+                item[header] = int(col.text)
+            elif j==1:
+                item[header] = col.text
+            else:
+                try:
+                    item[header] = float(col.text)
+                except ValueError:
+                    item[header] = None
+        ranking.append(item)
+    return ranking
+
+
+def soup_sched(html):
+    table = soup_datatable(html)
+    table_rows = table.find('tbody').find_all('tr')
+    if len(table_rows)==0 or "No data available" in table_rows[0].text:
+        raise TeamRankingsParseError("No data found on schedule page")
+    x = re.compile(r'\#\d+(.*)at.*\#\d+(.*)')
+    v = re.compile(r'\#\d+(.*)vs.*\#\d+(.*)')
+    schedule = []
+    for row in table_rows:
+        add_game = True
+        game = {}
+        for j, col in enumerate(row.find_all('td')):
+            if j==2:
+                try:
+                    link = "https://teamrankings.com" + col.find('a').attrs['href']
+                except AttributeError:
+                    add_game = False
+                    break
+                text = col.find('a').text
+                is_neutral = False
+                try:
+                    g = x.search(text)
+                    away_team, home_team = g[1].strip(), g[2].strip()
+                except TypeError:
+                    g = v.search(text)
+                    away_team, home_team = g[1].strip(), g[2].strip()
+                    is_neutral = True
+                game['game_url'] = link
+                game['away_team'] = away_team
+                game['home_team'] = home_team
+                game['neutral_site'] = is_neutral
+            elif j==3:
+                dt = datetime.strptime(col.text.strip(), "%I:%M %p") - timedelta(hours=3)
+                game['game_time'] = dt.strftime("%H%M")
+        if add_game:
+            schedule.append(game)
+    return schedule
+
+
+def soup_abbrs(soup):
+    away_abbr, home_abbr = None, None
+    for h2 in soup.find_all('h2'):
+        if "Matchup Menu" in h2.text:
+            teams = h2.text.split(":")[1].split(" @ ")
+            away_abbr, home_abbr = teams[0].strip(), teams[1].strip()
+    return away_abbr, home_abbr
+
+
+def soup_game(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    away_score, home_score = None, None
+    for table in soup.find_all('table', attrs={'class': 'matchup-table'}):
+        if "Final Score" in table.find('tr').find('th').text:
+            rows = table.find('tbody').find_all('tr')
+            away_cols, home_cols = rows[0].find_all('td'), rows[1].find_all('td')
+            try:
+                away_score, home_score = int(away_cols[3].text), int(home_cols[3].text)
+            except IndexError:
+                raise TeamRankingsParseError("Could not find game outcome in table")
+    return {'away_score': away_score, 'home_score': home_score}
+
+
+def soup_moneyline(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    away_abbr, home_abbr = soup_abbrs(soup)
+    odds = {}
+    for lab in ['tab-001', 'tab-002']:
+        cells = soup.find('div', attrs={'id': lab}).find('table').find('tbody').find('tr').find_all('td')
+        k, current_ml = cells[0].text.split(" ")
+        if k==away_abbr:
+            odds['vegas_away_moneyline'] = int(current_ml)
+            odds['vegas_away_moneyline_opening'] = int(cells[2].text)
+        elif k==home_abbr:
+            odds['vegas_home_moneyline'] = int(current_ml)
+            odds['vegas_home_moneyline_opening'] = int(cells[2].text)
+    return odds
+
+
+def soup_spread(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    away_abbr, home_abbr = soup_abbrs(soup)
+    cells = soup.find('table', attrs={"class": "movement-table"}).find('tr').find_all('td')
+    k, current_sp = cells[0].text.split(" ")
+    sign = 1 if k==away_abbr else -1
+    return {
+        'vegas_away_spread':         round(sign*float(current_sp), 1),
+        'vegas_home_spread':         round(-sign*float(current_sp), 1),
+        'vegas_away_spread_opening': round(sign*float(cells[2].text), 1),
+        'vegas_home_spread_opening': round(-sign*float(cells[2].text), 1),
+    }
+
+
+def soup_ou(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    cells = soup.find('table', attrs={"class": "movement-table"}).find('tr').find_all('td')
+    return {
+        'vegas_ou_opening': round(float(cells[2].text), 1),
+        'vegas_ou_total':   round(float(cells[0].text.split(" ")[1]), 1),
+    }
+
+
+def soup_kenpom(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    ranking = []
+    for row in soup.find('table', id='ratings-table').find_all('tr'):
+        columns = row.find_all('td')
+        if len(columns)>0:
+            ranking.append({
+                'team_rank':  columns[0].text,
+                'team_name':  columns[1].text,
+                'net_rating': float(columns[4].text),
+                'off_rating': float(columns[5].text),
+                'def_rating': float(columns[7].text),
+                'adj_tempo':  float(columns[9].text),
+                'luck':       float(columns[11].text),
+            })
+    return ranking
+
+
+# ---------------------------
+# Pages
+
+def kenpom_page(n_teams=40, seed=0):
+    """A Kenpom ratings page: two header rows, seeds and ranks in spans, a repeated header mid-table"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_teams):
+        if i==20:
+            rows.append('<tr class="thead2"><th>Rk</th><th>Team</th><th>Conf</th></tr>')
+        seed_span = f' <span class="seed">{i%16+1}</span>' if i<16 else ''
+        cells = [
+            f'<td class="hard_left">{i+1}</td>',
+            f'<td class="next_left"><a href="team.php?team=T{i}">Team&nbsp;{i:03d}</a>{seed_span}</td>',
+            '<td class="conf"><a href="conf.php?c=B12">B12</a></td>',
+            f'<td class="wl">{rng.randint(10, 30)}-{rng.randint(0, 10)}</td>',
+            f'<td>{rng.uniform(-20, 35):+.2f}</td>',
+        ]
+        for _ in range(8):
+            cells.append(f'<td>{rng.uniform(60, 130):.1f}</td><td class="td-left"><span class="seed">{rng.randint(1, 360)}</span></td>')
+        rows.append('<tr>' + "".join(cells) + '</tr>')
+    return (
+        '<html><head><script>var t = "<table id=\'ratings-table\'><tr><td>x</td></tr></table>";</script></head><body>'
+        '<table id="ratings-table"><thead>'
+        '<tr class="thead1"><th colspan="5"></th><th colspan="4">Adj</th></tr>'
+        '<tr class="thead2"><th>Rk</th><th>Team</th><th>Conf</th><th>W-L</th><th>NetRtg</th></tr>'
+        '</thead><tbody>' + "\n".join(rows) + '</tbody></table></body></html>'
+    )
+
+
+def messy(html):
+    """The same page with markup the parsers must see through"""
+    html = html.replace("<td>", "<td><!-- c -->", 3)
+    html = html.replace("</h2>", "<script>var x = '</table>';</script></h2>", 1)
+    html = html.replace("<tbody>", "<tbody>\n  ", 1)
+    html = html.replace("<table", "<div><table class='other'><tr><td>x</td></tr></table></div><table", 1)
+    return html
+
+
+@pytest.fixture(scope='module')
+def pages(tmp_path_factory):
+    archive = HtmlArchive(str(tmp_path_factory.mktemp("archive")))
+    urls = add_synthetic_day(archive, "2024-01-10", n_games=8, n_teams=60)
+    return {kind: [archive.get(url) for url in kind_urls] for kind, kind_urls in urls.items()}
+
+
+@pytest.fixture
+def scrapers(tmp_path, monkeypatch):
+    # Compare the parsing only, not the team name lookups
+    monkeypatch.setattr(scraper_module, 'team_id', lambda name: name)
+    monkeypatch.setattr(scraper_module, 'teamrankings_name', lambda name: name)
+    params = {'data_directory': str(tmp_path), 'quiet': True}
+    return TeamRankingsScheduleScraper(params), KenpomDataScraper(params)
+
+
+def variants(src):
+    # As str (Selenium), as bytes (requests), and with extra markup
+    return [src, src.encode('utf-8'), messy(src)]
+
+
+def check_same(parse, soup_parse, html):
+    """Both parsers give the same output, or both fail"""
+    try:
+        expected = soup_parse(html)
+    except Exception:
+        with pytest.raises(Exception):
+            parse(html)
+        # Only the extra markup may break a page
+        assert isinstance(html, str) and "class='other'" in html
+        return
+    assert parse(html)==expected
+
+
+def test_stat_pages(pages, scrapers):
+    s, _ = scrapers
+    for src in pages['stat']:
+        for html in variants(src):
+            check_same(lambda h: s._html2json(h, 'tempo'), lambda h: soup_stat(h, 'tempo'), html)
+
+
+def test_schedule_pages(pages, scrapers):
+    s, _ = scrapers
+    for src in pages['schedule']:
+        # Plus a row without a link, which is skipped, and non-ASCII names
+        src = src.replace("</tbody>", "<tr><td>9</td><td>0</td><td>TBD vs. TBD</td><td>8:00 PM</td><td></td></tr></tbody>")
+        src = src.replace("Team 001", "San José St")
+        for html in variants(src):
+            check_same(s._html2json_sched, soup_sched, html)
+
+
+def test_game_and_odds_pages(pages, scrapers):
+    s, _ = scrapers
+    for kind, parse, soup_parse in [
+        ('game',      s._html2json_g,  soup_game),
+        ('moneyline', s._html2json_ml, soup_moneyline),
+        ('spread',    s._html2json_sp, soup_spread),
+        ('ou',        s._html2json_ou, soup_ou),
+    ]:
+        for src in pages[kind]:
+            for html in variants(src):
+                check_same(parse, soup_parse, html)
+
+
+def test_kenpom_pages(scrapers):
+    _, k = scrapers
+    for seed in range(3):
+        for html in variants(kenpom_page(seed=seed)):
+            check_same(k._html2json, soup_kenpom, html)
+
+
+def test_text_like_beautifulsoup():
+    html = (
+        '<table class="t"><tr><td> a&amp;b <b>bold</b><!-- no --><script>no</script>'
+        '<br/>&nbsp;c<a href="/x?y=1&amp;z=2">link</a></td><th>h</th></tr></table>'
+    )
+    cell = extract_tables(html, "table.t").tables[0].rows[0].cells[0]
+    soup_cell = BeautifulSoup(html, 'html.parser').find('td')
+    assert cell.text==soup_cell.text
+    assert cell.links==[(soup_cell.find('a').attrs['href'], soup_cell.find('a').text)]
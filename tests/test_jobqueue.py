@@ -0,0 +1,147 @@
+import socket
+import threading
+import subprocess
+
+import pytest
+
+from pkg import jobqueue
+from pkg.jobqueue import JobQueue, get_job_queue
+
+
+class FakeClock(object):
+    """Stands in for the time module, so tests can move time forward"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(jobqueue, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs" / "jobs.db"))
+
+
+def test_jobs_are_unique_until_finished(queue, clock):
+    assert queue.add('stats', "20240110", {'date': "2024-01-10"}, date="2024-01-10")
+    assert not queue.add('stats', "20240110", {'date': "2024-01-10"}, date="2024-01-10")
+    assert queue.add_many('game', [("a", 1), ("b", 2), ("a", 1)], date="2024-01-11", group="g")==2
+
+    job = queue.claim()
+    assert (job.kind, job.key, job.payload, job.date, job.attempts)==('stats', "20240110", {'date': "2024-01-10"}, "2024-01-10", 0)
+    # Running jobs are not added again, or claimed twice
+    assert not queue.add('stats', "20240110")
+    assert queue.claim(dates=["2024-01-10"]) is None
+    assert [queue.claim().key, queue.claim().key, queue.claim()]==["a", "b", None]
+
+    assert queue.complete(job)=={}
+    assert queue.counts()=={'done': 1, 'running': 2}
+    assert queue.counts(dates=["2024-01-11"])=={'running': 2}
+
+    # A finished job can be added again
+    assert queue.add('stats', "20240110", date="2024-01-10")
+    assert queue.claim().attempts==0
+
+
+def test_backoff_and_failure(queue, clock, monkeypatch):
+    monkeypatch.setattr(jobqueue, 'JOB_MAX_ATTEMPTS', 4)
+    monkeypatch.setattr(jobqueue, 'JOB_BACKOFF', 10.0)
+    monkeypatch.setattr(jobqueue, 'JOB_BACKOFF_MAX', 15.0)
+    queue.add_many('game', [("a", None), ("b", None)], date="2024-01-10", group="g")
+    job, other = queue.claim(), queue.claim()
+    assert queue.fail(job, "boom 0")=={'pending': 1, 'running': 1}
+
+    # Retries wait 10s, then double (up to 15s), until the job has had 4 tries
+    for attempts, wait in [(1, 10.0), (2, 15.0), (3, 15.0)]:
+        assert queue.wait_time()==pytest.approx(wait)
+        clock.now += wait - 1
+        assert queue.claim() is None
+        clock.now += 1
+        job = queue.claim()
+        assert (job.key, job.attempts)==("a", attempts)
+        counts = queue.fail(job, f"boom {attempts}")
+
+    assert counts=={'failed': 1, 'running': 1}
+    assert queue.failures()==[('game', "a", 4, "boom 3")]
+    assert queue.failures(dates=["2024-01-11"])==[]
+    assert queue.claim() is None
+
+    # The failed job does not hold up the rest of the queue
+    queue.complete(other)
+    assert queue.wait_time() is None
+
+    # A failed job can be added again, with all its tries
+    assert queue.add('game', "a")
+    assert queue.claim().attempts==0
+
+
+def test_expired_lease(queue, clock):
+    queue.add('stats', "20240110")
+    job = queue.claim()
+    assert queue.wait_time()==pytest.approx(jobqueue.JOB_LEASE)
+    clock.now += jobqueue.JOB_LEASE
+    assert queue.claim() is None
+    clock.now += 1
+    again = queue.claim()
+    assert (again.key, again.attempts)==(job.key, 0)
+
+
+def test_release_dead_workers(queue):
+    queue.add_many('stats', [("a", None), ("b", None)])
+
+    # Claimed by a process that has exited
+    proc = subprocess.Popen(["true"])
+    proc.wait()
+    dead = JobQueue(queue.db_fpath)
+    dead.worker = f"{socket.gethostname()}:{proc.pid}"
+    assert dead.claim().key=="a"
+    assert queue.claim().key=="b"
+    assert queue.claim() is None
+
+    # Only the dead worker's job is released
+    assert queue.release_dead_workers()==1
+    assert queue.claim().key=="a"
+    assert queue.release_dead_workers()==0
+
+
+def test_threads_never_share_jobs(queue):
+    queue.add_many('game', [(str(i), i) for i in range(200)])
+    claimed = []
+
+    def work():
+        q = JobQueue(queue.db_fpath)
+        while True:
+            job = q.claim()
+            if job is None:
+                return
+            claimed.append(job.payload)
+            q.complete(job)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed)==list(range(200))
+    assert queue.counts()=={'done': 200}
+
+
+def test_get_job_queue(tmp_path):
+    datadir = str(tmp_path)
+    assert get_job_queue(datadir) is get_job_queue(datadir)
+    assert get_job_queue(datadir).db_fpath==str(tmp_path / "jobs" / "scrape_jobs.db")
+
+
+def test_fail_with_fewer_attempts(queue, clock):
+    queue.add('stats', "20240110", date="2024-01-10")
+    job = queue.claim()
+    queue.fail(job, "boom", max_attempts=1)
+    assert queue.counts()=={'failed': 1}
+    assert queue.failures()==[('stats', "20240110", 1, "boom")]
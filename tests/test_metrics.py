@@ -0,0 +1,166 @@
+import math
+import random
+
+import pytest
+
+from pkg import results
+from pkg.games import GameRecord
+from pkg.metrics import (
+    ResultColumns, MetricsAccumulator, compute_metrics, get_conference, _team_key,
+    SUM_FIELDS, GROUP_BYS, SPREAD_BUCKETS,
+)
+from pkg.results import BacktestSummary
+
+
+TEAMS = ["Duke", "Kansas", "Gonzaga", "Houston", "Purdue", "Not A Real Team"]
+
+
+def make_games(n, seed=0):
+    rng = random.Random(seed)
+    games = []
+    for i in range(n):
+        away, home = rng.sample(TEAMS, 2)
+        d = {
+            'away_team': away,
+            'home_team': home,
+            'neutral_site': rng.random() < 0.2,
+            'game_date': f"2024-{rng.choice(['01', '02'])}-{rng.randint(1, 28):02d}",
+        }
+        if rng.random() < 0.9:
+            d['away_score'] = rng.randint(50, 90)
+            d['home_score'] = rng.randint(50, 90)
+        odds = {'moneyline': {}, 'spread': {}, 'ou': {}}
+        if rng.random() < 0.8:
+            odds['spread']['vegas_away_spread'] = rng.choice([-13.5, -7, -3, -1.5, 0, 2.5, 3, 7, 12])
+        if rng.random() < 0.8:
+            odds['ou']['vegas_ou_total'] = rng.choice([130, 140.5, 150])
+        if rng.random() < 0.8:
+            odds['moneyline']['vegas_away_moneyline'] = rng.choice([-300, -150, 120, 250])
+            odds['moneyline']['vegas_home_moneyline'] = rng.choice([-300, -150, 120, 250])
+        d['odds'] = odds
+        game = GameRecord.from_json(d)
+        game.set_prediction(rng.randint(55, 85), rng.randint(55, 85))
+        games.append(game)
+    return games
+
+
+def naive_values(g):
+    """The per-game values, one game at a time"""
+    v = dict.fromkeys(SUM_FIELDS, 0.0)
+    v['n_games'] = 1
+    real, vegas, pred = g.away_spread, g.vegas_away_spread, g.predicted_away_spread
+    if real is not None and vegas is not None:
+        v['n_spread'] = 1
+        v['model_spread_se'] = (pred - real)**2
+        v['vegas_spread_se'] = (vegas - real)**2
+        if ((vegas - pred) > 0)==((vegas - real) > 0):
+            v['spread_wins'] = 1
+        else:
+            v['spread_losses'] = 1
+    if g.away_score is not None:
+        total, vegas_total = g.away_score + g.home_score, g.vegas_ou_total
+        v['n_total'] = 1
+        v['model_total_se'] = (g.predicted_total - total)**2
+        if vegas_total is not None and g.predicted_total!=vegas_total:
+            if total==vegas_total:
+                v['ou_pushes'] = 1
+            elif (g.predicted_total > vegas_total)==(total > vegas_total):
+                v['ou_wins'] = 1
+            else:
+                v['ou_losses'] = 1
+    if g.predicted_home_points!=g.predicted_away_points and real is not None:
+        pick_home = g.predicted_home_points > g.predicted_away_points
+        ml = g.vegas_home_moneyline if pick_home else g.vegas_away_moneyline
+        if ml is not None:
+            if (real > 0) if pick_home else (real < 0):
+                v['ml_wins'] = 1
+                v['ml_profit'] = ml/100 if ml>0 else 100/abs(ml)
+            else:
+                v['ml_losses'] = 1
+                v['ml_profit'] = -1
+    return v
+
+
+def naive_keys(by, g):
+    if by=='team':
+        return {_team_key(g.away_team), _team_key(g.home_team)}
+    if by=='conference':
+        return {get_conference(g.away_team), get_conference(g.home_team)}
+    if by=='date':
+        return {g.game_date}
+    if by=='month':
+        return {g.game_date[:7]}
+    if by=='site':
+        return {'neutral' if g.neutral_site else 'home'}
+    if by=='spread':
+        if g.vegas_away_spread is None:
+            return {"none"}
+        size = abs(g.vegas_away_spread)
+        lo = max(b for b in SPREAD_BUCKETS if b <= size)
+        i = SPREAD_BUCKETS.index(lo)
+        return {f"{lo}-{SPREAD_BUCKETS[i+1]}" if i+1 < len(SPREAD_BUCKETS) else f"{lo}+"}
+
+
+def naive_sums(games):
+    sums = dict.fromkeys(SUM_FIELDS, 0.0)
+    for g in games:
+        for k, x in naive_values(g).items():
+            sums[k] += x
+    return sums
+
+
+def assert_sums_equal(m, sums):
+    for k in SUM_FIELDS:
+        assert getattr(m, k)==pytest.approx(sums[k]), k
+
+
+def test_metrics_equal_naive_loop():
+    games = make_games(400)
+    columns = ResultColumns()
+    columns.extend(games)
+    metrics = compute_metrics(columns)
+
+    assert_sums_equal(metrics.overall, naive_sums(games))
+    for by in GROUP_BYS:
+        keys = {key for g in games for key in naive_keys(by, g)}
+        assert set(metrics.groups[by])==keys, by
+        for key in keys:
+            group = [g for g in games if key in naive_keys(by, g)]
+            assert_sums_equal(metrics.groups[by][key], naive_sums(group))
+
+    m = metrics.overall
+    assert m.rmse==pytest.approx(math.sqrt(m.model_spread_se/m.n_spread))
+    assert m.win_pct==pytest.approx(100*m.wins/(m.wins + m.losses))
+    assert list(metrics.groups['spread'])==[k for k in ["0-3", "3-7", "7-12", "12+", "none"] if k in metrics.groups['spread']]
+
+
+def test_accumulated_batches_equal_one_batch(monkeypatch):
+    games = make_games(250, seed=1)
+    columns = ResultColumns()
+    columns.extend(games)
+    expected = compute_metrics(columns).to_json()
+
+    accumulator = MetricsAccumulator()
+    for i in range(0, len(games), 37):
+        batch = ResultColumns()
+        batch.extend(games[i:i+37])
+        accumulator.add(batch)
+    accumulator.add(ResultColumns())
+    assert _json_close(accumulator.get_metrics().to_json(), expected)
+
+    # The summary only keeps a batch of games, not all of them
+    monkeypatch.setattr(results, 'SUMMARY_BATCH_GAMES', 20)
+    summary = BacktestSummary()
+    for game in games:
+        summary.add_result(game)
+        assert len(summary.batch) < 20
+    assert summary.n_results==len(games)
+    assert _json_close(summary.get_metrics().to_json(), expected)
+
+
+def _json_close(a, b):
+    if isinstance(a, dict):
+        return a.keys()==b.keys() and all(_json_close(a[k], b[k]) for k in a)
+    if isinstance(a, float) and math.isnan(a):
+        return isinstance(b, float) and math.isnan(b)
+    return a==pytest.approx(b)
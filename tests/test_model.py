@@ -0,0 +1,138 @@
+import os
+import json
+import random
+
+import numpy as np
+import pytest
+
+from conftest import SEASON_DATES
+from pkg import model as model_module
+from pkg.errors import TeamNotFoundException, ModelPredictException
+from pkg.model import NCAABModel, KenpomNCAABModel
+from pkg.teams import TEAM_REGISTRY
+
+
+def test_fingerprint_ignores_run_settings(tmp_path):
+    params = {'data_directory': str(tmp_path)}
+    fingerprint = NCAABModel(params).get_fingerprint()
+    assert fingerprint is not None
+
+    # Settings that do not change predictions keep the cached predictions
+    for k, v in [('backtest_chunk_days', 7), ('backtest_workers', 2), ('quiet', True)]:
+        assert NCAABModel(dict(params, **{k: v})).get_fingerprint()==fingerprint
+    assert NCAABModel(dict(params, home_advantage=9.9)).get_fingerprint()!=fingerprint
+
+
+def test_fingerprint_covers_imported_modules(tmp_path, monkeypatch):
+    model = NCAABModel({'data_directory': str(tmp_path)})
+    fingerprint = model.get_fingerprint()
+
+    # A change to a module the model uses (not just the model's own module) changes it
+    getsource = model_module.inspect.getsource
+    for name in ["pkg.store", "pkg.geo", "pkg.constants"]:
+        def edited_getsource(module, name=name):
+            source = getsource(module)
+            return source + "\n# edited\n" if module.__name__==name else source
+        monkeypatch.setattr(model_module.inspect, 'getsource', edited_getsource)
+        assert model.get_fingerprint()!=fingerprint
+    monkeypatch.setattr(model_module.inspect, 'getsource', getsource)
+    assert model.get_fingerprint()==fingerprint
+
+
+def season_games(datadir):
+    games = []
+    for date in SEASON_DATES:
+        with open(os.path.join(datadir, 'schedule', 'json', f"trschedule_{date.replace('-', '')}.json"), 'r') as f:
+            games += json.load(f)
+    # Plus games predict() can't make a prediction for
+    unknown = dict(games[0], away_team="Not A Real Team")
+    same = dict(games[1], away_team=games[1]['home_team'])
+    return games + [unknown, same]
+
+
+def predict_each(model, games):
+    away, home, valid = [], [], []
+    for game in games:
+        try:
+            a, h = model.predict(game)
+        except (TeamNotFoundException, ModelPredictException):
+            a, h = np.nan, np.nan
+        away.append(a)
+        home.append(h)
+        valid.append(not np.isnan(a))
+    return np.array(away), np.array(home), np.array(valid)
+
+
+@pytest.mark.parametrize("use_geo_table", [True, False])
+def test_predict_batch_matches_predict(season_datadir, geo_table, monkeypatch, use_geo_table):
+    monkeypatch.setattr(model_module, 'get_geo_table', lambda: geo_table if use_geo_table else None)
+
+    model = NCAABModel({'data_directory': season_datadir, 'quiet': True})
+    games = season_games(season_datadir)
+    away, home, valid = model.predict_batch(games)
+    expected_away, expected_home, expected_valid = predict_each(model, games)
+
+    assert valid.tolist()==expected_valid.tolist()
+    assert valid.sum() > 100
+    assert not valid[-2]
+    np.testing.assert_array_equal(away, expected_away)
+    np.testing.assert_array_equal(home, expected_home)
+
+
+class DampedModel(NCAABModel):
+    """Halves every team's difference from the league average"""
+    def _get_pct_adjustment(self, school_val, avg_val):
+        return super()._get_pct_adjustment(school_val, avg_val)/2
+
+
+def test_predict_batch_uses_redefined_pct_adjustment(season_datadir, monkeypatch):
+    monkeypatch.setattr(model_module, 'get_geo_table', lambda: None)
+    games = season_games(season_datadir)
+    model = DampedModel({'data_directory': season_datadir, 'quiet': True})
+    assert model.gather_batch_inputs(games) is None
+
+    away, home, valid = model.predict_batch(games)
+    expected_away, expected_home, expected_valid = predict_each(model, games)
+    assert valid.tolist()==expected_valid.tolist()
+    np.testing.assert_array_equal(away, expected_away)
+    np.testing.assert_array_equal(home, expected_home)
+
+    # and it does change the predictions
+    base_away, _, base_valid = NCAABModel({'data_directory': season_datadir, 'quiet': True}).predict_batch(games)
+    both = valid & base_valid
+    assert (away[both]!=base_away[both]).any()
+
+
+def write_kenpom_data(datadir, seed=0):
+    """A Kenpom ratings file, as scraped (ranks are text)"""
+    rng = random.Random(seed)
+    rows = []
+    for rank, team in enumerate(TEAM_REGISTRY.teamrankings_names):
+        off_rating, def_rating = rng.uniform(95, 125), rng.uniform(90, 120)
+        rows.append({
+            'team_rank':  str(rank+1),
+            'team_name':  team,
+            'net_rating': round(off_rating - def_rating, 2),
+            'off_rating': round(off_rating, 1),
+            'def_rating': round(def_rating, 1),
+            'adj_tempo':  round(rng.uniform(62, 75), 1),
+            'luck':       round(rng.uniform(-0.1, 0.1), 3),
+        })
+    kpdir = os.path.join(datadir, 'kenpom', 'json')
+    os.makedirs(kpdir, exist_ok=True)
+    with open(os.path.join(kpdir, "kenpom_data.json"), 'w') as f:
+        json.dump(rows, f)
+
+
+def test_kenpom_predict_batch_matches_predict(season_datadir, monkeypatch):
+    monkeypatch.setattr(model_module, 'get_geo_table', lambda: None)
+    write_kenpom_data(season_datadir)
+    model = KenpomNCAABModel({'data_directory': season_datadir, 'quiet': True})
+    games = season_games(season_datadir)
+    away, home, valid = model.predict_batch(games)
+    expected_away, expected_home, expected_valid = predict_each(model, games)
+
+    assert valid.tolist()==expected_valid.tolist()
+    assert valid.sum() > 100
+    np.testing.assert_array_equal(away, expected_away)
+    np.testing.assert_array_equal(home, expected_home)
@@ -0,0 +1,90 @@
+import os
+import json
+
+from conftest import SEASON_DATES
+from pkg.backtester import Backtester
+from pkg.model import NCAABModel
+from pkg.predcache import PredictionCache
+
+
+def test_cache_dates(tmp_path):
+    cache = PredictionCache(str(tmp_path / "cache"), "abc")
+    assert cache.get_date("2024-01-10", "h1")=={}
+
+    cache.put_date("2024-01-10", "h1", {"a|b": [70.0, 72.5]})
+    cache.put_date("2024-01-10", "h1", {"c|d": [60.0, 61.0]})
+    assert cache.get_date("2024-01-10", "h1")=={"a|b": [70.0, 72.5], "c|d": [60.0, 61.0]}
+
+    # Different inputs: nothing cached, and putting replaces the stale games
+    assert cache.get_date("2024-01-10", "h2")=={}
+    cache.put_date("2024-01-10", "h2", {"c|d": [65.0, 66.0]})
+    assert cache.get_date("2024-01-10", "h2")=={"c|d": [65.0, 66.0]}
+
+    cache.save()
+    assert not cache.modified
+    assert not os.path.exists(cache.fpath + ".tmp")
+    reloaded = PredictionCache(str(tmp_path / "cache"), "abc")
+    assert reloaded.get_date("2024-01-10", "h2")=={"c|d": [65.0, 66.0]}
+    assert PredictionCache(str(tmp_path / "cache"), "def").dates=={}
+
+
+def test_invalid_cache_file_is_ignored(tmp_path, capsys):
+    with open(tmp_path / "predictions_abc.json", 'w') as f:
+        f.write("{not json")
+    cache = PredictionCache(str(tmp_path), "abc")
+    assert cache.dates=={}
+    assert "Invalid prediction cache file" in capsys.readouterr().out
+
+
+def test_hash_inputs(tmp_path):
+    fpaths = [str(tmp_path / "a.json"), str(tmp_path / "b.json")]
+    missing = PredictionCache.hash_inputs(fpaths)
+    with open(fpaths[0], 'w') as f:
+        f.write("[1]")
+    h = PredictionCache.hash_inputs(fpaths)
+    assert h!=missing
+    assert PredictionCache.hash_inputs(fpaths)==h
+    with open(fpaths[0], 'w') as f:
+        f.write("[2]")
+    assert PredictionCache.hash_inputs(fpaths)!=h
+
+
+def test_backtest_reuses_cached_predictions(season_datadir, monkeypatch):
+    games = []
+    for date in SEASON_DATES:
+        with open(os.path.join(season_datadir, 'schedule', 'json', f"trschedule_{date.replace('-', '')}.json"), 'r') as f:
+            games += json.load(f)
+    params = {'data_directory': season_datadir, 'quiet': True}
+    expected = Backtester(NCAABModel(dict(params, prediction_cache=False)), SEASON_DATES[0], SEASON_DATES[-1])._predict_games(games)
+    assert sum(p is not None for p in expected) > 100
+
+    backtester = Backtester(NCAABModel(params), SEASON_DATES[0], SEASON_DATES[-1])
+    assert backtester._predict_games(games)==expected
+
+    # Count the games that are predicted again
+    predicted = []
+    predict_new_games = Backtester._predict_new_games
+    def counting_predict_new_games(self, todo):
+        predicted.extend(todo)
+        return predict_new_games(self, todo)
+    monkeypatch.setattr(Backtester, '_predict_new_games', counting_predict_new_games)
+
+    # Nothing is predicted again, even by a new backtest
+    backtester = Backtester(NCAABModel(params), SEASON_DATES[0], SEASON_DATES[-1])
+    assert backtester._predict_games(games)==expected
+    # (only games that could not be predicted are tried again)
+    retried = {id(g) for g in predicted}
+    assert retried=={id(g) for g, p in zip(games, expected) if p is None}
+
+    # A re-scraped stat file invalidates just its date
+    stamp = SEASON_DATES[1].replace("-", "")
+    fpath = os.path.join(season_datadir, 'teamrankings', 'json', f"tempo_{stamp}.json")
+    with open(fpath, 'r') as f:
+        rows = json.load(f)
+    rows[0]['tempo_2024'] += 1
+    with open(fpath, 'w') as f:
+        json.dump(rows, f)
+    predicted.clear()
+    new = backtester._predict_games(games)
+    assert {g['game_date'] for g in predicted if id(g) not in retried}=={SEASON_DATES[1]}
+    assert [p for p, g in zip(new, games) if g['game_date']!=SEASON_DATES[1]]==[p for p, g in zip(expected, games) if g['game_date']!=SEASON_DATES[1]]
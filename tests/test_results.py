@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from pkg.games import GameRecord
+from pkg.results import JsonlResultWriter, read_results
+
+
+def make_game(i):
+    game = GameRecord.from_json({
+        'game_url': f"https://teamrankings.com/ncaa-basketball/matchup/g{i}",
+        'away_team': "Duke",
+        'home_team': "Kansas",
+        'neutral_site': False,
+        'game_time': "1900",
+        'game_date': "2024-01-10",
+        'away_score': 70 + i,
+        'home_score': 75,
+        'odds': {'moneyline': {}, 'spread': {'vegas_away_spread': 3.5}, 'ou': {}},
+    })
+    game.set_prediction(70.0, 74.0 + i)
+    return game
+
+
+def test_jsonl_round_trip(tmp_path):
+    fpath = str(tmp_path / "results.jsonl")
+    games = [make_game(i) for i in range(3)]
+    with JsonlResultWriter(fpath) as writer:
+        for game in games:
+            writer.write(game)
+
+    with open(fpath, 'r') as f:
+        assert len(f.readlines())==3
+    assert [g.to_json() for g in read_results(fpath)]==[g.to_json() for g in games]
+    assert os.listdir(str(tmp_path))==["results.jsonl"]
+
+
+def test_jsonl_writer_leaves_nothing_on_error(tmp_path):
+    fpath = str(tmp_path / "results.jsonl")
+    with pytest.raises(RuntimeError):
+        with JsonlResultWriter(fpath) as writer:
+            writer.write(make_game(0))
+            raise RuntimeError("interrupted")
+    # No results file, and no temporary file
+    assert os.listdir(str(tmp_path))==[]
+
+    with JsonlResultWriter(fpath):
+        pass
+    assert os.listdir(str(tmp_path))==[]
@@ -0,0 +1,127 @@
+import os
+import json
+
+from pkg import jobqueue
+from pkg.archive import get_html_archive
+from pkg.fixtures import add_synthetic_day, SCHEDULE_URL
+from pkg.jobqueue import get_job_queue
+from pkg.scraper import (
+    TeamRankingsScheduleScraper, reparse_archive, get_journal_fpath,
+    add_scrape_job, drain_scrape_jobs, INLINE_SCRAPE_ATTEMPTS,
+)
+
+
+def load_schedule(datadir, prefix, stamp):
+    fpath = os.path.join(datadir, 'schedule', 'json', f"{prefix}_{stamp}.json")
+    if not os.path.exists(fpath):
+        return None
+    with open(fpath, 'r') as f:
+        return json.load(f)
+
+
+def test_reparse_prefix_from_fetch_date(tmp_path):
+    datadir = str(tmp_path)
+    archive = get_html_archive(datadir)
+    add_synthetic_day(archive, "2024-01-10", n_games=3)
+    # The same games, as the schedule page fetched on the day they were played
+    src = archive.get(SCHEDULE_URL + "?date=2024-01-10")
+    archive.put(SCHEDULE_URL + "?date=2024-01-12", src, "2024-01-12")
+
+    assert reparse_archive({'data_directory': datadir}, workers=1)==[]
+
+    # Fetched after the games: outcomes are known
+    games = load_schedule(datadir, 'trschedule', '20240110')
+    assert len(games)==3
+    assert all('away_score' in game and 'odds' in game for game in games)
+
+    # Fetched on the day of the games: no outcomes, even though that day is past
+    assert load_schedule(datadir, 'trschedule', '20240112') is None
+    games = load_schedule(datadir, 'todtom', '20240112')
+    assert len(games)==3
+    assert all('away_score' not in game and 'odds' in game for game in games)
+
+
+def test_reparse_reports_missing_pages(tmp_path):
+    datadir = str(tmp_path / "data")
+    os.mkdir(datadir)
+    other = get_html_archive(str(tmp_path / "other"))
+    add_synthetic_day(other, "2024-01-10", n_games=3)
+
+    # Only the schedule page is archived, not the game pages
+    archive = get_html_archive(datadir)
+    archive.put(SCHEDULE_URL + "?date=2024-01-10", other.get(SCHEDULE_URL + "?date=2024-01-10"))
+
+    errors = reparse_archive({'data_directory': datadir}, workers=1)
+    assert len(errors)==1
+    assert errors[0].startswith("TeamRankingsScheduleScraper 2024-01-10: Page https://teamrankings.com/")
+    assert load_schedule(datadir, 'trschedule', '20240110') is None
+
+
+def break_first_game(datadir):
+    """Archive a synthetic day, with a newer copy of the first game page that has a broken score table"""
+    archive = get_html_archive(datadir)
+    urls = add_synthetic_day(archive, "2024-01-10", n_games=3)
+    archive.put(urls['game'][0], (
+        '<html><body><table class="matchup-table"><thead><tr><th>Final Score</th></tr></thead>'
+        '<tbody><tr><td>Away</td></tr><tr><td>Home</td></tr></tbody></table></body></html>'
+    ))
+    return urls
+
+
+def check_saved_without_outcome(datadir):
+    """The broken game is saved with no outcome or odds, the other two in full"""
+    sched_json = load_schedule(datadir, 'trschedule', '20240110')
+    assert len(sched_json)==3
+    assert sched_json[0]['away_score'] is None and sched_json[0]['home_score'] is None
+    assert sched_json[0]['odds']=={'moneyline': {}, 'spread': {}, 'ou': {}}
+    for game in sched_json[1:]:
+        assert game['away_score'] is not None
+        assert game['odds']['spread']!={}
+    assert not os.path.exists(get_journal_fpath(os.path.join(datadir, 'schedule', 'json', "trschedule_20240110.json")))
+
+
+def test_fetch_all_keeps_day_on_missing_outcome(tmp_path, capsys):
+    datadir = str(tmp_path)
+    break_first_game(datadir)
+    scraper = TeamRankingsScheduleScraper({'data_directory': datadir, 'offline': True, 'quiet': True})
+
+    scraper.fetch_all("2024-01-10")
+    assert "Could not find outcome of game" in capsys.readouterr().out
+    check_saved_without_outcome(datadir)
+
+
+def test_scrape_job_keeps_day_on_missing_outcome(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobqueue, 'JOB_BACKOFF', 0.0)
+    datadir = str(tmp_path)
+    break_first_game(datadir)
+    params = {'data_directory': datadir, 'offline': True, 'quiet': True}
+
+    queue = get_job_queue(datadir)
+    add_scrape_job(queue, 'schedule', TeamRankingsScheduleScraper, "2024-01-10")
+    failures = drain_scrape_jobs(params, workers=2)
+
+    # The game is retried, then given up on
+    assert len(failures)==1
+    kind, key, attempts, error = failures[0]
+    assert (kind, key, attempts)==('game', 'trschedule_20240110:0', jobqueue.JOB_MAX_ATTEMPTS)
+    assert "Could not find outcome of game" in error
+    # but the rest of the date is kept
+    check_saved_without_outcome(datadir)
+
+
+def test_inline_scrape_gives_up_without_backoff(tmp_path, monkeypatch):
+    # As run during a backtest: a long backoff would hold it up between tries
+    monkeypatch.setattr(jobqueue, 'JOB_BACKOFF', 3600.0)
+    datadir = str(tmp_path)
+    break_first_game(datadir)
+    params = {'data_directory': datadir, 'offline': True, 'quiet': True}
+
+    queue = get_job_queue(datadir)
+    add_scrape_job(queue, 'schedule', TeamRankingsScheduleScraper, "2024-01-10")
+    failures = drain_scrape_jobs(params, workers=2, max_attempts=INLINE_SCRAPE_ATTEMPTS)
+
+    assert [(kind, key, attempts) for kind, key, attempts, _ in failures]==[('game', 'trschedule_20240110:0', 1)]
+    check_saved_without_outcome(datadir)
+
+    # A backfill that adds the date again retries it
+    assert add_scrape_job(queue, 'schedule', TeamRankingsScheduleScraper, "2024-01-10")
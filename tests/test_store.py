@@ -0,0 +1,91 @@
+import os
+import json
+
+import pytest
+
+from pkg.store import StatSnapshotStore, league_average
+from pkg.teams import teamrankings_name, donchess_name
+
+
+def write_stat_file(fpath, rows):
+    with open(fpath, 'w') as f:
+        json.dump(rows, f)
+
+
+def stat_rows():
+    a, b = teamrankings_name(0), teamrankings_name(1)
+    return [
+        {'tempo_rank': 1, 'tempo_team': a, 'tempo_2024': 70.0, 'tempo_home': 71.0},
+        {'tempo_rank': 2, 'tempo_team': b, 'tempo_2024': None, 'tempo_home': 65.0},
+        {'tempo_rank': 3, 'tempo_team': "Not A Real Team", 'tempo_2024': 80.0, 'tempo_home': None},
+        {'tempo_rank': 4, 'tempo_team': a, 'tempo_2024': 99.0, 'tempo_home': 99.0},
+    ]
+
+
+def test_snapshot_index_and_averages(tmp_path):
+    fpath = str(tmp_path / "tempo_20240110.json")
+    rows = stat_rows()
+    write_stat_file(fpath, rows)
+    snapshot = StatSnapshotStore().get(fpath, 'tempo_team')
+
+    # Any name for the team, or its id, finds its first row (same as a linear scan)
+    assert snapshot.get_row(0) is snapshot.rows[0]
+    assert snapshot.get_row(donchess_name(0))==rows[0]
+    assert snapshot.get_row(teamrankings_name(1))==rows[1]
+    assert snapshot.get_row(2) is None
+    assert len(snapshot.index)==2
+
+    # Averages are over every row (including unknown teams), skipping None
+    assert snapshot.get_average('tempo_2024')==pytest.approx((70 + 80 + 99)/3)
+    assert snapshot.get_average('tempo_home')==pytest.approx((71 + 65 + 99)/3)
+    assert snapshot.get_average('tempo_rank')==pytest.approx(2.5)
+    with pytest.raises(KeyError):
+        snapshot.get_average('tempo_team')
+    assert league_average([None, None]) is None
+
+
+def test_store_caches_and_reloads(tmp_path):
+    store = StatSnapshotStore(maxsize=2)
+    fpaths = [str(tmp_path / f"tempo_2024011{i}.json") for i in range(3)]
+    for fpath in fpaths:
+        write_stat_file(fpath, stat_rows())
+
+    first = store.get(fpaths[0], 'tempo_team')
+    assert store.get(fpaths[0], 'tempo_team') is first
+
+    # A file that changes on disk is reloaded
+    rows = stat_rows()
+    rows[0]['tempo_2024'] = 50.0
+    write_stat_file(fpaths[0], rows)
+    st = os.stat(fpaths[0])
+    os.utime(fpaths[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    reloaded = store.get(fpaths[0], 'tempo_team')
+    assert reloaded is not first
+    assert reloaded.get_row(0)['tempo_2024']==50.0
+
+    # Least recently used files are dropped
+    second = store.get(fpaths[1], 'tempo_team')
+    store.get(fpaths[0], 'tempo_team')
+    store.get(fpaths[2], 'tempo_team')
+    assert store.get(fpaths[0], 'tempo_team') is reloaded
+    assert store.get(fpaths[1], 'tempo_team') is not second
+
+    with pytest.raises(FileNotFoundError):
+        store.get(str(tmp_path / "missing.json"), 'tempo_team')
+
+
+def test_kenpom_snapshot(tmp_path):
+    # Kenpom files have text columns next to the numbers
+    fpath = str(tmp_path / "kenpom_data.json")
+    rows = [
+        {'team_rank': "1", 'team_name': teamrankings_name(0), 'off_rating': 120.5, 'adj_tempo': 70.1},
+        {'team_rank': "2", 'team_name': teamrankings_name(1), 'off_rating': 110.5, 'adj_tempo': None},
+    ]
+    write_stat_file(fpath, rows)
+    snapshot = StatSnapshotStore().get(fpath, 'team_name')
+
+    assert snapshot.get_row(1)==rows[1]
+    assert snapshot.get_average('off_rating')==pytest.approx(115.5)
+    assert snapshot.get_average('adj_tempo')==pytest.approx(70.1)
+    with pytest.raises(KeyError):
+        snapshot.get_average('net_rating')
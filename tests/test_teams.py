@@ -0,0 +1,104 @@
+import os
+import json
+import pytest
+
+from pkg.errors import TeamNotFoundException
+from pkg.teams import (
+    TEAM_REGISTRY,
+    LEARNED_ALIASES_FPATH,
+    TeamNameResolver,
+    TeamRegistry,
+    team_id,
+    teamrankings_name,
+    normalize_to_teamrankings_names,
+    normalize_to_donchess_names,
+)
+
+
+NAMES_MAP = {
+    "Arizona": "Arizona Wildcats",
+    "Arizona St": "Arizona State Sun Devils",
+    "Kansas": "Kansas Jayhawks",
+    "Kansas St": "Kansas State Wildcats",
+}
+
+
+def test_resolver_exact_case_and_fuzzy(tmp_path, capsys):
+    alias_fpath = str(tmp_path / "aliases.json")
+    resolver = TeamNameResolver(NAMES_MAP, "test", alias_fpath=alias_fpath)
+
+    resolved = resolver.resolve_batch(["Arizona", "kansas", "Kansas Jay", "Nowhere U"])
+    assert resolved["Arizona"] == "Arizona"
+    assert resolved["kansas"] == "Kansas"
+    assert "Nowhere U" not in resolved
+    assert "Nowhere U" in resolver.unresolved
+
+    # Only the fuzzy match is learned, and it is logged and saved
+    assert resolver.learned == {"Kansas Jay": "Kansas"}
+    assert "Kansas Jay -> Kansas" in capsys.readouterr().out
+    with open(alias_fpath, 'r') as f:
+        assert json.load(f) == {"test": {"Kansas Jay": "Kansas"}}
+
+    # A new resolver picks up the saved alias
+    resolver2 = TeamNameResolver(NAMES_MAP, "test", alias_fpath=alias_fpath)
+    assert resolver2.resolve("Kansas Jay") == "Kansas"
+
+
+def test_resolver_ambiguous(tmp_path):
+    resolver = TeamNameResolver(NAMES_MAP, "test", alias_fpath=str(tmp_path / "aliases.json"))
+    assert resolver.resolve("rizona") is None
+    assert sorted(resolver.ambiguous["rizona"]) == ["Arizona", "Arizona St"]
+    assert not os.path.exists(tmp_path / "aliases.json")
+
+
+def test_resolver_without_alias_file():
+    resolver = TeamNameResolver(NAMES_MAP, "test", alias_fpath=None)
+    assert resolver.resolve("Kansas Jay") == "Kansas"
+
+
+def test_lookups_are_strict():
+    name = TEAM_REGISTRY.teamrankings_names[0]
+    existed = os.path.exists(LEARNED_ALIASES_FPATH)
+
+    assert teamrankings_name(team_id(name)) == name
+    assert normalize_to_teamrankings_names(name) == name
+
+    # Near misses are not fuzzy matched by plain lookups
+    for f in [team_id, normalize_to_teamrankings_names, normalize_to_donchess_names]:
+        with pytest.raises(TeamNotFoundException):
+            f(name + "x")
+
+    # and nothing is learned or saved
+    assert name + "x" not in TEAM_REGISTRY.ids
+    assert os.path.exists(LEARNED_ALIASES_FPATH) == existed
+
+
+def test_registry_ids_agree_across_universes():
+    registry = TEAM_REGISTRY
+    for tid, name in enumerate(registry.teamrankings_names):
+        assert team_id(name) == tid
+        assert team_id(registry.donchess_names[tid]) == tid
+        assert team_id(tid) == tid
+        assert teamrankings_name(tid) == name
+        assert normalize_to_donchess_names(name) == registry.donchess_names[tid]
+    for name, tid in registry.exact_ids.items():
+        assert registry.ids[name] == tid
+        assert normalize_to_teamrankings_names(name) == teamrankings_name(tid)
+
+
+def test_registry_resolves_new_names_in_batch(tmp_path):
+    registry = TeamRegistry()
+    registry.resolver.alias_fpath = str(tmp_path / "aliases.json")
+    tid = team_id("Duke")
+    new_name = registry.donchess_names[tid] + " (ACC)"
+
+    assert new_name not in registry.ids
+    assert registry.resolve_names([new_name, "Duke", "Nowhere U"]) == {"Nowhere U"}
+    assert registry.team_id(new_name) == tid
+    with pytest.raises(TeamNotFoundException):
+        registry.team_id("Nowhere U")
+    # Learned names are not exact names
+    with pytest.raises(TeamNotFoundException):
+        registry.exact_team_id(new_name)
+    with open(tmp_path / "aliases.json", 'r') as f:
+        assert registry.exact_ids[json.load(f)["team_registry"][new_name]] == tid